@@ -8,7 +8,8 @@ import os
 
 from app.database import get_db
 from app import models
-from app.services.redis_cache import get_cached_user, set_cached_user
+from app.services.redis_cache import UserSnapshot, load_user, delete_cached_user
+from app.auth.token_cache import token_cache
 
 load_dotenv()
 
@@ -21,43 +22,53 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 async def get_current_user(
     token: str = Depends(oauth2_scheme),
     db: AsyncSession = Depends(get_db)
-) -> models.User:
+) -> UserSnapshot:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+    # Same token seen recently: skip signature check and Redis
+    cached = token_cache.get(token)
+    if cached:
+        return cached[1]
+
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         email: str = payload.get("sub")
-        if email is None:
+        # Single-purpose tokens (email verification, password reset) are not access tokens.
+        if email is None or payload.get("type") is not None:
             raise credentials_exception
     except JWTError:
         raise credentials_exception
 
-    # Check Redis cache
-    cached_user = await get_cached_user(email)
-    if cached_user:
-        return models.User(**cached_user)  # ⬅️ Повертаємо ORM-сумісний об'єкт
+    async def load_from_db():
+        result = await db.execute(select(models.User).filter_by(email=email))
+        user = result.scalar_one_or_none()
+        return UserSnapshot.from_user(user) if user else None
 
-    # DB fallback
-    result = await db.execute(select(models.User).filter_by(email=email))
-    user = result.scalar_one_or_none()
+    # Redis cache, DB fallback
+    user = await load_user(email, load_from_db)
     if user is None:
         raise credentials_exception
 
-    await set_cached_user(email, {
-        "id": user.id,
-        "email": user.email,
-        "is_verified": user.is_verified,
-        "avatar_url": user.avatar_url,
-        "is_admin": user.is_admin
-    })
+    token_cache.set(token, payload, user)
     return user
 
 
+async def invalidate_user(email: str) -> None:
+    """
+    Drop cached copies of a user after their account data changed.
+
+    :param email: The email address of the changed user.
+    """
+    token_cache.invalidate_user(email)
+    await delete_cached_user(email)
+
+
 async def get_current_admin_user(
-    current_user: models.User = Depends(get_current_user)
+    current_user: UserSnapshot = Depends(get_current_user)
 ):
     if not current_user.is_admin:
         raise HTTPException(
@@ -0,0 +1,110 @@
+"""
+In-process cache of verified access tokens.
+
+Maps a SHA-256 hash of the bearer token to its decoded claims and a snapshot
+of the user, so repeated requests with the same token skip both ``jwt.decode``
+and the Redis lookup. Entries expire at the token's ``exp`` or after ``ttl``
+seconds, whichever comes first; the short ``ttl`` bounds how long other worker
+processes can serve a snapshot after a change made through this one.
+"""
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from app.config import settings
+from app.services import metrics
+from app.services.redis_cache import UserSnapshot
+
+
+class TokenCache:
+    """
+    Bounded LRU cache of ``token hash -> (claims, user snapshot)`` with per-entry expiry.
+    """
+
+    def __init__(self, maxsize: int = 10000, ttl: float = 60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[str, tuple[float, dict, UserSnapshot]] = OrderedDict()
+        self._keys_by_email: dict[str, set[str]] = {}
+
+    @staticmethod
+    def _key(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def get(self, token: str) -> Optional[tuple[dict, UserSnapshot]]:
+        """
+        Return the cached ``(claims, user)`` pair for a token, or None on a miss.
+        """
+        key = self._key(token)
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= time.time():
+            if entry is not None:
+                self._discard(key)
+            self.misses += 1
+            metrics.cache_requests.inc(cache="token", result="miss")
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        metrics.cache_requests.inc(cache="token", result="hit")
+        return entry[1], entry[2]
+
+    def peek(self, token: str) -> Optional[dict]:
+        """
+        Return the cached claims of a token without counting a lookup or
+        refreshing its LRU position, or None if it is not cached.
+        """
+        entry = self._entries.get(self._key(token))
+        if entry is None or entry[0] <= time.time():
+            return None
+        return entry[1]
+
+    def set(self, token: str, claims: dict, user: UserSnapshot) -> None:
+        """
+        Cache the decoded claims and user snapshot for a verified token.
+        """
+        expires_at = time.time() + self.ttl
+        if claims.get("exp") is not None:
+            expires_at = min(expires_at, float(claims["exp"]))
+
+        key = self._key(token)
+        self._discard(key)
+        self._entries[key] = (expires_at, claims, user)
+        self._keys_by_email.setdefault(user.email, set()).add(key)
+        while len(self._entries) > self.maxsize:
+            self._discard(next(iter(self._entries)))
+
+    def invalidate_user(self, email: str) -> None:
+        """
+        Drop every cached token of a user, e.g. after their account changed.
+        """
+        for key in list(self._keys_by_email.get(email, ())):
+            self._discard(key)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._keys_by_email.clear()
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+        }
+
+    def _discard(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        email = entry[2].email
+        keys = self._keys_by_email.get(email)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_email[email]
+
+
+token_cache = TokenCache(maxsize=settings.TOKEN_CACHE_SIZE, ttl=settings.TOKEN_CACHE_TTL)
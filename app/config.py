@@ -3,13 +3,77 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+
+def _env_bool(name: str, default: str = "false") -> bool:
+    return os.getenv(name, default).lower() in ("1", "true", "yes", "on")
+
+
 class Settings:
     SECRET_KEY = os.getenv("SECRET_KEY")
     DATABASE_URL = os.getenv("DATABASE_URL")
+    DATABASE_REPLICA_URL = os.getenv("DATABASE_REPLICA_URL")
+    DB_ECHO = _env_bool("DB_ECHO")
+    DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+    DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+    DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+    DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+    DB_POOL_PRE_PING = _env_bool("DB_POOL_PRE_PING", "true")
+    DB_STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "100"))
     REDIS_URL = os.getenv("REDIS_URL")
+    REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", "50"))
+    REDIS_POOL_TIMEOUT = float(os.getenv("REDIS_POOL_TIMEOUT", "0.5"))
+    REDIS_SOCKET_TIMEOUT = float(os.getenv("REDIS_SOCKET_TIMEOUT", "0.5"))
+    REDIS_CONNECT_TIMEOUT = float(os.getenv("REDIS_CONNECT_TIMEOUT", "0.5"))
+    REDIS_HEALTH_CHECK_INTERVAL = int(os.getenv("REDIS_HEALTH_CHECK_INTERVAL", "30"))
+    REDIS_BREAKER_THRESHOLD = int(os.getenv("REDIS_BREAKER_THRESHOLD", "5"))
+    REDIS_BREAKER_RESET_TIMEOUT = float(os.getenv("REDIS_BREAKER_RESET_TIMEOUT", "10"))
     FRONTEND_URL = os.getenv("FRONTEND_URL")
     CLOUDINARY_CLOUD_NAME = os.getenv("CLOUDINARY_CLOUD_NAME")
     CLOUDINARY_API_KEY = os.getenv("CLOUDINARY_API_KEY")
     CLOUDINARY_API_SECRET = os.getenv("CLOUDINARY_API_SECRET")
+    TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "10000"))
+    TOKEN_CACHE_TTL = float(os.getenv("TOKEN_CACHE_TTL", "60"))
+    CONTACT_CACHE_SIZE = int(os.getenv("CONTACT_CACHE_SIZE", "10000"))
+    CONTACT_CACHE_TTL = float(os.getenv("CONTACT_CACHE_TTL", "30"))
+    CONTACT_CACHE_REDIS_TTL = int(os.getenv("CONTACT_CACHE_REDIS_TTL", "300"))
+    PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "4"))
+    PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "64"))
+    SERVER_TIMING = _env_bool("SERVER_TIMING")
+    PROFILER_ENABLED = _env_bool("PROFILER_ENABLED")
+    PROFILER_SAMPLE_RATE = float(os.getenv("PROFILER_SAMPLE_RATE", "0.01"))
+    PROFILER_THRESHOLD_MS = float(os.getenv("PROFILER_THRESHOLD_MS", "500"))
+    PROFILER_INTERVAL_MS = float(os.getenv("PROFILER_INTERVAL_MS", "5"))
+    PROFILER_PATHS = os.getenv("PROFILER_PATHS", "/contacts,/auth")
+    PROFILER_DIR = os.getenv("PROFILER_DIR", "profiles")
+    PROFILER_MAX_DUMPS = int(os.getenv("PROFILER_MAX_DUMPS", "100"))
+    PROFILER_MAX_BYTES = int(os.getenv("PROFILER_MAX_BYTES", str(50 * 1024 * 1024)))
+    RATE_LIMIT_ENABLED = _env_bool("RATE_LIMIT_ENABLED", "true")
+    RATE_LIMITS = os.getenv(
+        "RATE_LIMITS", "default=120/minute,login=10/minute,search=30/minute,profile=5/minute"
+    )
+    EMAIL_VERIFY_TOKEN_HOURS = float(os.getenv("EMAIL_VERIFY_TOKEN_HOURS", "24"))
+    EMAIL_QUEUE = os.getenv("EMAIL_QUEUE", "redis")
+    EMAIL_TRANSPORT = os.getenv("EMAIL_TRANSPORT", "console")
+    EMAIL_FROM = os.getenv("EMAIL_FROM", "no-reply@localhost")
+    EMAIL_FILE_DIR = os.getenv("EMAIL_FILE_DIR", "outbox")
+    EMAIL_BATCH_SIZE = int(os.getenv("EMAIL_BATCH_SIZE", "50"))
+    EMAIL_MAX_ATTEMPTS = int(os.getenv("EMAIL_MAX_ATTEMPTS", "5"))
+    EMAIL_RETRY_BASE_SECONDS = float(os.getenv("EMAIL_RETRY_BASE_SECONDS", "30"))
+    EMAIL_RETRY_MAX_SECONDS = float(os.getenv("EMAIL_RETRY_MAX_SECONDS", "3600"))
+    SMTP_HOST = os.getenv("SMTP_HOST", "localhost")
+    SMTP_PORT = int(os.getenv("SMTP_PORT", "587"))
+    SMTP_USERNAME = os.getenv("SMTP_USERNAME")
+    SMTP_PASSWORD = os.getenv("SMTP_PASSWORD")
+    SMTP_STARTTLS = _env_bool("SMTP_STARTTLS", "true")
+    JOBS_BACKEND = os.getenv("JOBS_BACKEND", "memory")
+    JOBS_WORKERS = int(os.getenv("JOBS_WORKERS", "4"))
+    JOBS_MAX_QUEUE = int(os.getenv("JOBS_MAX_QUEUE", "1000"))
+    JOBS_DRAIN_TIMEOUT = float(os.getenv("JOBS_DRAIN_TIMEOUT", "10"))
+    JOBS_RUN_IN_API = _env_bool("JOBS_RUN_IN_API", "true")
+    AVATAR_STORAGE = os.getenv("AVATAR_STORAGE", "cloudinary")
+    AVATAR_LOCAL_DIR = os.getenv("AVATAR_LOCAL_DIR", "media/avatars")
+    AVATAR_BASE_URL = os.getenv("AVATAR_BASE_URL", "/media/avatars")
+    AVATAR_MAX_BYTES = int(os.getenv("AVATAR_MAX_BYTES", str(5 * 1024 * 1024)))
+    AVATAR_SIZE = int(os.getenv("AVATAR_SIZE", "256"))
 
 settings = Settings()
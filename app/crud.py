@@ -1,15 +1,17 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy import or_, extract
-from typing import List, Optional
+from sqlalchemy import and_, or_, case, false, func, table, column, update, insert, delete, bindparam
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, List, Optional, Set, Union
 from datetime import datetime, timedelta
 from sqlalchemy.exc import IntegrityError
-from passlib.context import CryptContext
+from pydantic import ValidationError
 from fastapi import HTTPException, status
 
 from . import models, schemas
-
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from .auth.dependencies import invalidate_user
+from .services.contact_cache import contact_cache
+from .services.hashing import password_hasher
 
 
 async def get_user_by_email(email: str, db: AsyncSession) -> Optional[models.User]:
@@ -42,7 +44,7 @@ async def create_user(user_data: schemas.UserCreate, db: AsyncSession, is_admin:
             detail="User with this email already exists."
         )
 
-    hashed_password = pwd_context.hash(user_data.password)
+    hashed_password = await password_hasher.hash(user_data.password)
     new_user = models.User(
         email=user_data.email,
         password=hashed_password,
@@ -54,8 +56,229 @@ async def create_user(user_data: schemas.UserCreate, db: AsyncSession, is_admin:
     return new_user
 
 
+async def _update_user(email: str, db: AsyncSession, *conditions, **values) -> bool:
+    """
+    Update columns of a user and drop every cached copy of that user.
+
+    All user mutations go through here so the token and Redis caches never
+    serve data older than the database.
+
+    :param email: The email address of the user.
+    :param db: The asynchronous database session.
+    :param conditions: Extra conditions the user row must meet to be updated.
+    :param values: Column values to set.
+    :return: True if a user was updated, otherwise False.
+    """
+    result = await db.execute(
+        update(models.User).where(models.User.email == email, *conditions).values(**values)
+    )
+    await db.commit()
+    updated = result.rowcount > 0
+    if updated:
+        await invalidate_user(email)
+    return updated
+
+
+async def update_password(email: str, new_password: str, db: AsyncSession) -> bool:
+    """
+    Hash and set a new password for a user.
+
+    :param email: The email address of the user.
+    :param new_password: The new plain-text password.
+    :param db: The asynchronous database session.
+    :return: True if the user exists, otherwise False.
+    """
+    hashed_password = await password_hasher.hash(new_password)
+    return await _update_user(email, db, password=hashed_password)
+
+
+async def verify_user_email(email: str, db: AsyncSession) -> bool:
+    """
+    Mark a user's email address as verified with one conditional ``UPDATE``.
+
+    :param email: The email address to verify.
+    :param db: The asynchronous database session.
+    :return: True if the user was verified now, False if there is no such
+        unverified user (unknown, or verified before).
+    """
+    return await _update_user(email, db, models.User.is_verified.isnot(True), is_verified=True)
+
+
+async def update_avatar_url(email: str, avatar_url: str, db: AsyncSession) -> bool:
+    """
+    Set the avatar URL of a user.
+
+    :param email: The email address of the user.
+    :param avatar_url: The new public avatar URL.
+    :param db: The asynchronous database session.
+    :return: True if the user exists, otherwise False.
+    """
+    return await _update_user(email, db, avatar_url=avatar_url)
+
+
+# === ADMIN ===
+
+_USER_IS_ADMIN = func.coalesce(models.User.is_admin, false())
+_USER_IS_VERIFIED = func.coalesce(models.User.is_verified, false())
+ADMIN_USER_COLUMNS = (
+    models.User.id,
+    models.User.email,
+    _USER_IS_ADMIN.label("is_admin"),
+    _USER_IS_VERIFIED.label("is_verified"),
+)
+
+
+def _email_prefix_clause(prefix: str):
+    # The range lets the email index serve the filter on every backend, but it
+    # only equals "starts with" under byte-order collation: under a linguistic
+    # collation (PostgreSQL en_US.UTF-8) 'Alice@' sorts between 'al' and 'am'.
+    # LIKE keeps the match exact; on SQLite the range keeps it case-sensitive.
+    upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+    return and_(
+        models.User.email >= prefix,
+        models.User.email < upper,
+        models.User.email.startswith(prefix, autoescape=True)
+    )
+
+
+async def list_users(
+    db: AsyncSession,
+    limit: int = 100,
+    after: Optional[int] = None,
+    is_admin: Optional[bool] = None,
+    is_verified: Optional[bool] = None,
+    email_prefix: Optional[str] = None
+) -> List[dict]:
+    """
+    List users for administration, ordered by ID, with their contact counts.
+
+    Reads only the listed columns (never password hashes) and counts the
+    contacts of the whole page with one grouped query.
+
+    :param db: The asynchronous database session.
+    :param limit: Maximum number of users to return.
+    :param after: Keyset cursor: return only users with an ID greater than this one.
+    :param is_admin: Only admins (True) or non-admins (False).
+    :param is_verified: Only verified (True) or unverified (False) users.
+    :param email_prefix: Only users whose email starts with this (case-sensitive).
+    :return: Dicts with ``id``, ``email``, ``is_admin``, ``is_verified`` and ``contact_count``.
+    """
+    stmt = select(*ADMIN_USER_COLUMNS)
+    if after is not None:
+        stmt = stmt.where(models.User.id > after)
+    if is_admin is not None:
+        stmt = stmt.where(_USER_IS_ADMIN == is_admin)
+    if is_verified is not None:
+        stmt = stmt.where(_USER_IS_VERIFIED == is_verified)
+    if email_prefix:
+        stmt = stmt.where(_email_prefix_clause(email_prefix))
+    result = await db.execute(stmt.order_by(models.User.id).limit(limit))
+    users = [dict(row) for row in result.mappings()]
+    if not users:
+        return users
+
+    result = await db.execute(
+        select(models.Contact.owner_id, func.count())
+        .where(models.Contact.owner_id.in_([user["id"] for user in users]))
+        .group_by(models.Contact.owner_id)
+    )
+    counts = dict(result.all())
+    for user in users:
+        user["contact_count"] = counts.get(user["id"], 0)
+    return users
+
+
+async def stream_users(db: AsyncSession, batch_size: int = 500, **filters) -> AsyncIterator[dict]:
+    """
+    Iterate over all users matching the ``list_users`` filters, page by page.
+
+    :param db: The asynchronous database session.
+    :param batch_size: Number of users read per page.
+    :param filters: ``is_admin``, ``is_verified`` and ``email_prefix`` as for ``list_users``.
+    :return: An async iterator over user dicts.
+    """
+    after = None
+    while True:
+        users = await list_users(db, batch_size, after, **filters)
+        for user in users:
+            yield user
+        if len(users) < batch_size:
+            return
+        after = users[-1]["id"]
+
+
 # === CONTACT CRUD ===
 
+CONTACT_EMAIL_EXISTS = "Contact with this email already exists."
+
+
+@asynccontextmanager
+async def _contact_email_conflict(db: AsyncSession):
+    """
+    Turn a violation of the unique ``(owner_id, email)`` index into a 409.
+
+    :param db: The asynchronous database session, rolled back on conflict.
+    :raises HTTPException: If the owner already has a contact with the email.
+    """
+    try:
+        yield
+    except IntegrityError as exc:
+        await db.rollback()
+        # PostgreSQL names the index; SQLite names its columns.
+        message = str(exc.orig)
+        if "uq_contacts_owner_email" in message or "contacts.owner_id, contacts.email" in message:
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=CONTACT_EMAIL_EXISTS)
+        raise
+
+
+async def _next_contacts_version(db: AsyncSession, owner_id: int, *contact_conditions) -> Optional[int]:
+    """
+    Increment the owner's contact change counter and return the new value.
+
+    The ``UPDATE`` locks the owner's row until commit, so concurrent writes
+    of one owner get increasing versions in commit order. Every write takes
+    this lock before it touches ``contacts``, so writes of one owner cannot
+    deadlock each other.
+
+    :param db: The asynchronous database session.
+    :param owner_id: The owner of the contacts being written.
+    :param contact_conditions: Only bump the version if a contact of the owner
+        matches these conditions.
+    :return: The version to stamp on the written contacts and tombstones, or
+        None if no contact matched ``contact_conditions``.
+    """
+    users = models.User.__table__
+    stmt = (
+        update(users)
+        .where(users.c.id == owner_id)
+        .values(contacts_version=users.c.contacts_version + 1)
+    )
+    if contact_conditions:
+        stmt = stmt.where(
+            select(models.Contact.id)
+            .where(models.Contact.owner_id == owner_id, *contact_conditions)
+            .exists()
+        )
+    if db.get_bind().dialect.update_returning:
+        result = await db.execute(stmt.returning(users.c.contacts_version))
+        return result.scalar_one_or_none()
+    result = await db.execute(stmt)
+    if not result.rowcount:
+        return None
+    result = await db.execute(select(users.c.contacts_version).where(users.c.id == owner_id))
+    return result.scalar_one()
+
+
+async def _add_tombstones(contact_ids: Set[int], version: int, db: AsyncSession, user: models.User) -> None:
+    """
+    Record deleted contacts so delta sync can report them.
+    """
+    await db.execute(
+        insert(models.ContactTombstone),
+        [{"owner_id": user.id, "contact_id": contact_id, "version": version} for contact_id in contact_ids]
+    )
+
+
 async def create_contact(contact: schemas.ContactCreate, db: AsyncSession, user: models.User) -> models.Contact:
     """
     Create a new contact for the given user.
@@ -64,14 +287,129 @@ async def create_contact(contact: schemas.ContactCreate, db: AsyncSession, user:
     :param db: The asynchronous database session.
     :param user: The owner user of the contact.
     :return: The newly created contact object.
+    :raises HTTPException: If the user already has a contact with the same email.
     """
-    new_contact = models.Contact(**contact.dict(), owner_id=user.id)
+    version = await _next_contacts_version(db, user.id)
+    new_contact = models.Contact(**contact.model_dump(), owner_id=user.id, version=version)
     db.add(new_contact)
-    await db.commit()
+    async with _contact_email_conflict(db):
+        await db.commit()
     await db.refresh(new_contact)
+    await contact_cache.invalidate_owner(user.id)
     return new_contact
 
 
+MAX_REPORTED_IMPORT_ERRORS = 1000
+
+
+async def _insert_contact_rows(rows: List[dict], db: AsyncSession) -> None:
+    """
+    Insert a batch of contact rows in one round-trip (COPY on asyncpg, executemany elsewhere).
+    """
+    if db.get_bind().dialect.driver == "asyncpg":
+        connection = await db.connection()
+        raw_connection = await connection.get_raw_connection()
+        columns = list(rows[0])
+        await raw_connection.driver_connection.copy_records_to_table(
+            models.Contact.__tablename__,
+            columns=columns,
+            records=[tuple(row[column] for column in columns) for row in rows]
+        )
+    else:
+        await db.execute(insert(models.Contact), rows)
+
+
+async def import_contacts(
+    records: AsyncIterator[tuple[int, Union[dict, str]]],
+    db: AsyncSession,
+    user: models.User,
+    batch_size: int = 1000
+) -> dict:
+    """
+    Validate and insert a stream of contact records in batches.
+
+    Each batch is inserted with a single statement and committed, so memory
+    use does not depend on the number of records. Invalid records and records
+    whose email the user already has a contact with are skipped and reported;
+    at most ``MAX_REPORTED_IMPORT_ERRORS`` errors are listed. If the body
+    cannot be read further, the error is reported on the next row and the
+    rows read so far are still imported.
+
+    :param records: Async iterator of ``(row number, record or parse error)``.
+    :param db: The asynchronous database session.
+    :param user: The owner of the imported contacts.
+    :param batch_size: Number of rows inserted per statement.
+    :return: A report with ``inserted``, ``failed``, ``errors`` and ``errors_truncated``.
+    :raises HTTPException: If a concurrent write adds one of the batch's emails first.
+    """
+    report = {"inserted": 0, "failed": 0, "errors": [], "errors_truncated": False}
+    batch = []
+    batch_rows = []
+
+    def fail(row: int, message: str) -> None:
+        report["failed"] += 1
+        if len(report["errors"]) < MAX_REPORTED_IMPORT_ERRORS:
+            report["errors"].append({"row": row, "error": message})
+        else:
+            report["errors_truncated"] = True
+
+    async def flush() -> None:
+        result = await db.execute(
+            select(models.Contact.email)
+            .where(models.Contact.owner_id == user.id, models.Contact.email.in_({values["email"] for values in batch}))
+        )
+        taken = set(result.scalars().all())
+        rows = []
+        for row, values in zip(batch_rows, batch):
+            if values["email"] in taken:
+                fail(row, f"email: {CONTACT_EMAIL_EXISTS}")
+            else:
+                taken.add(values["email"])
+                rows.append(values)
+        batch.clear()
+        batch_rows.clear()
+        if not rows:
+            return
+
+        version = await _next_contacts_version(db, user.id)
+        for values in rows:
+            values["version"] = version
+        async with _contact_email_conflict(db):
+            await _insert_contact_rows(rows, db)
+            await db.commit()
+        await contact_cache.invalidate_owner(user.id)
+        report["inserted"] += len(rows)
+
+    row = 0
+    try:
+        async for row, record in records:
+            if isinstance(record, str):
+                fail(row, record)
+                continue
+            try:
+                contact = schemas.ContactCreate.model_validate(record)
+            except ValidationError as exc:
+                fail(row, "; ".join(
+                    f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}" for error in exc.errors()
+                ))
+                continue
+            values = contact.model_dump()
+            values["owner_id"] = user.id
+            values["birthday_mmdd"] = models.birthday_mmdd(contact.birthday)
+            batch.append(values)
+            batch_rows.append(row)
+            if len(batch) >= batch_size:
+                await flush()
+    except ValueError as exc:
+        # The rest of the body cannot be read (a line too long, invalid UTF-8).
+        # Earlier batches are committed, so report them instead of failing.
+        fail(row + 1, f"{exc}; import stopped")
+
+    if batch:
+        await flush()
+    return report
+
+
 async def get_contact(contact_id: int, db: AsyncSession, user: models.User) -> Optional[models.Contact]:
     """
     Retrieve a contact by its ID for a specific user.
@@ -87,93 +425,507 @@ async def get_contact(contact_id: int, db: AsyncSession, user: models.User) -> O
     return result.scalar_one_or_none()
 
 
-async def get_contacts(db: AsyncSession, user: models.User) -> List[models.Contact]:
+async def get_contacts(
+    db: AsyncSession,
+    user: models.User,
+    limit: Optional[int] = None,
+    after: Optional[int] = None
+) -> List[models.Contact]:
     """
-    Retrieve all contacts for a given user.
+    Retrieve contacts for a given user, ordered by ID.
+
+    Uses keyset pagination: pass the ID of the last contact of the previous
+    page as ``after`` to get the next page without scanning skipped rows.
 
     :param db: The asynchronous database session.
     :param user: The owner user.
+    :param limit: Maximum number of contacts to return (all if None).
+    :param after: Return only contacts with an ID greater than this one.
     :return: A list of contacts belonging to the user.
     """
-    result = await db.execute(select(models.Contact).where(models.Contact.owner_id == user.id))
+    result = await db.execute(_get_contacts_stmt(user, limit, after))
     return result.scalars().all()
 
 
+def _get_contacts_stmt(user: models.User, limit: Optional[int], after: Optional[int]):
+    stmt = select(models.Contact).where(models.Contact.owner_id == user.id)
+    if after is not None:
+        stmt = stmt.where(models.Contact.id > after)
+    stmt = stmt.order_by(models.Contact.id)
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    return stmt
+
+
+async def stream_contacts(db: AsyncSession, user: models.User, batch_size: int = 500) -> AsyncIterator[models.Contact]:
+    """
+    Stream all contacts of a user, ordered by ID, without loading them into a list.
+
+    Rows are fetched from the server in batches of ``batch_size``.
+
+    :param db: The asynchronous database session.
+    :param user: The owner user.
+    :param batch_size: Number of rows fetched per round-trip.
+    :return: An async iterator over the user's contacts.
+    """
+    result = await db.stream(
+        select(models.Contact)
+        .where(models.Contact.owner_id == user.id)
+        .order_by(models.Contact.id)
+        .execution_options(yield_per=batch_size)
+    )
+    async for contact in result.scalars():
+        yield contact
+
+
 async def update_contact(contact_id: int, updated: schemas.ContactUpdate, db: AsyncSession, user: models.User) -> Optional[models.Contact]:
     """
     Update details of an existing contact.
 
+    Only the fields set on ``updated`` are changed. Runs as a single
+    ``UPDATE ... RETURNING`` statement where the backend supports it.
+
     :param contact_id: The unique identifier of the contact.
     :param updated: Schema containing fields to update.
     :param db: The asynchronous database session.
     :param user: The owner user.
     :return: The updated contact object if found, otherwise None.
+    :raises HTTPException: If the new email is already used by another contact of the user.
     """
-    contact = await get_contact(contact_id, db, user)
-    if contact:
-        for field, value in updated.dict(exclude_unset=True).items():
-            setattr(contact, field, value)
+    values = updated.model_dump(exclude_unset=True)
+    if not values:
+        return await get_contact(contact_id, db, user)
+    if "birthday" in values:
+        values["birthday_mmdd"] = models.birthday_mmdd(values["birthday"])
+    values["version"] = await _next_contacts_version(db, user.id, models.Contact.id == contact_id)
+    if values["version"] is None:
         await db.commit()
-        await db.refresh(contact)
+        return None
+
+    stmt = (
+        update(models.Contact)
+        .where(models.Contact.id == contact_id, models.Contact.owner_id == user.id)
+        .values(**values)
+    )
+    async with _contact_email_conflict(db):
+        if db.get_bind().dialect.update_returning:
+            result = await db.execute(
+                stmt.returning(models.Contact).execution_options(populate_existing=True)
+            )
+            contact = result.scalar_one_or_none()
+        else:
+            result = await db.execute(stmt)
+            contact = await get_contact(contact_id, db, user) if result.rowcount else None
+        if contact is None:
+            # Deleted after the version was bumped: do not spend the version.
+            await db.rollback()
+            return None
+        await db.commit()
+
+    if contact:
+        await contact_cache.invalidate_owner(user.id)
     return contact
 
 
 async def delete_contact(contact_id: int, db: AsyncSession, user: models.User) -> bool:
     """
-    Delete a specific contact for a user.
+    Delete a specific contact for a user with a single ``DELETE`` statement.
 
     :param contact_id: The unique identifier of the contact.
     :param db: The asynchronous database session.
     :param user: The owner user.
     :return: True if deletion was successful, False otherwise.
     """
-    contact = await get_contact(contact_id, db, user)
-    if contact:
-        await db.delete(contact)
+    version = await _next_contacts_version(db, user.id, models.Contact.id == contact_id)
+    if version is None:
+        # Nothing was written; end the transaction without expiring loaded objects.
         await db.commit()
-        return True
-    return False
+        return False
+    stmt = delete(models.Contact).where(models.Contact.id == contact_id, models.Contact.owner_id == user.id)
+    if db.get_bind().dialect.delete_returning:
+        result = await db.execute(stmt.returning(models.Contact.id))
+        deleted = result.scalar_one_or_none() is not None
+    else:
+        result = await db.execute(stmt)
+        deleted = result.rowcount > 0
+    if not deleted:
+        await db.rollback()
+        return False
+    await _add_tombstones({contact_id}, version, db, user)
+    await db.commit()
+
+    await contact_cache.invalidate_owner(user.id)
+    return True
 
 
-async def search_contacts(query: str, db: AsyncSession, user: models.User) -> List[models.Contact]:
+# === BATCH OPERATIONS ===
+
+async def get_contacts_by_ids(ids: List[int], db: AsyncSession, user: models.User) -> List[models.Contact]:
+    """
+    Retrieve several contacts of a user by ID in one query.
+
+    :param ids: The contact IDs.
+    :param db: The asynchronous database session.
+    :param user: The owner user.
+    :return: The contacts that exist and belong to the user, in no particular order.
+    """
+    result = await db.execute(
+        select(models.Contact).where(models.Contact.id.in_(ids), models.Contact.owner_id == user.id)
+    )
+    return result.scalars().all()
+
+
+async def batch_update_contacts(
+    items: List[schemas.ContactBatchUpdateItem],
+    db: AsyncSession,
+    user: models.User
+) -> Dict[int, models.Contact]:
+    """
+    Apply partial updates to several contacts in one transaction.
+
+    Items that set the same fields share one executemany ``UPDATE``, so the
+    number of statements depends on the distinct field sets, not on the
+    number of items.
+
+    :param items: Contact IDs with the fields to change.
+    :param db: The asynchronous database session.
+    :param user: The owner user.
+    :return: The updated contacts that belong to the user, keyed by ID.
+    :raises HTTPException: If an update would give two contacts of the user the same email.
+    """
+    contacts = models.Contact.__table__
+    groups: Dict[tuple, List[dict]] = {}
+    for item in items:
+        values = item.model_dump(exclude_unset=True, exclude={"id"})
+        if "birthday" in values:
+            values["birthday_mmdd"] = models.birthday_mmdd(values["birthday"])
+        if values:
+            params = {f"b_{field}": value for field, value in values.items()}
+            params["b_id"] = item.id
+            groups.setdefault(tuple(sorted(values)), []).append(params)
+
+    if groups:
+        version = await _next_contacts_version(db, user.id, models.Contact.id.in_([item.id for item in items]))
+        if version is None:
+            await db.commit()
+            return {}
+    async with _contact_email_conflict(db):
+        for fields, params in groups.items():
+            stmt = (
+                update(contacts)
+                .where(contacts.c.id == bindparam("b_id"), contacts.c.owner_id == user.id)
+                .values({**{field: bindparam(f"b_{field}") for field in fields}, "version": version})
+            )
+            await db.execute(stmt, params)
+
+    result = await db.execute(
+        select(models.Contact)
+        .where(models.Contact.id.in_([item.id for item in items]), models.Contact.owner_id == user.id)
+        .execution_options(populate_existing=True)
+    )
+    updated = {contact.id: contact for contact in result.scalars().all()}
+    await db.commit()
+
+    if updated:
+        await contact_cache.invalidate_owner(user.id)
+    return updated
+
+
+async def batch_delete_contacts(ids: List[int], db: AsyncSession, user: models.User) -> Set[int]:
+    """
+    Delete several contacts of a user with a single ``DELETE`` statement.
+
+    :param ids: The contact IDs.
+    :param db: The asynchronous database session.
+    :param user: The owner user.
+    :return: The IDs that were deleted.
+    """
+    version = await _next_contacts_version(db, user.id, models.Contact.id.in_(ids))
+    if version is None:
+        await db.commit()
+        return set()
+    owned = (models.Contact.id.in_(ids), models.Contact.owner_id == user.id)
+    if db.get_bind().dialect.delete_returning:
+        result = await db.execute(delete(models.Contact).where(*owned).returning(models.Contact.id))
+        deleted = set(result.scalars().all())
+    else:
+        result = await db.execute(select(models.Contact.id).where(*owned))
+        deleted = set(result.scalars().all())
+        await db.execute(delete(models.Contact).where(*owned))
+    if not deleted:
+        await db.rollback()
+        return set()
+    await _add_tombstones(deleted, version, db, user)
+    await db.commit()
+
+    await contact_cache.invalidate_owner(user.id)
+    return deleted
+
+
+# === DELTA SYNC ===
+
+async def get_changes(
+    since: Optional[int],
+    db: AsyncSession,
+    user: models.User,
+    limit: int = 1000,
+    after: Optional[int] = None
+) -> Optional[dict]:
+    """
+    Collect one page of the contacts created, updated or deleted after a sync position.
+
+    Contacts are returned in ``(version, id)`` order, at most ``limit`` per
+    page, so a full sync of a large address book is read page by page.
+    Deletions are returned with the page that covers their version. The
+    owner's current version is read first and bounds both queries, so a write
+    committed while the changes are read is reported by a later page rather
+    than half now and half later.
+
+    A deleted contact's ID can be reused by a new contact (SQLite reuses the
+    highest rowid), so the same ID can be in both ``deleted`` and ``changed``
+    of one page; clients must apply ``deleted`` before ``changed``.
+
+    :param since: The version of the last sync position, or None to start a full sync.
+    :param db: The asynchronous database session.
+    :param user: The owner user.
+    :param limit: Maximum number of contacts in the page.
+    :param after: ID of the last contact of the previous page at version ``since``,
+        when the previous page was full.
+    :return: ``changed`` contacts, ``deleted`` contact IDs and the position to
+        continue from: ``version`` and, if more contacts remain, ``after``.
+        None if ``since`` is ahead of the owner's version.
+    """
+    result = await db.execute(select(models.User.contacts_version).where(models.User.id == user.id))
+    version = result.scalar_one()
+    if since is not None and since > version:
+        return None
+
+    # A full sync returns every contact, including those at version 0 that
+    # existed before versions were tracked.
+    conditions = [models.Contact.owner_id == user.id, models.Contact.version <= version]
+    if since is not None and after is not None:
+        conditions.append(or_(
+            models.Contact.version > since,
+            and_(models.Contact.version == since, models.Contact.id > after)
+        ))
+    elif since is not None:
+        conditions.append(models.Contact.version > since)
+    result = await db.execute(
+        select(models.Contact)
+        .where(*conditions)
+        .order_by(models.Contact.version, models.Contact.id)
+        .limit(limit + 1)
+    )
+    changed = result.scalars().all()
+
+    next_after = None
+    if len(changed) > limit:
+        changed = changed[:limit]
+        version, next_after = changed[-1].version, changed[-1].id
+
+    deleted = []
+    if since is not None:
+        result = await db.execute(
+            select(models.ContactTombstone.contact_id)
+            .where(
+                models.ContactTombstone.owner_id == user.id,
+                models.ContactTombstone.version > since,
+                models.ContactTombstone.version <= version
+            )
+            .order_by(models.ContactTombstone.version)
+        )
+        deleted = result.scalars().all()
+    return {"changed": changed, "deleted": deleted, "version": version, "after": next_after}
+
+
+async def search_contacts(
+    query: str,
+    db: AsyncSession,
+    user: models.User,
+    limit: int = 50,
+    offset: int = 0
+) -> List[models.Contact]:
     """
     Search for contacts by first name, last name, or email.
 
+    Matching is a case-insensitive substring match served by the search index
+    (FTS5 trigram table on SQLite, pg_trgm GIN indexes on PostgreSQL). Results
+    are ordered by relevance, best match first.
+
     :param query: The search string.
     :param db: The asynchronous database session.
     :param user: The owner user.
+    :param limit: Maximum number of contacts to return.
+    :param offset: Number of ranked results to skip.
     :return: A list of contacts matching the query.
     """
-    result = await db.execute(
-        select(models.Contact).where(
-            models.Contact.owner_id == user.id,
+    result = await db.execute(_search_contacts_stmt(query, db, user, limit, offset))
+    return result.scalars().all()
+
+
+def _search_contacts_stmt(query: str, db: AsyncSession, user: models.User, limit: int, offset: int):
+    dialect = db.get_bind().dialect.name
+    owned = models.Contact.owner_id == user.id
+
+    if dialect == "sqlite" and len(query) >= 3:
+        # The trigram tokenizer needs at least three characters to match.
+        fts = table("contacts_fts", column("rowid"), column("contacts_fts"), column("rank"))
+        phrase = '"' + query.replace('"', '""') + '"'
+        stmt = (
+            select(models.Contact)
+            .join(fts, fts.c.rowid == models.Contact.id)
+            .where(owned, fts.c.contacts_fts.op("MATCH")(phrase))
+            .order_by(fts.c.rank, models.Contact.id)
+        )
+    else:
+        pattern = f"%{query}%"
+        stmt = select(models.Contact).where(
+            owned,
             or_(
-                models.Contact.first_name.ilike(f"%{query}%"),
-                models.Contact.last_name.ilike(f"%{query}%"),
-                models.Contact.email.ilike(f"%{query}%")
+                models.Contact.first_name.ilike(pattern),
+                models.Contact.last_name.ilike(pattern),
+                models.Contact.email.ilike(pattern)
             )
         )
-    )
-    return result.scalars().all()
+        if dialect == "postgresql":
+            rank = func.greatest(
+                func.similarity(models.Contact.first_name, query),
+                func.similarity(models.Contact.last_name, query),
+                func.similarity(models.Contact.email, query)
+            )
+            stmt = stmt.order_by(rank.desc(), models.Contact.id)
+        else:
+            stmt = stmt.order_by(models.Contact.id)
+    return stmt.limit(limit).offset(offset)
 
 
-async def upcoming_birthdays(db: AsyncSession, user: models.User) -> List[models.Contact]:
+async def upcoming_birthdays(db: AsyncSession, user: models.User, days: int = 7) -> List[models.Contact]:
     """
-    Retrieve contacts with birthdays in the next 7 days for a specific user.
+    Retrieve contacts with birthdays within the next ``days`` days for a specific user.
+
+    The window includes today and wraps across month and year boundaries.
+    Results are ordered by the next occurrence of the birthday.
 
     :param db: The asynchronous database session.
     :param user: The owner user.
+    :param days: Size of the window in days.
     :return: A list of contacts with upcoming birthdays.
     """
+    result = await db.execute(_upcoming_birthdays_stmt(user, days))
+    return result.scalars().all()
+
+
+def _upcoming_birthdays_stmt(user: models.User, days: int):
     today = datetime.today().date()
-    in_seven_days = today + timedelta(days=7)
+    end = today + timedelta(days=days)
+    start_key = models.birthday_mmdd(today)
+    end_key = models.birthday_mmdd(end)
+    key = models.Contact.birthday_mmdd
 
-    result = await db.execute(
-        select(models.Contact).where(
-            models.Contact.owner_id == user.id,
-            extract('month', models.Contact.birthday) == today.month,
-            extract('day', models.Contact.birthday) >= today.day,
-            extract('day', models.Contact.birthday) <= in_seven_days.day
-        )
-    )
-    return result.scalars().all()
+    stmt = select(models.Contact).where(models.Contact.owner_id == user.id)
+    if days >= 365:
+        stmt = stmt.where(key.is_not(None))
+    elif end.year == today.year:
+        stmt = stmt.where(key.between(start_key, end_key))
+    else:
+        stmt = stmt.where(or_(key >= start_key, key <= end_key))
+
+    # Birthdays later this year come before the ones after New Year.
+    return stmt.order_by(case((key >= start_key, 0), else_=1), key, models.Contact.id)
+
+
+# === RESPONSE DATA ===
+
+# Columns of schemas.ContactResponse, in its field order.
+CONTACT_RESPONSE_COLUMNS = tuple(getattr(models.Contact, name) for name in schemas.ContactResponse.model_fields)
+
+
+def _contact_data(contact: models.Contact) -> dict:
+    return schemas.ContactResponse.model_validate(contact).model_dump(mode="json")
+
+
+async def _fetch_contact_data(stmt, db: AsyncSession) -> List[dict]:
+    """
+    Run a contact query for response columns only and return JSON-ready dicts.
+
+    Skips ORM object construction and per-row model validation; the rows come
+    from our own schema, so they already match ``ContactResponse``.
+    """
+    result = await db.execute(stmt.with_only_columns(*CONTACT_RESPONSE_COLUMNS))
+    rows = [dict(row) for row in result.mappings()]
+    for row in rows:
+        if row["birthday"] is not None:
+            row["birthday"] = row["birthday"].isoformat()
+    return rows
+
+
+async def search_contacts_data(
+    query: str,
+    db: AsyncSession,
+    user: models.User,
+    limit: int = 50,
+    offset: int = 0
+) -> List[dict]:
+    """
+    Variant of :func:`search_contacts` returning response data.
+    """
+    return await _fetch_contact_data(_search_contacts_stmt(query, db, user, limit, offset), db)
+
+
+# === CACHED READS ===
+# Pass a primary session: a value loaded from a lagging replica would keep
+# serving pre-write rows from the cache until it expires.
+
+
+async def get_contact_cached(contact_id: int, db: AsyncSession, user: models.User) -> Optional[dict]:
+    """
+    Cached variant of :func:`get_contact` returning response data.
+
+    :param contact_id: The unique identifier of the contact.
+    :param db: The asynchronous database session.
+    :param user: The owner user of the contact.
+    :return: The contact data if found, otherwise None.
+    """
+    async def load():
+        contact = await get_contact(contact_id, db, user)
+        return _contact_data(contact) if contact else None
+
+    return await contact_cache.get_or_load(user.id, f"contact:{contact_id}", load)
+
+
+async def get_contacts_cached(
+    db: AsyncSession,
+    user: models.User,
+    limit: Optional[int] = None,
+    after: Optional[int] = None
+) -> List[dict]:
+    """
+    Cached variant of :func:`get_contacts` returning response data.
+
+    :param db: The asynchronous database session.
+    :param user: The owner user.
+    :param limit: Maximum number of contacts to return (all if None).
+    :param after: Return only contacts with an ID greater than this one.
+    :return: A list of contact data.
+    """
+    async def load():
+        return await _fetch_contact_data(_get_contacts_stmt(user, limit, after), db)
+
+    return await contact_cache.get_or_load(user.id, f"list:{limit}:{after}", load)
+
+
+async def upcoming_birthdays_cached(db: AsyncSession, user: models.User, days: int = 7) -> List[dict]:
+    """
+    Cached variant of :func:`upcoming_birthdays` returning response data.
+
+    :param db: The asynchronous database session.
+    :param user: The owner user.
+    :param days: Size of the window in days.
+    :return: A list of contact data.
+    """
+    async def load():
+        return await _fetch_contact_data(_upcoming_birthdays_stmt(user, days), db)
+
+    # The window moves with the date, so today's date is part of the key.
+    key = f"birthdays:{datetime.today().date().isoformat()}:{days}"
+    return await contact_cache.get_or_load(user.id, key, load)
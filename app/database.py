@@ -1,22 +1,128 @@
-from sqlalchemy import create_engine
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
 import os
-from dotenv import load_dotenv
+from typing import Optional
+
+from alembic import command
+from alembic.config import Config
+from fastapi import Depends
+from sqlalchemy.engine import Connection
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import QueuePool
+
+from app.config import settings
+from app.services.metrics import instrument_engine
+
+
+def create_engine_from_settings(url: str) -> AsyncEngine:
+    """
+    Create an async engine configured from ``settings``.
+
+    Pool sizing applies to server databases only; SQLite keeps SQLAlchemy's
+    defaults. For asyncpg both asyncpg's statement cache and SQLAlchemy's
+    prepared statement cache are sized by ``DB_STATEMENT_CACHE_SIZE``
+    (set it to 0 behind pgbouncer in transaction mode).
 
-load_dotenv()  
+    :param url: The database URL.
+    :return: The configured engine.
+    """
+    db_url = make_url(url)
+    options = {"echo": settings.DB_ECHO}
 
-DATABASE_URL = os.getenv("DATABASE_URL")  
+    if db_url.get_backend_name() != "sqlite":
+        options.update(
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+            pool_recycle=settings.DB_POOL_RECYCLE,
+            pool_pre_ping=settings.DB_POOL_PRE_PING,
+        )
+    if db_url.get_driver_name() == "asyncpg":
+        cache_size = settings.DB_STATEMENT_CACHE_SIZE
+        db_url = db_url.update_query_dict({"prepared_statement_cache_size": str(cache_size)})
+        options["connect_args"] = {"statement_cache_size": cache_size}
 
-engine = create_async_engine(DATABASE_URL, echo=True)
+    return create_async_engine(db_url, **options)
+
+
+engine = create_engine_from_settings(settings.DATABASE_URL)
+instrument_engine(engine, "primary")
 async_session = sessionmaker(
     bind=engine,
     class_=AsyncSession,
     expire_on_commit=False
 )
 
+# Optional read replica for read-only endpoints
+replica_engine = (
+    create_engine_from_settings(settings.DATABASE_REPLICA_URL)
+    if settings.DATABASE_REPLICA_URL else None
+)
+if replica_engine is not None:
+    instrument_engine(replica_engine, "replica")
+replica_session = (
+    sessionmaker(bind=replica_engine, class_=AsyncSession, expire_on_commit=False)
+    if replica_engine is not None else None
+)
+
 Base = declarative_base()
 
+ALEMBIC_INI = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "alembic.ini")
+
+
+def _upgrade(connection: Connection, revision: str) -> None:
+    config = Config(ALEMBIC_INI)
+    config.attributes["connection"] = connection
+    command.upgrade(config, revision)
+
+
+async def run_migrations(db_engine: Optional[AsyncEngine] = None, revision: str = "head") -> None:
+    """
+    Upgrade the database schema with the Alembic migrations in ``migrations/``.
+
+    Runs on the application's engine in one transaction. Databases created by
+    ``Base.metadata.create_all`` before migrations existed are upgraded by the
+    same revisions, which skip the tables, columns and indexes they already have.
+
+    :param db_engine: The engine to migrate (the primary engine by default).
+    :param revision: The target revision.
+    """
+    async with (db_engine or engine).begin() as conn:
+        await conn.run_sync(_upgrade, revision)
+
+
 async def get_db():
     async with async_session() as session:
         yield session
+
+
+async def get_read_db(db: AsyncSession = Depends(get_db)):
+    """
+    Session for read-only queries: the replica when one is configured,
+    otherwise the regular primary session.
+    """
+    if replica_session is None:
+        yield db
+        return
+    async with replica_session() as session:
+        yield session
+
+
+def pool_status() -> dict:
+    """
+    Return connection usage of the primary and replica pools.
+    """
+    status = {}
+    for name, db_engine in (("primary", engine), ("replica", replica_engine)):
+        if db_engine is None:
+            continue
+        pool = db_engine.pool
+        status[name] = {"pool": type(pool).__name__}
+        if isinstance(pool, QueuePool):
+            status[name].update(
+                size=pool.size(),
+                checked_in=pool.checkedin(),
+                checked_out=pool.checkedout(),
+                overflow=pool.overflow(),
+            )
+    return status
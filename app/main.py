@@ -1,25 +1,46 @@
-from fastapi import FastAPI, Request, Depends
-from fastapi.responses import JSONResponse
+import os
+
+from fastapi import FastAPI, Depends
+from fastapi.responses import PlainTextResponse
+from fastapi.staticfiles import StaticFiles
 from fastapi.openapi.utils import get_openapi
-from starlette.status import HTTP_429_TOO_MANY_REQUESTS
-from slowapi.middleware import SlowAPIMiddleware
-from slowapi.errors import RateLimitExceeded
 
 from fastapi.security import OAuth2PasswordBearer
 from contextlib import asynccontextmanager
+import asyncio
 
-from app.database import engine, Base
+from app.config import settings
+from app.database import run_migrations
 from app.routers import contacts, auth, users
 from app.services.limiter import limiter
+from app.services.avatar import AvatarUploadLimitMiddleware
+from app.services.hashing import password_hasher
+from app.services.contact_cache import contact_cache
+from app.services.email_queue import email_outbox
+from app.services.jobs import job_runner
+from app.services.redis_cache import open_redis, close_redis
+from app.services.metrics import MetricsMiddleware, registry
+from app.services.profiler import ProfilerMiddleware, ProfileStore, StackSampler
 from app.routers import admin
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+    await run_migrations()
+    await open_redis()
+    cache_listener = asyncio.create_task(contact_cache.listen())
+    if settings.JOBS_RUN_IN_API:
+        job_runner.start()
+        email_outbox.start()
     yield
+    await job_runner.stop(settings.JOBS_DRAIN_TIMEOUT)
+    await email_outbox.stop()
+    cache_listener.cancel()
+    await asyncio.gather(cache_listener, return_exceptions=True)
+    await close_redis()
+    profile_sampler.stop()
+    password_hasher.shutdown()
 
-app = FastAPI(title="Contacts API", debug=True, lifespan=lifespan)
+app = FastAPI(title="Contacts API", debug=True, lifespan=lifespan, dependencies=[Depends(limiter)])
 
 # Routers
 app.include_router(admin.router)
@@ -27,9 +48,35 @@ app.include_router(auth.router)
 app.include_router(users.router)
 app.include_router(contacts.router)
 
-# Init rate limiter
-app.state.limiter = limiter
-app.add_middleware(SlowAPIMiddleware)
+# Avatars stored on the local filesystem
+if settings.AVATAR_STORAGE == "local":
+    os.makedirs(settings.AVATAR_LOCAL_DIR, exist_ok=True)
+    app.mount(settings.AVATAR_BASE_URL, StaticFiles(directory=settings.AVATAR_LOCAL_DIR), name="avatars")
+
+# Refuse oversized avatar uploads before the form parser spools them to disk
+app.add_middleware(AvatarUploadLimitMiddleware, path="/users/avatar", max_bytes=settings.AVATAR_MAX_BYTES)
+
+# Opt-in profiling of a sample of requests; slow ones are dumped to PROFILER_DIR
+profile_sampler = StackSampler(interval=settings.PROFILER_INTERVAL_MS / 1000)
+if settings.PROFILER_ENABLED:
+    app.add_middleware(
+        ProfilerMiddleware,
+        sampler=profile_sampler,
+        store=ProfileStore(settings.PROFILER_DIR, settings.PROFILER_MAX_DUMPS, settings.PROFILER_MAX_BYTES),
+        sample_rate=settings.PROFILER_SAMPLE_RATE,
+        threshold=settings.PROFILER_THRESHOLD_MS / 1000,
+        path_prefixes=tuple(prefix.strip() for prefix in settings.PROFILER_PATHS.split(",") if prefix.strip()),
+    )
+
+# Per-route latency, DB time and cache metrics (outermost, so the profiler sees its request stats)
+app.add_middleware(MetricsMiddleware, server_timing=settings.SERVER_TIMING)
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """
+    Prometheus metrics of this worker process.
+    """
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
 
 # OAuth2 config for Swagger
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
@@ -65,12 +112,4 @@ def custom_openapi():
     app.openapi_schema = openapi_schema
     return app.openapi_schema
 
-# Rate limit error handler
-@app.exception_handler(RateLimitExceeded)
-async def ratelimit_handler(request: Request, exc: RateLimitExceeded):
-    return JSONResponse(
-        status_code=HTTP_429_TOO_MANY_REQUESTS,
-        content={"detail": "Rate limit exceeded. Try again later."}
-    )
-
 app.openapi = custom_openapi
@@ -1,8 +1,22 @@
-from sqlalchemy import Column, Integer, String, Date, Boolean, ForeignKey
-from sqlalchemy.orm import relationship
+from datetime import date
+from typing import Optional
+
+from sqlalchemy import Column, Integer, String, Date, DateTime, Boolean, ForeignKey, Index, DDL, event, func
+from sqlalchemy.orm import relationship, validates
 from .database import Base
 
 
+def birthday_mmdd(birthday: Optional[date]) -> Optional[int]:
+    """
+    Return a birthday as a sortable month-and-day number, e.g. 1 May -> 501.
+
+    :param birthday: The birthday date, or None.
+    :return: ``month * 100 + day``, or None when there is no birthday.
+    """
+    if birthday is None:
+        return None
+    return birthday.month * 100 + birthday.day
+
 
 class User(Base):
     __tablename__ = "users"
@@ -13,6 +27,8 @@ class User(Base):
     is_verified = Column(Boolean, default=False)
     avatar_url = Column(String, nullable=True)
     is_admin = Column(Boolean, default=False)
+    # Per-owner change counter, bumped by every write to the user's contacts.
+    contacts_version = Column(Integer, nullable=False, default=0, server_default="0")
 
     contacts = relationship("Contact", back_populates="owner")
 
@@ -20,13 +36,101 @@ class User(Base):
 class Contact(Base):
     __tablename__ = "contacts"
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     first_name = Column(String, nullable=False)
     last_name = Column(String, nullable=False)
-    email = Column(String, index=True, nullable=False)
+    email = Column(String, nullable=False)
     phone = Column(String, nullable=False)
     birthday = Column(Date, nullable=True)
     extra_info = Column(String, nullable=True)
     owner_id = Column(Integer, ForeignKey("users.id"))
+    # Denormalized birthday_mmdd(birthday), so upcoming birthdays are an index range scan.
+    birthday_mmdd = Column(Integer, nullable=True)
+    # Owner's contacts_version at the last change of this contact, for delta sync.
+    version = Column(Integer, nullable=False, default=0, server_default="0")
+    updated_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now(), onupdate=func.now())
 
     owner = relationship("User", back_populates="contacts")
+
+    # Every contact query filters on owner_id first, so each index leads with it.
+    # Schema changes go through a migration in migrations/versions as well.
+    __table_args__ = (
+        Index("ix_contacts_owner_id_id", "owner_id", "id"),
+        Index("ix_contacts_owner_name", "owner_id", "last_name", "first_name"),
+        Index("uq_contacts_owner_email", "owner_id", "email", unique=True),
+        Index("ix_contacts_owner_birthday_mmdd", "owner_id", "birthday_mmdd"),
+        Index("ix_contacts_owner_version", "owner_id", "version"),
+    )
+
+    @validates("birthday")
+    def _sync_birthday_mmdd(self, key, value):
+        self.birthday_mmdd = birthday_mmdd(value)
+        return value
+
+
+class ContactTombstone(Base):
+    """
+    Record of a deleted contact, so delta sync can report the deletion.
+    """
+    __tablename__ = "contact_tombstones"
+
+    id = Column(Integer, primary_key=True)
+    owner_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    contact_id = Column(Integer, nullable=False)
+    version = Column(Integer, nullable=False)
+    deleted_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+
+    __table_args__ = (
+        Index("ix_contact_tombstones_owner_version", "owner_id", "version"),
+    )
+
+
+# Contact search index. On SQLite an FTS5 trigram table shadows the searchable
+# columns and is kept in sync by triggers; on PostgreSQL trigram GIN indexes
+# let the planner serve ILIKE '%query%' without a sequential scan.
+CONTACT_SEARCH_DDL = {
+    "sqlite": [
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS contacts_fts USING fts5(
+            first_name, last_name, email,
+            content='contacts', content_rowid='id', tokenize='trigram'
+        )
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS contacts_fts_ai AFTER INSERT ON contacts BEGIN
+            INSERT INTO contacts_fts(rowid, first_name, last_name, email)
+            VALUES (new.id, new.first_name, new.last_name, new.email);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS contacts_fts_ad AFTER DELETE ON contacts BEGIN
+            INSERT INTO contacts_fts(contacts_fts, rowid, first_name, last_name, email)
+            VALUES ('delete', old.id, old.first_name, old.last_name, old.email);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS contacts_fts_au AFTER UPDATE OF first_name, last_name, email ON contacts BEGIN
+            INSERT INTO contacts_fts(contacts_fts, rowid, first_name, last_name, email)
+            VALUES ('delete', old.id, old.first_name, old.last_name, old.email);
+            INSERT INTO contacts_fts(rowid, first_name, last_name, email)
+            VALUES (new.id, new.first_name, new.last_name, new.email);
+        END
+        """,
+    ],
+    "postgresql": [
+        "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+        "CREATE INDEX IF NOT EXISTS ix_contacts_first_name_trgm ON contacts USING gin (first_name gin_trgm_ops)",
+        "CREATE INDEX IF NOT EXISTS ix_contacts_last_name_trgm ON contacts USING gin (last_name gin_trgm_ops)",
+        "CREATE INDEX IF NOT EXISTS ix_contacts_email_trgm ON contacts USING gin (email gin_trgm_ops)",
+    ],
+}
+
+for _dialect, _statements in CONTACT_SEARCH_DDL.items():
+    for _statement in _statements:
+        event.listen(Contact.__table__, "after_create", DDL(_statement).execute_if(dialect=_dialect))
+
+event.listen(
+    Contact.__table__,
+    "before_drop",
+    DDL("DROP TABLE IF EXISTS contacts_fts").execute_if(dialect="sqlite")
+)
@@ -1,25 +1,82 @@
-from fastapi import APIRouter, Depends
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, Query, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.future import select
 
-from app.database import get_db
+from app import crud, schemas
+from app.database import get_read_db, pool_status
 from app.auth.dependencies import get_current_admin_user
-from app.models import User
+from app.auth.token_cache import token_cache
+from app.responses import fast_json_response
+from app.services import contact_io
+from app.services.contact_cache import contact_cache
+from app.services.email_queue import email_outbox
+from app.services.hashing import password_hasher
+from app.services.jobs import job_runner
+from app.services.limiter import limiter
+from app.services.redis_cache import UserSnapshot, redis_stats
 
 router = APIRouter(prefix="/admin", tags=["Admin"])
 
+USER_EXPORT_FIELDS = list(schemas.AdminUserResponse.model_fields)
+
+
+def user_filters(
+    is_admin: Optional[bool] = Query(None, description="Only admins (true) or non-admins (false)"),
+    is_verified: Optional[bool] = Query(None, description="Only verified (true) or unverified (false) users"),
+    email_prefix: Optional[str] = Query(None, min_length=1, description="Only emails starting with this"),
+) -> dict:
+    return {"is_admin": is_admin, "is_verified": is_verified, "email_prefix": email_prefix}
 
-@router.get("/users", response_model=list[dict])
+
+@router.get("/users", response_model=List[schemas.AdminUserResponse])
 async def get_all_users(
-    admin_user: User = Depends(get_current_admin_user),
-    db: AsyncSession = Depends(get_db)
+    response: Response,
+    limit: int = Query(100, ge=1, le=1000),
+    after: Optional[int] = Query(None, description="ID of the last user on the previous page"),
+    filters: dict = Depends(user_filters),
+    admin_user: UserSnapshot = Depends(get_current_admin_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    List users page by page with their contact counts.
+
+    When the page is full, the ``X-Next-Cursor`` header holds the value to
+    pass as ``after`` for the next page.
+    """
+    users = await crud.list_users(db, limit=limit, after=after, **filters)
+    if len(users) == limit:
+        response.headers["X-Next-Cursor"] = str(users[-1]["id"])
+    return fast_json_response(users, response)
+
+
+@router.get("/users/export")
+async def export_users(
+    filters: dict = Depends(user_filters),
+    admin_user: UserSnapshot = Depends(get_current_admin_user),
+    db: AsyncSession = Depends(get_read_db)
 ):
-    result = await db.execute(select(User))
-    users = result.scalars().all()
-    return [
-        {
-            "id": user.id,
-            "email": user.email,
-            "is_admin": user.is_admin
-        } for user in users
-    ]
+    """
+    Stream all matching users with their contact counts as a CSV download.
+    """
+    body = contact_io.iter_csv(crud.stream_users(db, **filters), fields=USER_EXPORT_FIELDS)
+    headers = {"Content-Disposition": 'attachment; filename="users.csv"'}
+    return StreamingResponse(body, media_type="text/csv", headers=headers)
+
+
+@router.get("/stats")
+async def get_stats(admin_user: UserSnapshot = Depends(get_current_admin_user)):
+    """
+    Return performance counters of this worker process.
+    """
+    return {
+        "token_cache": token_cache.stats(),
+        "password_hasher": password_hasher.stats(),
+        "contact_cache": contact_cache.stats(),
+        "rate_limiter": limiter.stats(),
+        "db_pool": pool_status(),
+        "redis": redis_stats(),
+        "email": await email_outbox.stats(),
+        "jobs": job_runner.stats(),
+    }
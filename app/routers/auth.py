@@ -13,7 +13,8 @@ from ..models import User
 from ..services.email import send_email
 from ..crud import get_user_by_email
 from app.config import settings
-from app.auth.security import decode_access_token, get_password_hash
+from app.auth.security import decode_access_token
+from app.services.limiter import limiter
 
 
 router = APIRouter(prefix="/auth", tags=["auth"])
@@ -21,7 +22,7 @@ router = APIRouter(prefix="/auth", tags=["auth"])
 @router.post("/signup", response_model=schemas.UserResponse, status_code=status.HTTP_201_CREATED)
 async def signup(user_data: schemas.UserCreate, request: Request, db: AsyncSession = Depends(get_db)):
     """
-    Register a new user and send an email verification link.
+    Register a new user and queue an email verification link.
 
     :param user_data: Schema containing the user's email and password.
     :param request: Request object to generate verification link.
@@ -29,30 +30,35 @@ async def signup(user_data: schemas.UserCreate, request: Request, db: AsyncSessi
     :return: The created user object.
     """
     user = await crud.create_user(user_data, db)
-    email_service.send_verification_email(request, user.email)
+    await email_service.send_verification_email(request, user.email)
     return user
 
 @router.get("/verify-email")
-async def verify_email(email: str, db: AsyncSession = Depends(get_db)):
+async def verify_email(token: str, db: AsyncSession = Depends(get_db)):
     """
-    Verify a user's email address.
+    Verify a user's email address with the signed token from the verification email.
 
-    Updates the user's verification status to True if a user with the provided email exists.
+    A single conditional ``UPDATE`` marks the user verified; the user is only
+    looked up when nothing was updated, to tell an unknown user from one
+    verified before.
 
-    :param email: The email address to verify.
+    :param token: The verification token from the emailed link.
     :param db: The asynchronous database session.
-    :return: A message confirming successful verification.
-    :raises HTTPException: If the user is not found.
+    :return: A message confirming the verification.
+    :raises HTTPException: 400 if the token is invalid or expired, 404 if the user is not found.
     """
-    user = await crud.get_user_by_email(email, db)
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
+    payload = decode_access_token(token)
+    if not payload or payload.get("type") != "verify" or not payload.get("sub"):
+        raise HTTPException(status_code=400, detail="Invalid or expired token")
 
-    user.is_verified = True
-    await db.commit()
-    return {"message": "Email verified successfully"}
+    if await crud.verify_user_email(payload["sub"], db):
+        return {"message": "Email verified successfully"}
+    if await crud.get_user_by_email(payload["sub"], db) is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    return {"message": "Email already verified"}
 
 @router.post("/login")
+@limiter.limit("login")
 async def login(user: schemas.UserLogin, db: AsyncSession = Depends(get_db)):
     """
     Authenticate a user and issue a JWT token.
@@ -63,13 +69,14 @@ async def login(user: schemas.UserLogin, db: AsyncSession = Depends(get_db)):
     :raises HTTPException: If authentication fails.
     """
     db_user = await crud.get_user_by_email(user.email, db)
-    if not db_user or not verify_password(user.password, db_user.password):
+    if not db_user or not await verify_password(user.password, db_user.password):
         raise HTTPException(status_code=401, detail="Invalid email or password")
 
     token = create_access_token(data={"sub": db_user.email})
     return {"access_token": token, "token_type": "bearer"}
 
 @router.post("/request-password-reset")
+@limiter.limit("login")
 async def request_password_reset(
     data: PasswordResetRequest,
     db: AsyncSession = Depends(get_db)
@@ -87,6 +94,7 @@ async def request_password_reset(
     return {"message": "Password reset link has been sent"}
 
 @router.post("/reset-password")
+@limiter.limit("login")
 async def reset_password(
     data: PasswordResetConfirm,
     db: AsyncSession = Depends(get_db)
@@ -98,11 +106,7 @@ async def reset_password(
     if not payload or payload.get("type") != "reset":
         raise HTTPException(status_code=400, detail="Invalid or expired token")
 
-    user = await get_user_by_email(payload["sub"], db)
-    if not user:
+    if not await crud.update_password(payload["sub"], data.new_password, db):
         raise HTTPException(status_code=404, detail="User not found")
 
-    user.password = get_password_hash(data.new_password)
-    await db.commit()
-
     return {"message": "Password has been reset successfully"}
\ No newline at end of file
@@ -1,34 +1,212 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import RedirectResponse, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
+from typing import List, Optional
 
 from .. import crud, schemas
-from ..database import get_db
+from ..database import get_db, get_read_db
 from ..auth.dependencies import get_current_user
-from ..models import User
+from ..services.redis_cache import UserSnapshot
+from ..services import contact_io
+from ..services.limiter import limiter
+from ..responses import fast_json_response
 
 router = APIRouter(prefix="/contacts", tags=["contacts"])
 
 @router.post("/", response_model=schemas.ContactResponse, status_code=status.HTTP_201_CREATED)
-async def create_contact(contact: schemas.ContactCreate, db: AsyncSession = Depends(get_db), current_user: User = Depends(get_current_user)):
+async def create_contact(contact: schemas.ContactCreate, db: AsyncSession = Depends(get_db), current_user: UserSnapshot = Depends(get_current_user)):
     return await crud.create_contact(contact, db, current_user)
 
 
+@router.post("/bulk", response_model=schemas.BulkImportResult)
+async def bulk_import_contacts(
+    request: Request,
+    format: Optional[str] = Query(None, pattern="^(csv|ndjson)$", description="Defaults from Content-Type"),
+    db: AsyncSession = Depends(get_db),
+    current_user: UserSnapshot = Depends(get_current_user)
+):
+    """
+    Import contacts from a streamed CSV (with header row) or NDJSON body.
+
+    Rows are validated one at a time and inserted in batches; invalid rows
+    are skipped and listed in the response.
+    """
+    if format is None:
+        format = "csv" if "csv" in request.headers.get("content-type", "") else "ndjson"
+    records = contact_io.read_records(request.stream(), format)
+    return await crud.import_contacts(records, db, current_user)
+
+
+@router.post("/batch-get", response_model=schemas.BatchResult)
+async def batch_get_contacts(
+    batch: schemas.ContactIds,
+    db: AsyncSession = Depends(get_db),
+    current_user: UserSnapshot = Depends(get_current_user)
+):
+    """
+    Fetch several contacts by ID in one request.
+    """
+    found = {contact.id: contact for contact in await crud.get_contacts_by_ids(batch.ids, db, current_user)}
+    return {"results": [
+        {"id": contact_id, "status": "ok", "contact": found[contact_id]}
+        if contact_id in found else {"id": contact_id, "status": "not_found"}
+        for contact_id in batch.ids
+    ]}
+
+
+@router.patch("/batch", response_model=schemas.BatchResult)
+async def batch_update_contacts(
+    batch: schemas.ContactBatchUpdate,
+    db: AsyncSession = Depends(get_db),
+    current_user: UserSnapshot = Depends(get_current_user)
+):
+    """
+    Partially update several contacts in one transaction.
+    """
+    updated = await crud.batch_update_contacts(batch.items, db, current_user)
+    return {"results": [
+        {"id": item.id, "status": "updated", "contact": updated[item.id]}
+        if item.id in updated else {"id": item.id, "status": "not_found"}
+        for item in batch.items
+    ]}
+
+
+@router.delete("/batch", response_model=schemas.BatchResult)
+async def batch_delete_contacts(
+    batch: schemas.ContactIds,
+    db: AsyncSession = Depends(get_db),
+    current_user: UserSnapshot = Depends(get_current_user)
+):
+    """
+    Delete several contacts in one transaction.
+    """
+    deleted = await crud.batch_delete_contacts(batch.ids, db, current_user)
+    return {"results": [
+        {"id": contact_id, "status": "deleted" if contact_id in deleted else "not_found"}
+        for contact_id in batch.ids
+    ]}
+
+
+@router.get("/export")
+async def export_contacts(
+    format: str = Query("csv", pattern="^(csv|ndjson)$"),
+    gzip: bool = Query(False, description="Compress the response with gzip"),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: UserSnapshot = Depends(get_current_user)
+):
+    """
+    Stream all contacts as a CSV or NDJSON download.
+
+    Rows are written out as they are fetched, so the response starts before
+    the query finishes and memory use does not grow with the number of contacts.
+    """
+    contacts = crud.stream_contacts(db, current_user)
+    if format == "csv":
+        body, media_type = contact_io.iter_csv(contacts), "text/csv"
+    else:
+        body, media_type = contact_io.iter_ndjson(contacts), "application/x-ndjson"
+
+    headers = {"Content-Disposition": f'attachment; filename="contacts.{format}"'}
+    if gzip:
+        body = contact_io.gzip_stream(body)
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(body, media_type=media_type, headers=headers)
+
+
+@router.get("/changes", response_model=schemas.ContactChanges)
+async def get_contact_changes(
+    since: Optional[str] = Query(None, description="next_token from the previous sync; omit for a full sync"),
+    limit: int = Query(1000, ge=1, le=1000),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: UserSnapshot = Depends(get_current_user)
+):
+    """
+    Return a page of the contacts created, updated or deleted since the last sync.
+
+    Clients apply ``deleted`` first, then upsert ``changed``, and keep
+    ``next_token`` for the next call; while ``has_more`` is true they call
+    again right away. A 400 means the token is unusable and the client
+    should drop its copy and sync again without ``since``.
+    """
+    version, after = None, None
+    if since is not None:
+        version_part, _, after_part = since.partition(":")
+        if not version_part.isdigit() or (after_part and not after_part.isdigit()):
+            raise HTTPException(status_code=400, detail="Invalid sync token")
+        version, after = int(version_part), int(after_part) if after_part else None
+    changes = await crud.get_changes(version, db, current_user, limit=limit, after=after)
+    if changes is None:
+        raise HTTPException(status_code=400, detail="Invalid sync token")
+    has_more = changes["after"] is not None
+    return {
+        "changed": changes["changed"],
+        "deleted": changes["deleted"],
+        "next_token": f"{changes['version']}:{changes['after']}" if has_more else str(changes["version"]),
+        "has_more": has_more
+    }
+
+
+@router.get("/stream")
+async def stream_all_contacts(
+    db: AsyncSession = Depends(get_read_db),
+    current_user: UserSnapshot = Depends(get_current_user)
+):
+    """
+    Stream all contacts as NDJSON. The stream is not cached, so it reads from the replica.
+    """
+    return StreamingResponse(
+        contact_io.iter_ndjson(crud.stream_contacts(db, current_user)),
+        media_type="application/x-ndjson"
+    )
+
+
 @router.get("/", response_model=List[schemas.ContactResponse])
-async def get_contacts(db: AsyncSession = Depends(get_db), current_user: User = Depends(get_current_user)):
-    return await crud.get_contacts(db, current_user)
+async def get_contacts(
+    request: Request,
+    response: Response,
+    limit: int = Query(100, ge=1, le=1000),
+    after: Optional[int] = Query(None, description="ID of the last contact on the previous page"),
+    stream: bool = Query(False, deprecated=True, description="Redirects to /contacts/stream"),
+    db: AsyncSession = Depends(get_db),
+    current_user: UserSnapshot = Depends(get_current_user)
+):
+    """
+    List contacts page by page.
+
+    When the page is full, the ``X-Next-Cursor`` header holds the value to
+    pass as ``after`` for the next page. Pages are cached, so they are loaded
+    from the primary: a lagging replica could put pre-write rows in the cache.
+    """
+    if stream:
+        return RedirectResponse(request.url_for("stream_all_contacts"), status_code=status.HTTP_307_TEMPORARY_REDIRECT)
+
+    contacts = await crud.get_contacts_cached(db, current_user, limit=limit, after=after)
+    if len(contacts) == limit:
+        response.headers["X-Next-Cursor"] = str(contacts[-1]["id"])
+    return fast_json_response(contacts, response)
 
 
 @router.get("/{contact_id}", response_model=schemas.ContactResponse)
-async def get_contact(contact_id: int, db: AsyncSession = Depends(get_db), current_user: User = Depends(get_current_user)):
-    contact = await crud.get_contact(contact_id, db, current_user)
+async def get_contact(contact_id: int, db: AsyncSession = Depends(get_db), current_user: UserSnapshot = Depends(get_current_user)):
+    contact = await crud.get_contact_cached(contact_id, db, current_user)
     if not contact:
         raise HTTPException(status_code=404, detail="Contact not found")
     return contact
 
 
 @router.put("/{contact_id}", response_model=schemas.ContactResponse)
-async def update_contact(contact_id: int, updated: schemas.ContactUpdate, db: AsyncSession = Depends(get_db), current_user: User = Depends(get_current_user)):
+async def update_contact(contact_id: int, updated: schemas.ContactUpdate, db: AsyncSession = Depends(get_db), current_user: UserSnapshot = Depends(get_current_user)):
+    contact = await crud.update_contact(contact_id, updated, db, current_user)
+    if not contact:
+        raise HTTPException(status_code=404, detail="Contact not found")
+    return contact
+
+
+@router.patch("/{contact_id}", response_model=schemas.ContactResponse)
+async def patch_contact(contact_id: int, updated: schemas.ContactUpdate, db: AsyncSession = Depends(get_db), current_user: UserSnapshot = Depends(get_current_user)):
+    """
+    Partially update a contact: only the fields present in the body change.
+    """
     contact = await crud.update_contact(contact_id, updated, db, current_user)
     if not contact:
         raise HTTPException(status_code=404, detail="Contact not found")
@@ -36,17 +214,33 @@ async def update_contact(contact_id: int, updated: schemas.ContactUpdate, db: As
 
 
 @router.delete("/{contact_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_contact(contact_id: int, db: AsyncSession = Depends(get_db), current_user: User = Depends(get_current_user)):
+async def delete_contact(contact_id: int, db: AsyncSession = Depends(get_db), current_user: UserSnapshot = Depends(get_current_user)):
     deleted = await crud.delete_contact(contact_id, db, current_user)
     if not deleted:
         raise HTTPException(status_code=404, detail="Contact not found")
 
 
 @router.get("/search/", response_model=List[schemas.ContactResponse])
-async def search_contacts(query: str, db: AsyncSession = Depends(get_db), current_user: User = Depends(get_current_user)):
-    return await crud.search_contacts(query, db, current_user)
+@limiter.limit("search")
+async def search_contacts(
+    query: str,
+    response: Response,
+    limit: int = Query(50, ge=1, le=500),
+    offset: int = Query(0, ge=0),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: UserSnapshot = Depends(get_current_user)
+):
+    contacts = await crud.search_contacts_data(query, db, current_user, limit=limit, offset=offset)
+    return fast_json_response(contacts, response)
 
 
 @router.get("/upcoming-birthdays/", response_model=List[schemas.ContactResponse])
-async def get_upcoming_birthdays(db: AsyncSession = Depends(get_db), current_user: User = Depends(get_current_user)):
-    return await crud.upcoming_birthdays(db, current_user)
+async def get_upcoming_birthdays(
+    response: Response,
+    days: int = Query(7, ge=1, le=366),
+    db: AsyncSession = Depends(get_db),
+    current_user: UserSnapshot = Depends(get_current_user)
+):
+    # Cached, so loaded from the primary rather than a possibly lagging replica.
+    contacts = await crud.upcoming_birthdays_cached(db, current_user, days=days)
+    return fast_json_response(contacts, response)
@@ -1,21 +1,18 @@
-from fastapi import APIRouter, Depends, Request, UploadFile, File
-from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import APIRouter, Depends, UploadFile, File, status
 
 from app.services.limiter import limiter
-from app.services.cloudinary_service import upload_avatar
+from app.services.avatar import prepare_avatar
+from app.services.jobs import job_runner
 from app.auth.dependencies import get_current_user
-from app.database import get_db
-from app.models import User
-from app import schemas
+from app.services.redis_cache import UserSnapshot
 
 router = APIRouter(prefix="/users", tags=["users"])
 
 
 @router.get("/me")
-@limiter.limit("5/minute")
+@limiter.limit("profile")
 async def get_me(
-    request: Request,
-    current_user: User = Depends(get_current_user)
+    current_user: UserSnapshot = Depends(get_current_user)
 ):
     return {
         "id": current_user.id,
@@ -25,15 +22,18 @@ async def get_me(
     }
 
 
-@router.post("/avatar", response_model=schemas.UserResponse)
+@router.post("/avatar", status_code=status.HTTP_202_ACCEPTED)
 async def update_avatar(
     file: UploadFile = File(...),
-    db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: UserSnapshot = Depends(get_current_user)
 ):
-    public_id = f"user_{current_user.id}_avatar"
-    avatar_url = upload_avatar(file.file, public_id)
-    current_user.avatar_url = avatar_url
-    await db.commit()
-    await db.refresh(current_user)
-    return current_user
+    """
+    Accept a new avatar and upload it in the background.
+
+    The image is validated and resized before the response; the upload and
+    the ``avatar_url`` update happen after it, so ``/users/me`` shows the new
+    URL once they finish.
+    """
+    avatar = await prepare_avatar(file)
+    await job_runner.submit("store_avatar", current_user.id, current_user.email, avatar)
+    return {"message": "Avatar accepted and is being uploaded"}
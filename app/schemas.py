@@ -1,6 +1,6 @@
-from pydantic import BaseModel, EmailStr, Field
+from pydantic import BaseModel, EmailStr, Field, field_validator
 from datetime import date
-from typing import Optional
+from typing import List, Optional
 
 
 class ContactBase(BaseModel):
@@ -19,6 +19,14 @@ class ContactUpdate(BaseModel):
     birthday: Optional[date] = None
     extra_info: Optional[str] = None
 
+    @field_validator("first_name", "last_name", "email", "phone")
+    @classmethod
+    def _required_not_null(cls, value):
+        # May be left out, but not cleared: the columns are NOT NULL.
+        if value is None:
+            raise ValueError("may be omitted but not null")
+        return value
+
 class ContactCreate(ContactBase):
     pass
 
@@ -29,6 +37,50 @@ class ContactResponse(ContactBase):
         from_attributes = True
 
 
+MAX_BATCH_SIZE = 500
+
+
+class ContactIds(BaseModel):
+    ids: List[int] = Field(min_length=1, max_length=MAX_BATCH_SIZE)
+
+
+class ContactBatchUpdateItem(ContactUpdate):
+    id: int
+
+
+class ContactBatchUpdate(BaseModel):
+    items: List[ContactBatchUpdateItem] = Field(min_length=1, max_length=MAX_BATCH_SIZE)
+
+
+class BatchItemResult(BaseModel):
+    id: int
+    status: str
+    contact: Optional[ContactResponse] = None
+
+
+class BatchResult(BaseModel):
+    results: List[BatchItemResult]
+
+
+class ContactChanges(BaseModel):
+    changed: List[ContactResponse]
+    deleted: List[int]
+    next_token: str
+    has_more: bool = False
+
+
+class BulkImportError(BaseModel):
+    row: int
+    error: str
+
+
+class BulkImportResult(BaseModel):
+    inserted: int
+    failed: int
+    errors: List[BulkImportError]
+    errors_truncated: bool = False
+
+
 # ==== USER SCHEMAS ====
 
 class UserCreate(BaseModel):
@@ -51,6 +103,14 @@ class UserResponse(BaseModel):
         from_attributes = True
 
 
+class AdminUserResponse(BaseModel):
+    id: int
+    email: str
+    is_admin: bool
+    is_verified: bool
+    contact_count: int
+
+
 class PasswordResetRequest(BaseModel):
     email: EmailStr
 
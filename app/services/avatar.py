@@ -0,0 +1,178 @@
+"""
+Avatar upload pipeline.
+
+``AvatarUploadLimitMiddleware`` refuses upload bodies over the size limit
+while they arrive, before the form parser spools them to disk. The request
+handler reads the upload in chunks up to the same limit and re-encodes it to a fixed-size JPEG on a worker thread. Storing the result
+(Cloudinary or the local filesystem) and saving the new ``avatar_url`` run
+as a background job (``store_avatar``) after the response has been sent.
+"""
+import io
+import os
+import time
+from typing import Protocol
+
+from fastapi import HTTPException, UploadFile, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from app import crud
+from app.config import settings
+from app.database import async_session
+from app.services.jobs import job_runner
+
+CHUNK_SIZE = 64 * 1024
+# Room for multipart boundaries and part headers around the file itself.
+MULTIPART_OVERHEAD = 64 * 1024
+
+
+class AvatarStorage(Protocol):
+    def save(self, data: bytes, public_id: str) -> str:
+        """Store an encoded avatar and return its public URL."""
+
+
+class LocalAvatarStorage:
+    """
+    Stores avatars as files under ``root``, served from ``base_url``.
+    """
+
+    def __init__(self, root: str, base_url: str):
+        self.root = root
+        self.base_url = base_url.rstrip("/")
+
+    def save(self, data: bytes, public_id: str) -> str:
+        os.makedirs(self.root, exist_ok=True)
+        path = os.path.join(self.root, f"{public_id}.jpg")
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        # Same file name on every upload, so bust browser caches.
+        return f"{self.base_url}/{public_id}.jpg?v={int(time.time())}"
+
+
+def get_avatar_storage() -> AvatarStorage:
+    """
+    Return the storage backend selected by ``AVATAR_STORAGE``.
+    """
+    if settings.AVATAR_STORAGE == "local":
+        return LocalAvatarStorage(settings.AVATAR_LOCAL_DIR, settings.AVATAR_BASE_URL)
+    from app.services.cloudinary_service import CloudinaryAvatarStorage
+    return CloudinaryAvatarStorage()
+
+
+async def read_upload(file: UploadFile, max_bytes: int) -> bytes:
+    """
+    Read an uploaded file in chunks, refusing anything larger than ``max_bytes``.
+
+    :param file: The uploaded file.
+    :param max_bytes: Maximum accepted size in bytes.
+    :return: The file contents.
+    :raises HTTPException: 413 if the file is too large.
+    """
+    buffer = bytearray()
+    while chunk := await file.read(CHUNK_SIZE):
+        buffer.extend(chunk)
+        if len(buffer) > max_bytes:
+            raise HTTPException(
+                status_code=413,
+                detail=f"Avatar must not exceed {max_bytes} bytes."
+            )
+    return bytes(buffer)
+
+
+class AvatarUploadLimitMiddleware:
+    """
+    Pure ASGI middleware refusing avatar upload bodies larger than the avatar limit.
+
+    The form parser reads the whole multipart body before the handler runs,
+    so the limit has to apply as the body arrives: a declared
+    ``Content-Length`` over the limit is refused before anything is read, and
+    a body sent without one is cut off once it passes the limit.
+    """
+
+    def __init__(self, app, path: str, max_bytes: int):
+        self.app = app
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_body = max_bytes + MULTIPART_OVERHEAD
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] != self.path:
+            await self.app(scope, receive, send)
+            return
+
+        detail = f"Avatar must not exceed {self.max_bytes} bytes."
+        content_length = dict(scope["headers"]).get(b"content-length", b"")
+        if content_length.isdigit() and int(content_length) > self.max_body:
+            response = JSONResponse({"detail": detail}, status_code=413, headers={"Connection": "close"})
+            await response(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_body:
+                    raise HTTPException(status_code=413, detail=detail)
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+
+def resize_avatar(data: bytes, size: int) -> bytes:
+    """
+    Crop an image to a centered square, scale it to ``size`` pixels and encode as JPEG.
+
+    :param data: The original image bytes.
+    :param size: Width and height of the result in pixels.
+    :return: The encoded JPEG bytes.
+    :raises ValueError: If the data is not a supported image.
+    """
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            image = ImageOps.exif_transpose(image)
+            image = ImageOps.fit(image.convert("RGB"), (size, size), Image.Resampling.LANCZOS)
+    except (UnidentifiedImageError, OSError, Image.DecompressionBombError) as exc:
+        raise ValueError("Unsupported image") from exc
+
+    output = io.BytesIO()
+    image.save(output, format="JPEG", quality=85, optimize=True)
+    return output.getvalue()
+
+
+async def prepare_avatar(file: UploadFile) -> bytes:
+    """
+    Read and re-encode an uploaded avatar without blocking the event loop.
+
+    :param file: The uploaded file.
+    :return: The encoded avatar, ready for storage.
+    :raises HTTPException: 413 if the file is too large, 400 if it is not an image.
+    """
+    data = await read_upload(file, settings.AVATAR_MAX_BYTES)
+    try:
+        return await run_in_threadpool(resize_avatar, data, settings.AVATAR_SIZE)
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="File is not a supported image.")
+
+
+@job_runner.job("store_avatar")
+async def store_avatar(user_id: int, email: str, data: bytes, storage: AvatarStorage | None = None) -> str:
+    """
+    Upload an encoded avatar and save its URL on the user. Runs as a background job.
+
+    :param user_id: The ID of the user.
+    :param email: The email of the user.
+    :param data: The encoded avatar.
+    :param storage: Storage backend; defaults to the configured one.
+    :return: The public URL of the avatar.
+    """
+    storage = storage or get_avatar_storage()
+    avatar_url = await run_in_threadpool(storage.save, data, f"user_{user_id}_avatar")
+    async with async_session() as db:
+        await crud.update_avatar_url(email, avatar_url, db)
+    return avatar_url
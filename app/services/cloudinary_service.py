@@ -1,3 +1,4 @@
+import io
 import cloudinary
 import cloudinary.uploader
 import os
@@ -15,3 +16,12 @@ cloudinary.config(
 def upload_avatar(file, public_id: str):
     result = cloudinary.uploader.upload(file, public_id=public_id, folder="avatars", overwrite=True)
     return result.get("secure_url")
+
+
+class CloudinaryAvatarStorage:
+    """
+    Avatar storage backend that uploads to Cloudinary.
+    """
+
+    def save(self, data: bytes, public_id: str) -> str:
+        return upload_avatar(io.BytesIO(data), public_id)
@@ -0,0 +1,221 @@
+"""
+Two-tier read-through cache for contact reads.
+
+L1 is a bounded, per-process LRU with a short TTL; L2 is one Redis hash per
+owner (``contacts:v1:{owner_id}``) shared by all workers. A write for an
+owner deletes that owner's L2 hash, bumps the owner's generation key and
+publishes the owner ID on a Redis channel, so every worker drops its L1
+entries for that owner. A loaded value is only written to L2 if the
+generation is still the one read before the load, so a load that raced
+with a write in another worker does not put stale data back.
+
+Redis errors never fail a request: calls go through the shared circuit
+breaker in ``redis_cache``, L2 is skipped and reads go to the database.
+"""
+import asyncio
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Optional
+
+from redis.exceptions import RedisError
+
+from app.config import settings
+from app.services import metrics
+from app.services.redis_cache import create_pubsub_client, redis_call
+
+logger = logging.getLogger(__name__)
+
+INVALIDATION_CHANNEL = "contacts:invalidate"
+CACHE_VERSION = 1
+
+# Write a field of the owner's hash only if the owner's generation is unchanged.
+SET_IF_GENERATION_SCRIPT = """
+if (redis.call('GET', KEYS[2]) or '0') ~= ARGV[1] then return 0 end
+redis.call('HSET', KEYS[1], ARGV[2], ARGV[3])
+redis.call('EXPIRE', KEYS[1], ARGV[4])
+return 1
+"""
+
+
+class ContactCache:
+    """
+    Per-owner read-through cache with an in-process L1 in front of Redis.
+    """
+
+    def __init__(self, maxsize: int = 10000, ttl: float = 30, redis_ttl: int = 300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.redis_ttl = redis_ttl
+        self.l1_hits = 0
+        self.l1_misses = 0
+        self.l2_hits = 0
+        self.l2_misses = 0
+        self._entries: OrderedDict[tuple[int, str], tuple[float, Any]] = OrderedDict()
+        self._keys_by_owner: dict[int, set[str]] = {}
+        # Bumped on every invalidation, so loads that raced with a write are not cached.
+        # ``_epoch`` does the same for all owners at once when L1 is cleared.
+        self._generations: dict[int, int] = {}
+        self._epoch = 0
+
+    @staticmethod
+    def _redis_key(owner_id: int) -> str:
+        return f"contacts:v{CACHE_VERSION}:{owner_id}"
+
+    @staticmethod
+    def _generation_key(owner_id: int) -> str:
+        return f"contacts:v{CACHE_VERSION}:{owner_id}:generation"
+
+    async def get_or_load(self, owner_id: int, key: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Return a cached value, loading and caching it on a miss in both tiers.
+
+        Values must be JSON-serializable. ``None`` results are not cached.
+
+        :param owner_id: The owner the value belongs to.
+        :param key: Key of the value within the owner's entries.
+        :param loader: Coroutine function producing the value from the database.
+        :return: The cached or freshly loaded value.
+        """
+        entry = self._entries.get((owner_id, key))
+        if entry is not None and entry[0] > time.monotonic():
+            self._entries.move_to_end((owner_id, key))
+            self.l1_hits += 1
+            metrics.cache_requests.inc(cache="contacts_l1", result="hit")
+            return entry[1]
+        self.l1_misses += 1
+        metrics.cache_requests.inc(cache="contacts_l1", result="miss")
+
+        generation = self._generation(owner_id)
+        redis_generation, value = await self._redis_get(owner_id, key)
+        if value is not None:
+            self.l2_hits += 1
+            metrics.cache_requests.inc(cache="contacts_l2", result="hit")
+        else:
+            self.l2_misses += 1
+            metrics.cache_requests.inc(cache="contacts_l2", result="miss")
+            value = await loader()
+            if value is None:
+                return None
+            if redis_generation is not None and self._generation(owner_id) == generation:
+                await self._redis_set(owner_id, key, value, redis_generation)
+
+        if self._generation(owner_id) == generation:
+            self._store_local(owner_id, key, value)
+        return value
+
+    async def invalidate_owner(self, owner_id: int) -> None:
+        """
+        Drop all cached values of an owner in this worker, in Redis and in other workers.
+        """
+        self.drop_local(owner_id)
+
+        async def invalidate(client) -> None:
+            async with client.pipeline(transaction=False) as pipe:
+                pipe.incr(self._generation_key(owner_id))
+                pipe.expire(self._generation_key(owner_id), self.redis_ttl * 2)
+                pipe.delete(self._redis_key(owner_id))
+                pipe.publish(INVALIDATION_CHANNEL, str(owner_id))
+                await pipe.execute()
+
+        await redis_call(invalidate)
+
+    def drop_local(self, owner_id: int) -> None:
+        self._generations[owner_id] = self._generations.get(owner_id, 0) + 1
+        for key in self._keys_by_owner.pop(owner_id, ()):
+            self._entries.pop((owner_id, key), None)
+
+    def clear(self) -> None:
+        """
+        Drop all L1 entries. Loads in flight are not cached afterwards.
+        """
+        self._epoch += 1
+        self._entries.clear()
+        self._keys_by_owner.clear()
+
+    def _generation(self, owner_id: int) -> tuple[int, int]:
+        return self._epoch, self._generations.get(owner_id, 0)
+
+    async def listen(self) -> None:
+        """
+        Drop L1 entries when other workers publish invalidations. Runs until cancelled.
+
+        L1 is cleared whenever the subscription is (re)established, since
+        messages published while disconnected are lost. The subscription has
+        its own connection without the pool's socket timeout, so a quiet
+        channel does not look like a disconnect.
+        """
+        while True:
+            client = create_pubsub_client()
+            try:
+                async with client.pubsub() as pubsub:
+                    await pubsub.subscribe(INVALIDATION_CHANNEL)
+                    self.clear()
+                    async for message in pubsub.listen():
+                        if message["type"] == "message":
+                            self.drop_local(int(message["data"]))
+            except (RedisError, OSError) as exc:
+                logger.warning("Contact cache invalidation listener disconnected: %s", exc)
+                self.clear()
+                await asyncio.sleep(1)
+            finally:
+                await client.aclose()
+
+    def stats(self) -> dict:
+        def ratio(hits: int, misses: int) -> Optional[float]:
+            return round(hits / (hits + misses), 4) if hits + misses else None
+
+        return {
+            "l1_hits": self.l1_hits,
+            "l1_misses": self.l1_misses,
+            "l1_hit_ratio": ratio(self.l1_hits, self.l1_misses),
+            "l1_size": len(self._entries),
+            "l2_hits": self.l2_hits,
+            "l2_misses": self.l2_misses,
+            "l2_hit_ratio": ratio(self.l2_hits, self.l2_misses),
+        }
+
+    def _store_local(self, owner_id: int, key: str, value: Any) -> None:
+        self._entries[(owner_id, key)] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end((owner_id, key))
+        self._keys_by_owner.setdefault(owner_id, set()).add(key)
+        while len(self._entries) > self.maxsize:
+            (old_owner, old_key), _ = self._entries.popitem(last=False)
+            keys = self._keys_by_owner.get(old_owner)
+            if keys is not None:
+                keys.discard(old_key)
+                if not keys:
+                    del self._keys_by_owner[old_owner]
+
+    async def _redis_get(self, owner_id: int, key: str) -> tuple[Optional[str], Any]:
+        """
+        Read the owner's generation and a cached value in one round trip.
+
+        :return: ``(generation, value)``; the generation is None if Redis is unavailable.
+        """
+        async def read(client) -> list:
+            async with client.pipeline(transaction=False) as pipe:
+                pipe.get(self._generation_key(owner_id))
+                pipe.hget(self._redis_key(owner_id), key)
+                return await pipe.execute()
+
+        result = await redis_call(read)
+        if result is None:
+            return None, None
+        generation, data = result
+        generation = generation.decode() if isinstance(generation, bytes) else (generation or "0")
+        return generation, json.loads(data) if data is not None else None
+
+    async def _redis_set(self, owner_id: int, key: str, value: Any, generation: str) -> None:
+        await redis_call(lambda client: client.eval(
+            SET_IF_GENERATION_SCRIPT, 2, self._redis_key(owner_id), self._generation_key(owner_id),
+            generation, key, json.dumps(value), self.redis_ttl
+        ))
+
+
+contact_cache = ContactCache(
+    maxsize=settings.CONTACT_CACHE_SIZE,
+    ttl=settings.CONTACT_CACHE_TTL,
+    redis_ttl=settings.CONTACT_CACHE_REDIS_TTL,
+)
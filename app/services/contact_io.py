@@ -0,0 +1,185 @@
+"""
+Streaming CSV / NDJSON import and export of contacts.
+
+Everything here works on async iterators so data of any size is processed
+with constant memory: an import body is decoded incrementally and turned
+into one record at a time, and an export is written out in small chunks
+as rows arrive from the database.
+"""
+import codecs
+import csv
+import io
+import json
+import zlib
+from typing import AsyncIterator, Mapping, Sequence, Union
+
+from app import schemas
+
+CONTACT_FIELDS = ["first_name", "last_name", "email", "phone", "birthday", "extra_info"]
+EXPORT_FIELDS = ["id"] + CONTACT_FIELDS
+MAX_LINE_LENGTH = 1024 * 1024
+ROWS_PER_CHUNK = 500
+
+Record = tuple[int, Union[dict, str]]
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """
+    Decode a stream of UTF-8 byte chunks into lines without line terminators.
+
+    :param chunks: The raw body chunks.
+    :return: An async iterator over lines.
+    :raises ValueError: If a single line exceeds ``MAX_LINE_LENGTH`` characters.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+        if len(pending) > MAX_LINE_LENGTH:
+            raise ValueError("Line too long")
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending.rstrip("\r")
+
+
+async def iter_ndjson_records(lines: AsyncIterator[str]) -> AsyncIterator[Record]:
+    """
+    Parse NDJSON lines into ``(row number, object)`` pairs.
+
+    Blank lines are skipped. A line that is not a JSON object yields an error
+    message in place of the object.
+    """
+    row = 0
+    async for line in lines:
+        if not line.strip():
+            continue
+        row += 1
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as exc:
+            yield row, f"Invalid JSON: {exc.msg}"
+            continue
+        if not isinstance(record, dict):
+            yield row, "Expected a JSON object"
+            continue
+        yield row, record
+
+
+async def iter_csv_records(lines: AsyncIterator[str]) -> AsyncIterator[Record]:
+    """
+    Parse CSV lines with a header row into ``(row number, dict)`` pairs.
+
+    Quoted fields may span lines. Empty cells become None so optional fields
+    can be left blank.
+    """
+    header = None
+    row = 0
+    record_lines = []
+    async for line in lines:
+        record_lines.append(line)
+        text = "\n".join(record_lines)
+        # An odd number of quotes means a quoted field continues on the next line.
+        if text.count('"') % 2:
+            if len(text) > MAX_LINE_LENGTH:
+                raise ValueError("Line too long")
+            continue
+        record_lines = []
+        if not text.strip():
+            continue
+
+        values = next(csv.reader([text]))
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+        row += 1
+        if len(values) != len(header):
+            yield row, f"Expected {len(header)} columns, got {len(values)}"
+            continue
+        yield row, {name: (value if value != "" else None) for name, value in zip(header, values)}
+
+    if record_lines:
+        yield row + 1, "Unterminated quoted field"
+
+
+def read_records(chunks: AsyncIterator[bytes], fmt: str) -> AsyncIterator[Record]:
+    """
+    Parse a streamed CSV or NDJSON body into records.
+
+    :param chunks: The raw body chunks.
+    :param fmt: ``"csv"`` or ``"ndjson"``.
+    :return: An async iterator over ``(row number, record or error message)``.
+    """
+    lines = iter_lines(chunks)
+    if fmt == "csv":
+        return iter_csv_records(lines)
+    return iter_ndjson_records(lines)
+
+
+async def iter_ndjson(contacts: AsyncIterator, rows_per_chunk: int = ROWS_PER_CHUNK) -> AsyncIterator[str]:
+    """
+    Serialize contacts as NDJSON in the ``ContactResponse`` shape.
+
+    :param contacts: Async iterator over contact objects.
+    :param rows_per_chunk: Number of rows joined into one yielded chunk.
+    :return: An async iterator over text chunks.
+    """
+    lines = []
+    async for contact in contacts:
+        lines.append(schemas.ContactResponse.model_validate(contact).model_dump_json())
+        if len(lines) >= rows_per_chunk:
+            yield "\n".join(lines) + "\n"
+            lines = []
+    if lines:
+        yield "\n".join(lines) + "\n"
+
+
+async def iter_csv(
+    contacts: AsyncIterator,
+    rows_per_chunk: int = ROWS_PER_CHUNK,
+    fields: Sequence[str] = EXPORT_FIELDS
+) -> AsyncIterator[str]:
+    """
+    Serialize contacts as CSV with a header row.
+
+    The header is yielded on its own, before the first row is fetched.
+
+    :param contacts: Async iterator over contact objects, or over dicts.
+    :param rows_per_chunk: Number of rows written into one yielded chunk.
+    :param fields: The columns to write, in order.
+    :return: An async iterator over text chunks.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(fields)
+    yield buffer.getvalue()
+
+    buffer.seek(0)
+    buffer.truncate()
+    rows = 0
+    async for contact in contacts:
+        if isinstance(contact, Mapping):
+            writer.writerow([contact[field] for field in fields])
+        else:
+            writer.writerow([getattr(contact, field) for field in fields])
+        rows += 1
+        if rows >= rows_per_chunk:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            rows = 0
+    if rows:
+        yield buffer.getvalue()
+
+
+async def gzip_stream(chunks: AsyncIterator[str]) -> AsyncIterator[bytes]:
+    """
+    Gzip-compress a stream of text chunks, flushing after each one so data
+    reaches the client as soon as it is produced.
+    """
+    compressor = zlib.compressobj(wbits=31)
+    async for chunk in chunks:
+        yield compressor.compress(chunk.encode()) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    yield compressor.flush()
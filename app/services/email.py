@@ -1,25 +1,41 @@
+from datetime import timedelta
 from fastapi import Request
 from urllib.parse import urlencode
-import logging
+
+from app.auth.security import create_access_token
+from app.config import settings
+from app.services.email_queue import email_outbox
+
+
+def create_verification_token(email: str) -> str:
+    """
+    Creates a signed, expiring token that proves ownership of an email address.
+    """
+    return create_access_token(
+        {"sub": email, "type": "verify"},
+        expires_delta=timedelta(hours=settings.EMAIL_VERIFY_TOKEN_HOURS)
+    )
 
 
 def generate_verification_link(request: Request, email: str) -> str:
     """
-    Generates a verification link based on the request's base URL and user's email.
+    Generates a verification link with a signed token based on the request's base URL.
     """
     base_url = str(request.base_url)  # e.g., http://127.0.0.1:8000/
-    token = email  # Для реалізації, токен — це email
-    query = urlencode({"token": token})
+    query = urlencode({"token": create_verification_token(email)})
     return f"{base_url}auth/verify-email?{query}"
 
 
-def send_verification_email(request: Request, email: str) -> None:
+async def send_verification_email(request: Request, email: str) -> None:
     """
-    Logs the verification link to the console (you can replace this with real email sending).
+    Queues an email with the verification link; the email worker delivers it.
     """
     verification_link = generate_verification_link(request, email)
-    print(f"📧 Email verification link for {email}: {verification_link}")
+    await send_email(email, "Verify your email", f"Click here to verify your email: {verification_link}")
 
 
-async def send_email(to_email: str, subject: str, body: str):
-    print(f"📧 To: {to_email}\nSubject: {subject}\n\n{body}")
+async def send_email(to_email: str, subject: str, body: str) -> None:
+    """
+    Queues an email for delivery and returns without waiting for the mail server.
+    """
+    await email_outbox.enqueue(to_email, subject, body)
@@ -0,0 +1,549 @@
+"""
+Outbound email queue and delivery worker.
+
+Request handlers only enqueue messages (``email_outbox.enqueue``); a
+background worker started in the application lifespan takes them off the
+queue in batches and hands each batch to a transport, so one SMTP
+connection is reused for the whole batch. Failed messages are retried with
+exponential backoff; messages that fail permanently or too often are moved
+to a dead-letter store for inspection.
+
+Queues:
+
+- ``RedisEmailQueue``: a Redis list shared by all workers. Taken messages
+  stay in the worker's own processing list until they are delivered,
+  retried or dead-lettered. Workers record a heartbeat; the messages of a
+  worker that stopped heartbeating for ``WORKER_TIMEOUT`` seconds are put
+  back on the queue by the others, so a crash does not lose mail (delivery
+  is at-least-once). Messages that cannot be pushed to Redis are kept in
+  process memory instead.
+- ``MemoryEmailQueue``: process memory only, for tests and development.
+
+Transports: ``SMTPTransport``, ``ConsoleTransport`` (prints), ``FileTransport``
+(writes ``.eml`` files) and ``MemoryTransport`` (keeps sent messages).
+"""
+import asyncio
+import heapq
+import json
+import logging
+import os
+import smtplib
+import time
+import uuid
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from email.message import EmailMessage as MIMEMessage
+from typing import Optional
+
+from redis.asyncio import Redis
+
+from app.config import settings
+from app.services import metrics, redis_cache
+
+logger = logging.getLogger(__name__)
+
+DEAD_LETTER_LIMIT = 1000
+# Seconds between worker heartbeats, and without one before a worker's messages are re-queued.
+WORKER_HEARTBEAT_INTERVAL = 10
+WORKER_TIMEOUT = 60
+
+emails_total = metrics.registry.counter(
+    "emails_total", "Outbound emails by outcome (sent, retried, dead).", ("outcome",)
+)
+
+
+@dataclass
+class OutboundEmail:
+    """
+    One queued email and its delivery state.
+    """
+    to: str
+    subject: str
+    body: str
+    id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    attempts: int = 0
+    last_error: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+
+    def to_json(self) -> str:
+        return json.dumps(asdict(self), separators=(",", ":"))
+
+    @classmethod
+    def from_json(cls, data) -> "OutboundEmail":
+        return cls(**json.loads(data))
+
+    def to_mime(self, sender: str) -> MIMEMessage:
+        message = MIMEMessage()
+        message["From"] = sender
+        message["To"] = self.to
+        message["Subject"] = self.subject
+        message["Message-ID"] = f"<{self.id}@{sender.rpartition('@')[2] or 'localhost'}>"
+        message.set_content(self.body)
+        return message
+
+
+class EmailDeliveryError(Exception):
+    """
+    Delivery of one message failed; ``permanent`` failures are not retried.
+    """
+
+    def __init__(self, message: str, permanent: bool = False):
+        super().__init__(message)
+        self.permanent = permanent
+
+
+# === QUEUES ===
+
+class MemoryEmailQueue:
+    """
+    Email queue in process memory. Messages are lost when the process exits.
+    """
+
+    def __init__(self):
+        self._pending: deque[OutboundEmail] = deque()
+        self._retries: list[tuple[float, str, OutboundEmail]] = []
+        self.dead: deque[OutboundEmail] = deque(maxlen=DEAD_LETTER_LIMIT)
+
+    async def push(self, message: OutboundEmail) -> None:
+        self._pending.append(message)
+
+    async def pop_batch(self, limit: int) -> list[OutboundEmail]:
+        now = time.time()
+        while self._retries and self._retries[0][0] <= now:
+            self._pending.append(heapq.heappop(self._retries)[2])
+        return [self._pending.popleft() for _ in range(min(limit, len(self._pending)))]
+
+    async def ack(self, messages: list[OutboundEmail]) -> None:
+        pass
+
+    async def retry(self, message: OutboundEmail, delay: float) -> None:
+        heapq.heappush(self._retries, (time.time() + delay, message.id, message))
+
+    async def dead_letter(self, message: OutboundEmail) -> None:
+        self.dead.append(message)
+
+    async def recover(self) -> None:
+        pass
+
+    async def release(self) -> None:
+        pass
+
+    async def stats(self) -> dict:
+        return {"pending": len(self._pending), "scheduled": len(self._retries), "dead": len(self.dead)}
+
+
+# Record the worker's heartbeat, move due retries to the queue, then up to
+# ARGV[1] messages from the queue to the worker's processing list, atomically.
+POP_BATCH_SCRIPT = """
+redis.call('ZADD', KEYS[4], ARGV[2], ARGV[3])
+local due = redis.call('ZRANGEBYSCORE', KEYS[3], '-inf', ARGV[2], 'LIMIT', 0, ARGV[1])
+for _, raw in ipairs(due) do
+    redis.call('ZREM', KEYS[3], raw)
+    redis.call('LPUSH', KEYS[1], raw)
+end
+local taken = {}
+for i = 1, tonumber(ARGV[1]) do
+    local raw = redis.call('RPOPLPUSH', KEYS[1], KEYS[2])
+    if not raw then break end
+    taken[#taken + 1] = raw
+end
+return taken
+"""
+
+# Record the worker's heartbeat, then move the processing lists of workers
+# without a heartbeat since ARGV[1] back to the queue.
+RECOVER_SCRIPT = """
+redis.call('ZADD', KEYS[2], ARGV[2], ARGV[3])
+local moved = 0
+for _, worker in ipairs(redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', '(' .. ARGV[1])) do
+    local processing = ARGV[4] .. worker
+    while redis.call('RPOPLPUSH', processing, KEYS[1]) do moved = moved + 1 end
+    redis.call('ZREM', KEYS[2], worker)
+end
+return moved
+"""
+
+# Unregister a worker whose processing list is empty.
+RELEASE_SCRIPT = """
+if redis.call('LLEN', KEYS[1]) > 0 then return 0 end
+return redis.call('ZREM', KEYS[2], ARGV[1])
+"""
+
+
+class RedisEmailQueue:
+    """
+    Durable email queue in Redis.
+
+    :param prefix: Prefix of the Redis keys (``<prefix>:queue``, ``:processing:<worker>``,
+        ``:workers``, ``:retry`` and ``:dead``).
+    :param worker_timeout: Seconds without a heartbeat before a worker's messages are re-queued.
+    """
+
+    def __init__(self, prefix: str = "email", worker_timeout: float = WORKER_TIMEOUT):
+        self.worker_id = uuid.uuid4().hex
+        self.worker_timeout = worker_timeout
+        self.queue_key = f"{prefix}:queue"
+        self.processing_prefix = f"{prefix}:processing:"
+        self.processing_key = f"{self.processing_prefix}{self.worker_id}"
+        self.workers_key = f"{prefix}:workers"
+        self.retry_key = f"{prefix}:retry"
+        self.dead_key = f"{prefix}:dead"
+        # Messages that could not be pushed while Redis was unavailable
+        self.fallback = MemoryEmailQueue()
+        # raw JSON of taken messages by ID, needed to remove them from the processing list
+        self._taken: dict[str, str] = {}
+
+    async def push(self, message: OutboundEmail) -> None:
+        pushed = await redis_cache.redis_call(lambda client: client.lpush(self.queue_key, message.to_json()))
+        if pushed is None:
+            logger.warning("Redis unavailable, keeping email %s in memory", message.id)
+            await self.fallback.push(message)
+
+    async def pop_batch(self, limit: int) -> list[OutboundEmail]:
+        async def pop(client: Redis) -> list:
+            return await client.eval(
+                POP_BATCH_SCRIPT, 4, self.queue_key, self.processing_key, self.retry_key, self.workers_key,
+                limit, time.time(), self.worker_id
+            )
+
+        raws = await redis_cache.redis_call(pop, [])
+        messages = []
+        for raw in raws:
+            raw = raw.decode() if isinstance(raw, bytes) else raw
+            message = OutboundEmail.from_json(raw)
+            self._taken[message.id] = raw
+            messages.append(message)
+        if len(messages) < limit:
+            messages.extend(await self.fallback.pop_batch(limit - len(messages)))
+        return messages
+
+    async def _finish(self, messages: list[OutboundEmail], write=None) -> None:
+        taken = [(message, self._taken.pop(message.id)) for message in messages if message.id in self._taken]
+        if not taken:
+            return
+
+        async def finish(client: Redis) -> None:
+            async with client.pipeline(transaction=True) as pipe:
+                for message, raw in taken:
+                    if write is not None:
+                        write(pipe, message)
+                    pipe.lrem(self.processing_key, 1, raw)
+                await pipe.execute()
+
+        await redis_cache.redis_call(finish)
+
+    async def ack(self, messages: list[OutboundEmail]) -> None:
+        await self._finish(messages)
+
+    async def retry(self, message: OutboundEmail, delay: float) -> None:
+        if message.id not in self._taken:
+            await self.fallback.retry(message, delay)
+            return
+        await self._finish([message], lambda pipe, m: pipe.zadd(self.retry_key, {m.to_json(): time.time() + delay}))
+
+    async def dead_letter(self, message: OutboundEmail) -> None:
+        if message.id not in self._taken:
+            await self.fallback.dead_letter(message)
+            return
+
+        def write(pipe, m: OutboundEmail) -> None:
+            pipe.lpush(self.dead_key, m.to_json())
+            pipe.ltrim(self.dead_key, 0, DEAD_LETTER_LIMIT - 1)
+
+        await self._finish([message], write)
+
+    async def recover(self) -> None:
+        """
+        Record this worker's heartbeat and put the messages of workers that
+        stopped heartbeating back on the queue. Called periodically by the
+        delivery worker; messages of live workers are left alone.
+        """
+        now = time.time()
+        moved = await redis_cache.redis_call(lambda client: client.eval(
+            RECOVER_SCRIPT, 2, self.queue_key, self.workers_key,
+            now - self.worker_timeout, now, self.worker_id, self.processing_prefix
+        ))
+        if moved:
+            logger.info("Re-queued %d emails left in processing by stopped workers", moved)
+
+    async def release(self) -> None:
+        """
+        Unregister this worker on a clean stop, if it has no messages in processing.
+        """
+        await redis_cache.redis_call(
+            lambda client: client.eval(RELEASE_SCRIPT, 2, self.processing_key, self.workers_key, self.worker_id)
+        )
+
+    async def stats(self) -> dict:
+        async def sizes(client: Redis) -> list:
+            async with client.pipeline(transaction=False) as pipe:
+                pipe.llen(self.queue_key)
+                pipe.zcard(self.retry_key)
+                pipe.llen(self.dead_key)
+                return await pipe.execute()
+
+        pending, scheduled, dead = await redis_cache.redis_call(sizes, [None, None, None])
+        return {"pending": pending, "scheduled": scheduled, "dead": dead, "in_memory": await self.fallback.stats()}
+
+
+# === TRANSPORTS ===
+
+class MemoryTransport:
+    """
+    Transport keeping sent messages in ``sent``, for tests.
+    """
+
+    def __init__(self):
+        self.sent: list[OutboundEmail] = []
+        self.batches = 0
+
+    async def send_batch(self, messages: list[OutboundEmail]) -> list[Optional[Exception]]:
+        self.batches += 1
+        self.sent.extend(messages)
+        return [None] * len(messages)
+
+
+class ConsoleTransport:
+    """
+    Transport printing messages to stdout, for development.
+    """
+
+    async def send_batch(self, messages: list[OutboundEmail]) -> list[Optional[Exception]]:
+        for message in messages:
+            print(f"📧 To: {message.to}\nSubject: {message.subject}\n\n{message.body}")
+        return [None] * len(messages)
+
+
+class FileTransport:
+    """
+    Transport writing each message to ``<directory>/<id>.eml``.
+    """
+
+    def __init__(self, directory: str, sender: str):
+        self.directory = directory
+        self.sender = sender
+
+    def _write(self, messages: list[OutboundEmail]) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        for message in messages:
+            with open(os.path.join(self.directory, f"{message.id}.eml"), "wb") as file:
+                file.write(message.to_mime(self.sender).as_bytes())
+
+    async def send_batch(self, messages: list[OutboundEmail]) -> list[Optional[Exception]]:
+        await asyncio.to_thread(self._write, messages)
+        return [None] * len(messages)
+
+
+class SMTPTransport:
+    """
+    Transport sending a batch over one SMTP connection, in a worker thread.
+
+    5xx replies for a message are permanent failures; anything else is retried.
+    """
+
+    def __init__(self, host: str, port: int, sender: str, username: Optional[str] = None,
+                 password: Optional[str] = None, starttls: bool = True, timeout: float = 10):
+        self.host = host
+        self.port = port
+        self.sender = sender
+        self.username = username
+        self.password = password
+        self.starttls = starttls
+        self.timeout = timeout
+
+    def _send(self, messages: list[OutboundEmail]) -> list[Optional[Exception]]:
+        results: list[Optional[Exception]] = []
+        with smtplib.SMTP(self.host, self.port, timeout=self.timeout) as smtp:
+            if self.starttls:
+                smtp.starttls()
+            if self.username:
+                smtp.login(self.username, self.password or "")
+            for message in messages:
+                try:
+                    smtp.send_message(message.to_mime(self.sender))
+                    results.append(None)
+                except smtplib.SMTPRecipientsRefused as exc:
+                    codes = [code for code, _ in exc.recipients.values()]
+                    results.append(EmailDeliveryError(str(exc), permanent=all(code >= 500 for code in codes)))
+                except smtplib.SMTPResponseException as exc:
+                    results.append(EmailDeliveryError(f"{exc.smtp_code} {exc.smtp_error!r}", exc.smtp_code >= 500))
+                except smtplib.SMTPServerDisconnected as exc:
+                    # The rest of the batch is retried on a new connection.
+                    results.extend([exc] * (len(messages) - len(results)))
+                    break
+        return results
+
+    async def send_batch(self, messages: list[OutboundEmail]) -> list[Optional[Exception]]:
+        return await asyncio.to_thread(self._send, messages)
+
+
+# === WORKER ===
+
+class EmailOutbox:
+    """
+    Queue front-end for request handlers plus the background delivery worker.
+
+    :param queue: Where messages wait for delivery.
+    :param transport: How batches of messages are delivered.
+    :param batch_size: Maximum number of messages delivered per batch (and connection).
+    :param max_attempts: Deliveries tried before a message is dead-lettered.
+    :param retry_base: Delay in seconds before the first retry; doubled on each attempt.
+    :param retry_max: Upper bound of the retry delay in seconds.
+    :param poll_interval: Seconds between queue polls when it is empty.
+    """
+
+    def __init__(self, queue, transport, batch_size: int = 50, max_attempts: int = 5,
+                 retry_base: float = 30, retry_max: float = 3600, poll_interval: float = 1):
+        self.queue = queue
+        self.transport = transport
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+        self.poll_interval = poll_interval
+        self.enqueued = 0
+        self.sent = 0
+        self.retried = 0
+        self.dead = 0
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+        self._wakeup = asyncio.Event()
+
+    async def enqueue(self, to: str, subject: str, body: str) -> OutboundEmail:
+        """
+        Queue an email for delivery and return without waiting for it.
+        """
+        message = OutboundEmail(to=to, subject=subject, body=body)
+        await self.queue.push(message)
+        self.enqueued += 1
+        self._wakeup.set()
+        return message
+
+    def retry_delay(self, attempts: int) -> float:
+        return min(self.retry_max, self.retry_base * 2 ** (attempts - 1))
+
+    async def process_batch(self) -> int:
+        """
+        Deliver one batch from the queue.
+
+        :return: The number of messages taken from the queue.
+        """
+        messages = await self.queue.pop_batch(self.batch_size)
+        if not messages:
+            return 0
+        try:
+            results = await self.transport.send_batch(messages)
+        except Exception as exc:
+            logger.warning("Email batch of %d failed: %s", len(messages), exc)
+            results = [exc] * len(messages)
+
+        delivered = []
+        for message, error in zip(messages, results):
+            if error is None:
+                delivered.append(message)
+                continue
+            message.attempts += 1
+            message.last_error = str(error)
+            if getattr(error, "permanent", False) or message.attempts >= self.max_attempts:
+                logger.error("Email %s to %s dead-lettered after %d attempts: %s",
+                             message.id, message.to, message.attempts, error)
+                await self.queue.dead_letter(message)
+                self.dead += 1
+                emails_total.inc(outcome="dead")
+            else:
+                await self.queue.retry(message, self.retry_delay(message.attempts))
+                self.retried += 1
+                emails_total.inc(outcome="retried")
+        await self.queue.ack(delivered)
+        self.sent += len(delivered)
+        emails_total.inc(len(delivered), outcome="sent")
+        return len(messages)
+
+    async def run(self) -> None:
+        """
+        Deliver queued email until stopped; on stop, deliver what is due first.
+        """
+        heartbeat = asyncio.create_task(self._heartbeat())
+        try:
+            while True:
+                try:
+                    if await self.process_batch():
+                        continue
+                except Exception:
+                    logger.exception("Email worker iteration failed")
+                if self._stopping:
+                    break
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            heartbeat.cancel()
+        await self.queue.release()
+
+    async def _heartbeat(self) -> None:
+        # Separate from the delivery loop, so a slow batch does not look like a dead worker.
+        while True:
+            try:
+                await self.queue.recover()
+            except Exception:
+                logger.exception("Email queue heartbeat failed")
+            await asyncio.sleep(WORKER_HEARTBEAT_INTERVAL)
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._stopping = False
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self, timeout: float = 10) -> None:
+        """
+        Stop the worker, giving it ``timeout`` seconds to deliver what is due.
+        """
+        if self._task is None:
+            return
+        self._stopping = True
+        self._wakeup.set()
+        try:
+            await asyncio.wait_for(self._task, timeout)
+        except asyncio.TimeoutError:
+            logger.warning("Email worker did not drain within %.0f s", timeout)
+        finally:
+            self._task = None
+
+    async def stats(self) -> dict:
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "enqueued": self.enqueued,
+            "sent": self.sent,
+            "retried": self.retried,
+            "dead": self.dead,
+            "queue": await self.queue.stats(),
+        }
+
+
+def create_transport():
+    """
+    Build the transport selected by ``EMAIL_TRANSPORT`` (smtp, file, memory or console).
+    """
+    if settings.EMAIL_TRANSPORT == "smtp":
+        return SMTPTransport(
+            settings.SMTP_HOST, settings.SMTP_PORT, settings.EMAIL_FROM,
+            settings.SMTP_USERNAME, settings.SMTP_PASSWORD, settings.SMTP_STARTTLS,
+        )
+    if settings.EMAIL_TRANSPORT == "file":
+        return FileTransport(settings.EMAIL_FILE_DIR, settings.EMAIL_FROM)
+    if settings.EMAIL_TRANSPORT == "memory":
+        return MemoryTransport()
+    return ConsoleTransport()
+
+
+email_outbox = EmailOutbox(
+    RedisEmailQueue() if settings.EMAIL_QUEUE == "redis" else MemoryEmailQueue(),
+    create_transport(),
+    batch_size=settings.EMAIL_BATCH_SIZE,
+    max_attempts=settings.EMAIL_MAX_ATTEMPTS,
+    retry_base=settings.EMAIL_RETRY_BASE_SECONDS,
+    retry_max=settings.EMAIL_RETRY_MAX_SECONDS,
+)
@@ -0,0 +1,117 @@
+"""
+Password hashing off the event loop.
+
+bcrypt is deliberately slow, so hashing and verification run on a small,
+dedicated thread pool (bcrypt releases the GIL) instead of blocking the
+event loop. The number of calls waiting for or running on the pool is
+bounded; past that limit callers get 503 instead of queueing without end.
+"""
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi import HTTPException, status
+from passlib.context import CryptContext
+
+from app.config import settings
+from app.services import metrics
+
+
+class PasswordHasher:
+    """
+    Async facade over a bcrypt ``CryptContext`` backed by a bounded thread pool.
+    """
+
+    def __init__(self, max_workers: int = 4, max_pending: int = 64):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.pending = 0
+        self.calls = 0
+        self.rejected = 0
+        self.hash_seconds = 0.0
+        self.wait_seconds = 0.0
+        self._context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+        self._executor = None
+        self._lock = threading.Lock()
+
+    async def hash(self, password: str) -> str:
+        """
+        Hash a password with bcrypt.
+
+        :param password: The plain-text password.
+        :return: The bcrypt hash.
+        :raises HTTPException: 503 if too many hashing calls are already pending.
+        """
+        return await self._run(self._context.hash, password)
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        """
+        Check a password against a bcrypt hash.
+
+        :param password: The plain-text password.
+        :param hashed_password: The stored hash.
+        :return: True if the password matches.
+        :raises HTTPException: 503 if too many hashing calls are already pending.
+        """
+        return await self._run(self._context.verify, password, hashed_password)
+
+    def stats(self) -> dict:
+        return {
+            "calls": self.calls,
+            "rejected": self.rejected,
+            "pending": self.pending,
+            "max_workers": self.max_workers,
+            "max_pending": self.max_pending,
+            "hash_seconds_total": round(self.hash_seconds, 6),
+            "wait_seconds_total": round(self.wait_seconds, 6),
+        }
+
+    def shutdown(self) -> None:
+        """
+        Wait for running calls and release the pool; it is recreated on next use.
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    async def _run(self, fn, *args):
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Server is busy, try again later.",
+                headers={"Retry-After": "1"},
+            )
+        self.pending += 1
+        self.calls += 1
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="password-hasher")
+        submitted = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, self._timed, submitted, fn, *args)
+        finally:
+            self.pending -= 1
+            metrics.record_password_wait(time.perf_counter() - submitted)
+
+    def _timed(self, submitted: float, fn, *args):
+        started = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            finished = time.perf_counter()
+            with self._lock:
+                self.wait_seconds += started - submitted
+                self.hash_seconds += finished - started
+            metrics.record_password_hash(finished - started, fn.__name__)
+
+
+password_hasher = PasswordHasher(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING,
+)
+
+metrics.registry.gauge_callback(
+    "password_hash_pending", "Hashing calls waiting for or running on the pool.", lambda: password_hasher.pending
+)
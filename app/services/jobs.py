@@ -0,0 +1,349 @@
+"""
+Background jobs for work a request does not need to wait for.
+
+Jobs are async functions registered by name with ``@job_runner.job(...)``
+and submitted with ``await job_runner.submit(name, *args)``. Lower priority
+numbers run first; jobs of the same priority run in submission order.
+
+- Memory mode (``JOBS_BACKEND=memory``): a bounded asyncio priority queue
+  served by a pool of worker tasks in the API process.
+- Redis mode (``JOBS_BACKEND=redis``): jobs wait in a Redis sorted set, so
+  they survive restarts and can be run by a separate worker process
+  (``python -m app.worker``). Arguments must be JSON-serializable (bytes
+  are allowed). A job taken by a worker is kept in that worker's processing
+  hash until it finishes. Workers record a heartbeat; the jobs of a worker
+  that stopped heartbeating for ``WORKER_TIMEOUT`` seconds are put back on
+  the queue by the others. Jobs therefore run at least once. If Redis is
+  unavailable, jobs fall back to the in-process queue.
+
+The queue is bounded in both modes: when it is full, ``submit`` raises
+503 instead of letting work pile up. On shutdown the runner stops taking
+jobs and waits up to a timeout for queued and running ones to finish.
+When no workers run in this process and jobs cannot go to Redis (scripts,
+tests without the lifespan), ``submit`` runs the job inline.
+"""
+import asyncio
+import base64
+import itertools
+import json
+import logging
+import time
+import uuid
+from dataclasses import asdict, dataclass, field
+from typing import Awaitable, Callable, Optional
+
+from fastapi import HTTPException, status
+from redis.asyncio import Redis
+
+from app.config import settings
+from app.services import metrics, redis_cache
+
+logger = logging.getLogger(__name__)
+
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 5
+PRIORITY_LOW = 9
+
+# Seconds between worker heartbeats, and without one before a worker's jobs are re-queued.
+WORKER_HEARTBEAT_INTERVAL = 10
+WORKER_TIMEOUT = 60
+
+jobs_total = metrics.registry.counter(
+    "jobs_total", "Background jobs by name and outcome (ok, error, rejected).", ("name", "outcome")
+)
+job_duration = metrics.registry.histogram(
+    "job_duration_seconds", "Background job run time.", ("name",)
+)
+
+
+@dataclass
+class Job:
+    """
+    One submitted call of a registered job function.
+    """
+    name: str
+    args: list
+    kwargs: dict
+    priority: int = PRIORITY_NORMAL
+    id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    submitted_at: float = field(default_factory=time.time)
+
+    @property
+    def score(self) -> float:
+        # Priority first, then submission time in milliseconds (< 1e13).
+        return self.priority * 1e13 + int(self.submitted_at * 1000)
+
+
+def _encode(value):
+    if isinstance(value, bytes):
+        return {"__bytes__": base64.b64encode(value).decode()}
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _decode(value: dict):
+    if len(value) == 1 and "__bytes__" in value:
+        return base64.b64decode(value["__bytes__"])
+    return value
+
+
+def dump_job(job: Job) -> str:
+    return json.dumps(asdict(job), default=_encode, separators=(",", ":"))
+
+
+def load_job(data) -> Job:
+    return Job(**json.loads(data, object_hook=_decode))
+
+
+# Record the worker's heartbeat, take the first job by score and record it
+# (job -> score) in the worker's processing hash, atomically.
+POP_SCRIPT = """
+redis.call('ZADD', KEYS[3], ARGV[1], ARGV[2])
+local popped = redis.call('ZPOPMIN', KEYS[1])
+if #popped == 0 then return false end
+redis.call('HSET', KEYS[2], popped[1], popped[2])
+return popped[1]
+"""
+
+PUSH_SCRIPT = """
+if redis.call('ZCARD', KEYS[1]) >= tonumber(ARGV[1]) then return 0 end
+return redis.call('ZADD', KEYS[1], ARGV[2], ARGV[3])
+"""
+
+# Record the worker's heartbeat, then move the processing hashes of workers
+# without a heartbeat since ARGV[1] back to the queue.
+RECOVER_SCRIPT = """
+redis.call('ZADD', KEYS[2], ARGV[2], ARGV[3])
+local moved = 0
+for _, worker in ipairs(redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', '(' .. ARGV[1])) do
+    local processing = ARGV[4] .. worker
+    local entries = redis.call('HGETALL', processing)
+    for i = 1, #entries, 2 do
+        redis.call('ZADD', KEYS[1], entries[i + 1], entries[i])
+    end
+    moved = moved + #entries / 2
+    redis.call('DEL', processing)
+    redis.call('ZREM', KEYS[2], worker)
+end
+return moved
+"""
+
+# Unregister a worker whose processing hash is empty.
+RELEASE_SCRIPT = """
+if redis.call('HLEN', KEYS[1]) > 0 then return 0 end
+return redis.call('ZREM', KEYS[2], ARGV[1])
+"""
+
+
+class JobRunner:
+    """
+    Priority job queue with a pool of worker tasks.
+
+    :param workers: Number of jobs run concurrently by this process.
+    :param max_queue: Maximum number of waiting jobs.
+    :param redis_prefix: Prefix of the Redis keys for Redis mode; None for memory mode.
+    :param poll_interval: Seconds between Redis polls when the queue is empty.
+    :param worker_timeout: Seconds without a heartbeat before a worker's jobs are re-queued.
+    """
+
+    def __init__(self, workers: int = 4, max_queue: int = 1000, redis_prefix: Optional[str] = None,
+                 poll_interval: float = 0.5, worker_timeout: float = WORKER_TIMEOUT):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.redis_prefix = redis_prefix
+        self.poll_interval = poll_interval
+        self.worker_timeout = worker_timeout
+        self.worker_id = uuid.uuid4().hex
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self._handlers: dict[str, Callable[..., Awaitable]] = {}
+        self._sequence = itertools.count()
+        self._queue: Optional[asyncio.PriorityQueue] = None
+        self._tasks: list[asyncio.Task] = []
+        self._running: set[asyncio.Task] = set()
+        self._stopping = False
+
+    @property
+    def queue_key(self) -> str:
+        return f"{self.redis_prefix}:queue"
+
+    @property
+    def processing_prefix(self) -> str:
+        return f"{self.redis_prefix}:processing:"
+
+    @property
+    def processing_key(self) -> str:
+        return f"{self.processing_prefix}{self.worker_id}"
+
+    @property
+    def workers_key(self) -> str:
+        return f"{self.redis_prefix}:workers"
+
+    def job(self, name: Optional[str] = None):
+        """
+        Register an async function as a job, under ``name`` or its own name.
+        """
+        def register(func: Callable[..., Awaitable]) -> Callable[..., Awaitable]:
+            self._handlers[name or func.__name__] = func
+            return func
+        return register
+
+    async def submit(self, name: str, *args, priority: int = PRIORITY_NORMAL, **kwargs) -> Job:
+        """
+        Queue a job and return without waiting for it.
+
+        :param name: Name of a registered job.
+        :param args: Positional arguments of the job function.
+        :param priority: 0 (first) to 9 (last).
+        :param kwargs: Keyword arguments of the job function.
+        :return: The queued job.
+        :raises HTTPException: 503 if the queue is full or shutting down.
+        """
+        if name not in self._handlers:
+            raise KeyError(f"Unknown job {name!r}")
+        job = Job(name=name, args=list(args), kwargs=kwargs, priority=priority)
+        self.submitted += 1
+
+        if self.redis_prefix is not None and not self._stopping:
+            pushed = await redis_cache.redis_call(
+                lambda client: client.eval(PUSH_SCRIPT, 1, self.queue_key, self.max_queue, job.score, dump_job(job))
+            )
+            if pushed:
+                return job
+            if pushed == 0:
+                self._reject(job)
+
+        if self._queue is None:
+            await self._execute(job)
+            return job
+        if self._stopping or self._queue.full():
+            self._reject(job)
+        self._queue.put_nowait((job.priority, next(self._sequence), job))
+        return job
+
+    def _reject(self, job: Job) -> None:
+        self.rejected += 1
+        jobs_total.inc(name=job.name, outcome="rejected")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server is busy, try again later.",
+            headers={"Retry-After": "1"},
+        )
+
+    async def _execute(self, job: Job) -> None:
+        started = time.perf_counter()
+        try:
+            await self._handlers[job.name](*job.args, **job.kwargs)
+        except Exception:
+            self.failed += 1
+            jobs_total.inc(name=job.name, outcome="error")
+            logger.exception("Job %s (%s) failed", job.name, job.id)
+        else:
+            self.completed += 1
+            jobs_total.inc(name=job.name, outcome="ok")
+        finally:
+            job_duration.observe(time.perf_counter() - started, name=job.name)
+
+    async def _local_worker(self) -> None:
+        while True:
+            _, _, job = await self._queue.get()
+            try:
+                await self._execute(job)
+            finally:
+                self._queue.task_done()
+
+    async def _redis_worker(self) -> None:
+        while not self._stopping:
+            raw = await redis_cache.redis_call(lambda client: client.eval(
+                POP_SCRIPT, 3, self.queue_key, self.processing_key, self.workers_key, time.time(), self.worker_id
+            ))
+            if not raw:
+                await asyncio.sleep(self.poll_interval)
+                continue
+            task = asyncio.current_task()
+            self._running.add(task)
+            try:
+                await self._execute(load_job(raw))
+            finally:
+                self._running.discard(task)
+            # Not reached when cancelled mid-job: the job stays in processing and is re-queued.
+            await redis_cache.redis_call(lambda client: client.hdel(self.processing_key, raw))
+
+    async def _recover(self, client: Redis) -> int:
+        now = time.time()
+        return await client.eval(
+            RECOVER_SCRIPT, 2, self.queue_key, self.workers_key,
+            now - self.worker_timeout, now, self.worker_id, self.processing_prefix
+        )
+
+    async def _heartbeat(self) -> None:
+        # Separate from the workers, so long jobs do not make this process look dead.
+        while True:
+            moved = await redis_cache.redis_call(self._recover)
+            if moved:
+                logger.info("Re-queued %d jobs left in processing by stopped workers", moved)
+            await asyncio.sleep(WORKER_HEARTBEAT_INTERVAL)
+
+    def start(self) -> None:
+        """
+        Start the worker pool in the running event loop.
+        """
+        if self._tasks:
+            return
+        self._stopping = False
+        self._queue = asyncio.PriorityQueue(maxsize=self.max_queue)
+        self._tasks = [asyncio.create_task(self._local_worker()) for _ in range(self.workers)]
+        if self.redis_prefix is not None:
+            self._tasks.append(asyncio.create_task(self._start_redis_workers()))
+
+    async def _start_redis_workers(self) -> None:
+        await asyncio.gather(self._heartbeat(), *(self._redis_worker() for _ in range(self.workers)))
+
+    async def stop(self, timeout: float = 10) -> None:
+        """
+        Stop taking jobs and wait up to ``timeout`` seconds for queued and
+        running ones to finish, then cancel the workers.
+        """
+        if not self._tasks:
+            return
+        self._stopping = True
+        waits = [self._queue.join()]
+        if self._running:
+            waits.append(asyncio.wait(list(self._running)))
+        try:
+            await asyncio.wait_for(asyncio.gather(*waits), timeout)
+        except asyncio.TimeoutError:
+            logger.warning("Job runner did not drain within %.0f s; %d jobs dropped",
+                           timeout, self._queue.qsize())
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        if self.redis_prefix is not None:
+            # Unregisters only if no job is left in processing; those are re-queued later.
+            await redis_cache.redis_call(lambda client: client.eval(
+                RELEASE_SCRIPT, 2, self.processing_key, self.workers_key, self.worker_id
+            ))
+        self._tasks = []
+        self._queue = None
+
+    def stats(self) -> dict:
+        return {
+            "backend": "memory" if self.redis_prefix is None else "redis",
+            "workers": self.workers if self._tasks else 0,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+        }
+
+
+job_runner = JobRunner(
+    workers=settings.JOBS_WORKERS,
+    max_queue=settings.JOBS_MAX_QUEUE,
+    redis_prefix="jobs" if settings.JOBS_BACKEND == "redis" else None,
+)
+metrics.registry.gauge_callback(
+    "jobs_queued", "Background jobs waiting in this process's queue.", lambda: job_runner.stats()["queued"]
+)
@@ -1,4 +1,193 @@
-from slowapi import Limiter
-from slowapi.util import get_remote_address
+"""
+Redis-backed rate limiting shared by all worker processes.
 
-limiter = Limiter(key_func=get_remote_address)
+Each check is one atomic Lua script implementing GCRA (generic cell rate
+algorithm): Redis keeps a single "theoretical arrival time" per key, so a
+check costs one round-trip and one small string regardless of the limit.
+The script reads the clock with ``TIME`` so workers with skewed clocks agree.
+
+Requests are keyed by the subject of a valid bearer token, or by client IP
+when there is none. Limits are set per route group (``RATE_LIMITS``); routes
+join a group with the ``@limiter.limit("group")`` decorator and all others
+use ``default``. Clients rejected by Redis are remembered in-process until
+their retry time, so repeated requests over quota are refused without a
+Redis call. Redis errors never fail a request: the check is skipped, and
+while the shared circuit breaker is open no Redis call is made at all.
+"""
+import math
+import time
+from typing import Callable
+
+from fastapi import HTTPException, Request, Response, status
+
+from app.auth.security import decode_access_token
+from app.auth.token_cache import token_cache
+from app.config import settings
+from app.services.redis_cache import redis_call
+
+# KEYS[1] - bucket key; ARGV[1] - ms between requests; ARGV[2] - burst size.
+# Returns {allowed, remaining, retry_after_ms}.
+GCRA_SCRIPT = """
+local interval = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) * 1000 + math.floor(tonumber(clock[2]) / 1000)
+local tat = tonumber(redis.call('GET', KEYS[1]) or now)
+if tat < now then
+    tat = now
+end
+local new_tat = tat + interval
+local allow_at = new_tat - interval * burst
+if allow_at > now then
+    return {0, 0, math.ceil(allow_at - now)}
+end
+redis.call('SET', KEYS[1], new_tat, 'PX', math.ceil(new_tat - now))
+return {1, math.floor((now - allow_at) / interval), 0}
+"""
+
+PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+
+def parse_rate(rate: str) -> tuple[int, int]:
+    """
+    Parse a rate such as ``"5/minute"`` into ``(requests, period in seconds)``.
+    """
+    count, _, period = rate.strip().partition("/")
+    if period not in PERIODS or not count.isdigit() or int(count) < 1:
+        raise ValueError(f"Invalid rate limit: {rate!r}")
+    return int(count), PERIODS[period]
+
+
+def parse_rate_limits(value: str) -> dict[str, tuple[int, int]]:
+    """
+    Parse ``"group=rate,group=rate"`` into a mapping of group to parsed rate.
+    """
+    limits = {}
+    for item in filter(None, (part.strip() for part in value.split(","))):
+        group, _, rate = item.partition("=")
+        limits[group.strip()] = parse_rate(rate)
+    return limits
+
+
+class RateLimiter:
+    """
+    Per-route-group GCRA limiter backed by Redis, with an in-process block list.
+    """
+
+    def __init__(self, limits: dict[str, tuple[int, int]], enabled: bool = True, max_blocked: int = 10000):
+        self.limits = limits
+        self.enabled = enabled
+        self.max_blocked = max_blocked
+        self.allowed = 0
+        self.rejected = 0
+        self.local_rejected = 0
+        self.unavailable = 0
+        self._groups: dict[Callable, str] = {}
+        # bucket key -> monotonic time until which the client is over quota
+        self._blocked_until: dict[str, float] = {}
+        self._script = None
+
+    def limit(self, group: str) -> Callable[[Callable], Callable]:
+        """
+        Decorator assigning a route endpoint to a rate-limit group.
+        """
+        if group not in self.limits:
+            raise ValueError(f"Unknown rate limit group: {group!r}")
+
+        def decorator(endpoint: Callable) -> Callable:
+            self._groups[endpoint] = group
+            return endpoint
+        return decorator
+
+    @staticmethod
+    def client_key(request: Request) -> str:
+        """
+        Identify the client: the token subject if the request carries a valid
+        access token, otherwise the remote address. Tokens with a ``type``
+        claim (email verification, password reset) are not access tokens and
+        are ignored, as in ``get_current_user``. Tokens already verified by
+        ``get_current_user`` are read from the token cache, so only the first
+        request with a token pays for decoding it.
+        """
+        scheme, _, token = request.headers.get("authorization", "").partition(" ")
+        if scheme.lower() == "bearer" and token:
+            payload = token_cache.peek(token) or decode_access_token(token)
+            if payload and payload.get("sub") and payload.get("type") is None:
+                return f"user:{payload['sub']}"
+        return f"ip:{request.client.host if request.client else 'unknown'}"
+
+    async def __call__(self, request: Request, response: Response) -> None:
+        """
+        FastAPI dependency checking the request against its route group's limit.
+
+        :raises HTTPException: 429 with ``Retry-After`` when the client is over quota.
+        """
+        if not self.enabled:
+            return
+        group = self._groups.get(request.scope.get("endpoint"), "default")
+        if group not in self.limits:
+            return
+        count, period = self.limits[group]
+        key = f"ratelimit:{group}:{self.client_key(request)}"
+
+        blocked_until = self._blocked_until.get(key)
+        if blocked_until is not None:
+            remaining = blocked_until - time.monotonic()
+            if remaining > 0:
+                self.local_rejected += 1
+                raise self._too_many_requests(remaining)
+            del self._blocked_until[key]
+
+        async def check(client):
+            if self._script is None:
+                self._script = client.register_script(GCRA_SCRIPT)
+            return await self._script(keys=[key], args=[period * 1000 / count, count], client=client)
+
+        result = await redis_call(check)
+        if result is None:
+            self.unavailable += 1
+            return
+        allowed, left, retry_after_ms = result
+
+        response.headers["X-RateLimit-Limit"] = str(count)
+        if not allowed:
+            self.rejected += 1
+            retry_after = int(retry_after_ms) / 1000
+            self._block(key, retry_after)
+            raise self._too_many_requests(retry_after)
+        self.allowed += 1
+        response.headers["X-RateLimit-Remaining"] = str(left)
+
+    def _block(self, key: str, retry_after: float) -> None:
+        now = time.monotonic()
+        if len(self._blocked_until) >= self.max_blocked:
+            self._blocked_until = {k: until for k, until in self._blocked_until.items() if until > now}
+            if len(self._blocked_until) >= self.max_blocked:
+                return
+        self._blocked_until[key] = now + retry_after
+
+    @staticmethod
+    def _too_many_requests(retry_after: float) -> HTTPException:
+        return HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Rate limit exceeded. Try again later.",
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))}
+        )
+
+    def reset_local(self) -> None:
+        """
+        Forget the in-process block list.
+        """
+        self._blocked_until.clear()
+
+    def stats(self) -> dict:
+        return {
+            "allowed": self.allowed,
+            "rejected": self.rejected,
+            "local_rejected": self.local_rejected,
+            "unavailable": self.unavailable,
+            "blocked_clients": len(self._blocked_until),
+        }
+
+
+limiter = RateLimiter(parse_rate_limits(settings.RATE_LIMITS), enabled=settings.RATE_LIMIT_ENABLED)
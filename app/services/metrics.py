@@ -0,0 +1,326 @@
+"""
+In-process performance metrics with a Prometheus text exposition.
+
+Metrics live in this worker's memory and are rendered on ``/metrics``; no
+collector or client library is needed. Each worker process exposes its own
+values, so scrape every worker (or sum them in the query).
+
+Besides the process-wide metrics, every HTTP request gets a ``RequestStats``
+in a context variable. The database hooks, Redis calls and password hashing
+add their time to it, so the middleware can attribute time per request and
+optionally report it in a ``Server-Timing`` header.
+"""
+import math
+import threading
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Callable, Iterable, Optional
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Iterable[str], values: Iterable[str]) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    """
+    Monotonic counter, optionally split by labels.
+    """
+
+    type = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self._values: dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(tuple(str(labels[name]) for name in self.labelnames), 0)
+
+    def samples(self) -> Iterable[str]:
+        for key, value in sorted(self._values.items()):
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+
+
+class Histogram:
+    """
+    Cumulative histogram with fixed buckets, optionally split by labels.
+    """
+
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...] = (),
+                 buckets: tuple[float, ...] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        # label values -> [per-bucket counts, sum, count]
+        self._values: dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels) -> None:
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry[0][index] += 1
+                    break
+            entry[1] += value
+            entry[2] += 1
+
+    def count(self, **labels) -> int:
+        entry = self._values.get(tuple(str(labels[name]) for name in self.labelnames))
+        return entry[2] if entry else 0
+
+    def samples(self) -> Iterable[str]:
+        names = self.labelnames + ("le",)
+        for key, (counts, total, count) in sorted(self._values.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                labels = _format_labels(names, key + (_format_value(bound),))
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = _format_labels(self.labelnames, key)
+            yield f"{self.name}_sum{labels} {_format_value(total)}"
+            yield f"{self.name}_count{labels} {count}"
+
+
+class CallbackMetric:
+    """
+    Metric whose current values are read from a callback at scrape time, for
+    counters and gauges that other components already keep.
+    """
+
+    def __init__(self, name: str, help: str, type: str, callback: Callable[[], Optional[float]]):
+        self.name = name
+        self.help = help
+        self.type = type
+        self.callback = callback
+
+    def samples(self) -> Iterable[str]:
+        value = self.callback()
+        if value is not None:
+            yield f"{self.name} {_format_value(value)}"
+
+
+class Registry:
+    """
+    Ordered collection of metrics rendered together.
+    """
+
+    def __init__(self):
+        self._metrics: dict[str, object] = {}
+
+    def register(self, metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name!r} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labelnames: tuple[str, ...] = ()) -> Counter:
+        return self.register(Counter(name, help, labelnames))
+
+    def histogram(self, name: str, help: str, labelnames: tuple[str, ...] = (),
+                  buckets: tuple[float, ...] = LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help, labelnames, buckets))
+
+    def gauge_callback(self, name: str, help: str, callback: Callable[[], Optional[float]]) -> CallbackMetric:
+        return self.register(CallbackMetric(name, help, "gauge", callback))
+
+    def counter_callback(self, name: str, help: str, callback: Callable[[], Optional[float]]) -> CallbackMetric:
+        return self.register(CallbackMetric(name, help, "counter", callback))
+
+    def render(self) -> str:
+        """
+        Render all metrics in the Prometheus text exposition format (0.0.4).
+        """
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+http_request_duration = registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template.", ("method", "route", "status")
+)
+http_request_db_queries = registry.histogram(
+    "http_request_db_queries", "SQL statements executed per HTTP request.", ("route",), QUERY_COUNT_BUCKETS
+)
+http_request_db_duration = registry.histogram(
+    "http_request_db_duration_seconds", "Time spent in SQL statements per HTTP request.", ("route",)
+)
+db_query_duration = registry.histogram(
+    "db_query_duration_seconds", "SQL statement execution time.", ("engine",)
+)
+redis_call_duration = registry.histogram(
+    "redis_call_duration_seconds", "Redis call latency by outcome (ok, error).", ("outcome",)
+)
+redis_calls_skipped = registry.counter(
+    "redis_calls_skipped_total", "Redis calls skipped because the circuit breaker was open."
+)
+cache_requests = registry.counter(
+    "cache_requests_total", "Cache lookups by cache and result (hit, miss).", ("cache", "result")
+)
+password_hash_duration = registry.histogram(
+    "password_hash_duration_seconds", "bcrypt hash/verify time on the hashing pool.", ("operation",),
+    (0.05, 0.1, 0.2, 0.3, 0.5, 1, 2)
+)
+
+
+@dataclass
+class RequestStats:
+    """
+    Time attributed to one HTTP request by the instrumented components.
+    """
+    db_queries: int = 0
+    db_seconds: float = 0.0
+    redis_calls: int = 0
+    redis_seconds: float = 0.0
+    hash_seconds: float = 0.0
+    # (seconds, statement) of every SQL statement, when a profiler asks for it
+    queries: Optional[list] = None
+
+
+current_request: ContextVar[Optional[RequestStats]] = ContextVar("current_request", default=None)
+
+
+def record_redis_call(seconds: float, outcome: str) -> None:
+    redis_call_duration.observe(seconds, outcome=outcome)
+    stats = current_request.get()
+    if stats is not None:
+        stats.redis_calls += 1
+        stats.redis_seconds += seconds
+
+
+def record_password_hash(seconds: float, operation: str) -> None:
+    password_hash_duration.observe(seconds, operation=operation)
+
+
+def record_password_wait(seconds: float) -> None:
+    """
+    Add the wall time a request spent awaiting the hashing pool.
+    """
+    stats = current_request.get()
+    if stats is not None:
+        stats.hash_seconds += seconds
+
+
+def instrument_engine(db_engine: AsyncEngine, name: str) -> None:
+    """
+    Time every SQL statement of an engine and attribute it to the current request.
+
+    :param db_engine: The async engine to instrument.
+    :param name: Label value for the engine (``primary`` or ``replica``).
+    """
+    sync_engine = db_engine.sync_engine
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_start"].pop()
+        db_query_duration.observe(elapsed, engine=name)
+        stats = current_request.get()
+        if stats is not None:
+            stats.db_queries += 1
+            stats.db_seconds += elapsed
+            if stats.queries is not None:
+                stats.queries.append((elapsed, statement))
+
+    @event.listens_for(sync_engine, "handle_error")
+    def handle_error(exception_context):
+        connection = exception_context.connection
+        if connection is not None and connection.info.get("query_start"):
+            connection.info["query_start"].pop()
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware recording per-route latency and per-request DB time.
+
+    Requests are labelled with the matched route template (``/contacts/{contact_id}``),
+    not the raw path, so label cardinality stays bounded; unmatched requests
+    share the ``unmatched`` label. With ``server_timing`` the response carries a
+    ``Server-Timing`` header with the request's DB, Redis and hashing time.
+    """
+
+    def __init__(self, app, server_timing: bool = False):
+        self.app = app
+        self.server_timing = server_timing
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = current_request.set(stats)
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if self.server_timing:
+                    headers = list(message.get("headers", []))
+                    headers.append((b"server-timing", self._server_timing(stats, started).encode()))
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_request.reset(token)
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            http_request_duration.observe(
+                time.perf_counter() - started, method=scope["method"], route=route, status=status_code
+            )
+            http_request_db_queries.observe(stats.db_queries, route=route)
+            http_request_db_duration.observe(stats.db_seconds, route=route)
+
+    @staticmethod
+    def _server_timing(stats: RequestStats, started: float) -> str:
+        def ms(seconds: float) -> str:
+            return f"{seconds * 1000:.1f}"
+
+        return ", ".join([
+            f'db;dur={ms(stats.db_seconds)};desc="{stats.db_queries} queries"',
+            f'redis;dur={ms(stats.redis_seconds)};desc="{stats.redis_calls} calls"',
+            f"hash;dur={ms(stats.hash_seconds)}",
+            f"app;dur={ms(time.perf_counter() - started)}",
+        ])
@@ -0,0 +1,227 @@
+"""
+Opt-in sampling profiler for slow requests.
+
+A fraction of requests to the profiled path prefixes is sampled. While such a
+request runs, a background thread takes a stack sample of its task every few
+milliseconds. If the task is running, the sample is the event-loop thread's
+real stack. If it is suspended, the sample is the chain of awaiting
+coroutines, with ``[await]`` as the leaf. Together they form a wall-clock
+profile showing where a slow request spent its time, including waits on the
+database or Redis. The request's SQL statements are recorded through the
+engine hooks in ``metrics``.
+
+When a sampled request takes longer than the threshold, its stacks are
+written in the folded format that ``flamegraph.pl``, speedscope and inferno
+read (``<dump>.folded``), next to its query log (``<dump>.sql.txt``). The
+dump directory is a ring buffer: the oldest dumps are removed once there are
+too many or they take too much space.
+"""
+import asyncio
+import logging
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Optional
+
+from app.services import metrics
+
+logger = logging.getLogger(__name__)
+
+
+def _frame_name(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _thread_stack(frame) -> list[str]:
+    stack = []
+    while frame is not None:
+        stack.append(_frame_name(frame))
+        frame = frame.f_back
+    stack.reverse()
+    return stack
+
+
+def _await_stack(coro) -> list[str]:
+    stack = []
+    while coro is not None:
+        frame = getattr(coro, "cr_frame", None) or getattr(coro, "gi_frame", None)
+        if frame is None:
+            break
+        stack.append(_frame_name(frame))
+        coro = getattr(coro, "cr_await", None) or getattr(coro, "gi_yieldfrom", None)
+    stack.append("[await]")
+    return stack
+
+
+class StackSampler:
+    """
+    Background thread sampling the stacks of registered asyncio tasks.
+    """
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self._profiles: dict[asyncio.Task, Counter] = {}
+        # Guards the counters, which the sampler thread updates from a snapshot of ``_profiles``.
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+
+    def register(self, task: asyncio.Task) -> Counter:
+        """
+        Start sampling a task; the returned counter maps folded stacks to sample counts.
+        """
+        if self._thread is None or not self._thread.is_alive():
+            self._loop = task.get_loop()
+            self._loop_thread_id = threading.get_ident()
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+            self._thread.start()
+        profile = Counter()
+        with self._lock:
+            self._profiles[task] = profile
+        return profile
+
+    def unregister(self, task: asyncio.Task) -> Counter:
+        """
+        Stop sampling a task and return a copy of its profile that the sampler no longer updates.
+        """
+        with self._lock:
+            return Counter(self._profiles.pop(task, None))
+
+    def stop(self) -> None:
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            if self._profiles:
+                self._sample()
+
+    def _sample(self) -> None:
+        try:
+            running = asyncio.current_task(self._loop)
+        except RuntimeError:
+            running = None
+        for task, profile in list(self._profiles.items()):
+            if task is running:
+                stack = _thread_stack(sys._current_frames().get(self._loop_thread_id))
+            else:
+                stack = _await_stack(task.get_coro())
+            with self._lock:
+                if task in self._profiles:
+                    profile[";".join(stack)] += 1
+
+
+class ProfileStore:
+    """
+    Directory of profile dumps bounded by count and total size.
+    """
+
+    def __init__(self, directory: str, max_dumps: int = 100, max_bytes: int = 50 * 1024 * 1024):
+        self.directory = directory
+        self.max_dumps = max_dumps
+        self.max_bytes = max_bytes
+
+    def write(self, name: str, profile: Counter, queries: list[tuple[float, str]], summary: str) -> str:
+        """
+        Write the folded stacks and the query log of one request, then prune old dumps.
+
+        :return: The path of the folded stack file.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        base = os.path.join(self.directory, name)
+        with open(f"{base}.folded", "w") as folded:
+            for stack, count in profile.most_common():
+                folded.write(f"{stack} {count}\n")
+        with open(f"{base}.sql.txt", "w") as log:
+            log.write(f"{summary}\n\n")
+            for elapsed, statement in queries:
+                log.write(f"-- {elapsed * 1000:.2f} ms\n{statement.strip()};\n\n")
+        self.prune()
+        return f"{base}.folded"
+
+    def prune(self) -> None:
+        dumps: dict[str, list[os.DirEntry]] = {}
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and entry.name.endswith((".folded", ".sql.txt")):
+                dumps.setdefault(entry.name.split(".", 1)[0], []).append(entry)
+        # Names start with a UTC timestamp, so sorting them orders dumps by age.
+        names = sorted(dumps)
+        total = sum(entry.stat().st_size for entries in dumps.values() for entry in entries)
+        while names and (len(names) > self.max_dumps or total > self.max_bytes):
+            for entry in dumps[names.pop(0)]:
+                total -= entry.stat().st_size
+                os.remove(entry.path)
+
+
+class ProfilerMiddleware:
+    """
+    Pure ASGI middleware profiling a sample of requests and dumping slow ones.
+
+    :param app: The ASGI application.
+    :param sampler: Stack sampler shared by all requests.
+    :param store: Where dumps of slow requests are written.
+    :param sample_rate: Fraction of matching requests to profile (0..1).
+    :param threshold: Latency in seconds above which a profiled request is dumped.
+    :param path_prefixes: Only requests whose path starts with one of these are profiled.
+    """
+
+    def __init__(self, app, sampler: StackSampler, store: ProfileStore, sample_rate: float,
+                 threshold: float, path_prefixes: tuple[str, ...]):
+        self.app = app
+        self.sampler = sampler
+        self.store = store
+        self.sample_rate = sample_rate
+        self.threshold = threshold
+        self.path_prefixes = path_prefixes
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or not scope["path"].startswith(self.path_prefixes)
+            or random.random() >= self.sample_rate
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        stats = metrics.current_request.get()
+        token = None
+        if stats is None:
+            stats = metrics.RequestStats()
+            token = metrics.current_request.set(stats)
+        stats.queries = []
+        task = asyncio.current_task()
+        self.sampler.register(task)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            elapsed = time.perf_counter() - started
+            profile = self.sampler.unregister(task)
+            if token is not None:
+                metrics.current_request.reset(token)
+            if elapsed >= self.threshold:
+                await self._dump(scope, elapsed, profile, stats.queries)
+
+    async def _dump(self, scope, elapsed: float, profile: Counter, queries: list) -> None:
+        route = getattr(scope.get("route"), "path", None) or scope["path"]
+        slug = re.sub(r"[^A-Za-z0-9]+", "-", route).strip("-") or "root"
+        timestamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+        name = f"{timestamp}-{scope['method']}-{slug}-{int(elapsed * 1000)}ms"
+        summary = f"{scope['method']} {scope['path']} took {elapsed * 1000:.1f} ms, {len(queries)} SQL statements"
+        try:
+            path = await asyncio.to_thread(self.store.write, name, profile, queries, summary)
+        except OSError as exc:
+            logger.warning("Could not write request profile: %s", exc)
+            return
+        logger.info("%s; profile written to %s", summary, path)
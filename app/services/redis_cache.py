@@ -1,34 +1,320 @@
-import os
 import json
-from redis.asyncio import Redis
+import time
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Optional, TypeVar
 
-# Ініціалізуємо Redis клієнта глобально
+from redis.asyncio import BlockingConnectionPool, Redis
+from redis.exceptions import RedisError
+
+from app.config import settings
+from app.services import metrics
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Версія формату кешованих даних. Змінюйте її при зміні UserSnapshot,
+# щоб старі записи в Redis просто ігнорувалися.
+USER_CACHE_VERSION = 2
+USER_CACHE_TTL = 300
+
+# Клієнт Redis процесу; відкривається в lifespan застосунку (open_redis)
 redis_client: Redis = None
 
-async def init_redis() -> Redis:
+# Завантаження користувачів з БД, що виконуються зараз (захист від stampede)
+_inflight: dict[str, asyncio.Future] = {}
+
+
+class UserSnapshot:
+    """
+    Компактний знімок користувача для шляху читання (автентифікація).
+
+    Це звичайний об'єкт даних, не ORM-модель: він не прив'язаний до сесії,
+    тому його не можна випадково зберегти через ``db.commit()``.
+    """
+
+    __slots__ = ("id", "email", "is_verified", "avatar_url", "is_admin")
+
+    def __init__(self, id: int, email: str, is_verified: bool = False,
+                 avatar_url: Optional[str] = None, is_admin: bool = False):
+        self.id = id
+        self.email = email
+        self.is_verified = bool(is_verified)
+        self.avatar_url = avatar_url
+        self.is_admin = bool(is_admin)
+
+    @classmethod
+    def from_user(cls, user) -> "UserSnapshot":
+        """
+        Створює знімок з ORM-об'єкта користувача.
+        """
+        return cls(user.id, user.email, user.is_verified, user.avatar_url, user.is_admin)
+
+    def to_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, UserSnapshot) and self.to_dict() == other.to_dict()
+
+    def __repr__(self) -> str:
+        return f"UserSnapshot(id={self.id!r}, email={self.email!r})"
+
+
+def _user_key(email: str) -> str:
+    return f"user:v{USER_CACHE_VERSION}:{email}"
+
+
+class CircuitBreaker:
+    """
+    Запобіжник для викликів Redis.
+
+    Після ``failure_threshold`` помилок поспіль розмикається: протягом
+    ``reset_timeout`` секунд виклики не виконуються зовсім, тож повільний
+    чи недоступний Redis не додає свій таймаут до кожного запиту. Потім
+    виклики знову пропускаються; перша ж помилка розмикає його знову,
+    перший успіх замикає.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 10):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.trips = 0
+        self.short_circuited = 0
+        self.opened_at: Optional[float] = None
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at < self.reset_timeout:
+            return "open"
+        return "half-open"
+
+    def allow(self) -> bool:
+        if self.state == "open":
+            self.short_circuited += 1
+            return False
+        return True
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.opened_at is not None or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+            self.trips += 1
+
+    def stats(self) -> dict:
+        return {
+            "state": self.state,
+            "failures": self.failures,
+            "trips": self.trips,
+            "short_circuited": self.short_circuited,
+        }
+
+
+breaker = CircuitBreaker(
+    failure_threshold=settings.REDIS_BREAKER_THRESHOLD,
+    reset_timeout=settings.REDIS_BREAKER_RESET_TIMEOUT,
+)
+metrics.registry.gauge_callback(
+    "redis_circuit_open", "1 while the Redis circuit breaker skips calls.", lambda: int(breaker.state == "open")
+)
+
+
+def _create_client() -> Redis:
+    pool = BlockingConnectionPool.from_url(
+        settings.REDIS_URL or "redis://localhost:6379/0",
+        max_connections=settings.REDIS_MAX_CONNECTIONS,
+        timeout=settings.REDIS_POOL_TIMEOUT,
+        socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+        socket_connect_timeout=settings.REDIS_CONNECT_TIMEOUT,
+        health_check_interval=settings.REDIS_HEALTH_CHECK_INTERVAL,
+    )
+    return Redis.from_pool(pool)
+
+
+def create_pubsub_client() -> Redis:
     """
-    Ініціалізує та повертає клієнт Redis.
-    Якщо змінна REDIS_URL не задана, використовується значення за замовчуванням.
+    Створює окремий клієнт для підписок pub/sub, без ``socket_timeout``
+    пулу: очікування повідомлення — це блокуюче читання, яке не повинно
+    обриватися тайм-аутом, коли в каналі довго тихо. Зв'язок перевіряється
+    через ``health_check_interval``.
+    """
+    return Redis.from_url(
+        settings.REDIS_URL or "redis://localhost:6379/0",
+        socket_timeout=None,
+        socket_connect_timeout=settings.REDIS_CONNECT_TIMEOUT,
+        health_check_interval=settings.REDIS_HEALTH_CHECK_INTERVAL,
+    )
+
+
+async def open_redis() -> Redis:
+    """
+    Створює клієнт Redis з пулом з'єднань за налаштуваннями ``REDIS_*``.
+    Викликається при старті застосунку.
     """
     global redis_client
     if redis_client is None:
-        redis_url = os.getenv("REDIS_URL", "redis://localhost:6379/0")
-        redis_client = Redis.from_url(redis_url)
+        redis_client = _create_client()
     return redis_client
 
-async def get_cached_user(email: str) -> dict | None:
+
+async def close_redis() -> None:
     """
-    Отримує дані користувача з кешу за ключем, сформованим на основі email.
+    Закриває клієнт і всі з'єднання пулу. Викликається при зупинці застосунку.
     """
-    client = await init_redis()
-    data = await client.get(f"user:{email}")
-    if data:
-        return json.loads(data)
-    return None
+    global redis_client
+    client, redis_client = redis_client, None
+    if client is not None:
+        await client.aclose()
 
-async def set_cached_user(email: str, user_data: dict, expire: int = 300) -> None:
+
+async def init_redis() -> Redis:
     """
-    Зберігає дані користувача у кеші з часом життя expire (за замовчуванням 5 хвилин).
+    Повертає клієнт Redis, створюючи його, якщо застосунок ще не відкрив
+    клієнт (скрипти, тести без lifespan).
     """
-    client = await init_redis()
-    await client.setex(f"user:{email}", expire, json.dumps(user_data))
+    return await open_redis()
+
+
+async def redis_call(operation: Callable[[Redis], Awaitable[T]], default: T = None) -> T:
+    """
+    Виконує операцію з Redis через запобіжник.
+
+    Помилки Redis не доходять до запиту: операція пропускається і
+    повертається ``default``, як і тоді, коли запобіжник розімкнений.
+
+    :param operation: Корутинна функція, що отримує клієнт Redis.
+    :param default: Значення, яке повертається, якщо Redis недоступний.
+    :return: Результат операції або ``default``.
+    """
+    if not breaker.allow():
+        metrics.redis_calls_skipped.inc()
+        return default
+    started = time.perf_counter()
+    try:
+        result = await operation(await init_redis())
+    except (RedisError, OSError, asyncio.TimeoutError) as exc:
+        metrics.record_redis_call(time.perf_counter() - started, "error")
+        breaker.record_failure()
+        logger.warning("Redis call failed (circuit %s): %s", breaker.state, exc)
+        return default
+    metrics.record_redis_call(time.perf_counter() - started, "ok")
+    breaker.record_success()
+    return result
+
+
+async def get_many(keys: list[str]) -> list[Optional[bytes]]:
+    """
+    Читає кілька ключів одним ``MGET``. Відсутні ключі (і всі ключі, якщо
+    Redis недоступний) повертаються як None.
+    """
+    if not keys:
+        return []
+    values = await redis_call(lambda client: client.mget(keys))
+    return values if values is not None else [None] * len(keys)
+
+
+async def set_many(values: dict[str, Any], expire: int) -> None:
+    """
+    Записує кілька ключів з часом життя за один round-trip.
+
+    ``MSET`` не вміє задавати TTL, тому це конвеєр команд ``SET ... EX``.
+    """
+    if not values:
+        return
+
+    async def write(client: Redis) -> None:
+        async with client.pipeline(transaction=False) as pipe:
+            for key, value in values.items():
+                pipe.set(key, value, ex=expire)
+            await pipe.execute()
+
+    await redis_call(write)
+
+
+def redis_stats() -> dict:
+    """
+    Стан запобіжника і пулу з'єднань для ``/admin/stats``.
+    """
+    pool = getattr(redis_client, "connection_pool", None)
+    return {
+        "breaker": breaker.stats(),
+        "pool_in_use": len(getattr(pool, "_in_use_connections", ())),
+        "pool_max": getattr(pool, "max_connections", None),
+    }
+
+
+async def get_cached_user(email: str) -> UserSnapshot | None:
+    """
+    Отримує знімок користувача з кешу за ключем, сформованим на основі email.
+    """
+    return (await get_cached_users([email]))[email]
+
+async def get_cached_users(emails: list[str]) -> dict[str, UserSnapshot | None]:
+    """
+    Отримує знімки кількох користувачів одним ``MGET``.
+    """
+    values = await get_many([_user_key(email) for email in emails])
+    hits = sum(1 for data in values if data)
+    metrics.cache_requests.inc(hits, cache="user", result="hit")
+    metrics.cache_requests.inc(len(values) - hits, cache="user", result="miss")
+    return {
+        email: UserSnapshot(**json.loads(data)) if data else None
+        for email, data in zip(emails, values)
+    }
+
+async def set_cached_user(user: UserSnapshot, expire: int = USER_CACHE_TTL) -> None:
+    """
+    Зберігає знімок користувача у кеші з часом життя expire (за замовчуванням 5 хвилин).
+    """
+    await set_cached_users([user], expire)
+
+async def set_cached_users(users: list[UserSnapshot], expire: int = USER_CACHE_TTL) -> None:
+    """
+    Зберігає знімки кількох користувачів за один round-trip.
+    """
+    await set_many({_user_key(user.email): json.dumps(user.to_dict()) for user in users}, expire)
+
+async def delete_cached_user(email: str) -> None:
+    """
+    Видаляє дані користувача з кешу, щоб наступний запит прочитав їх з бази.
+    """
+    _inflight.pop(email, None)
+    await redis_call(lambda client: client.delete(_user_key(email)))
+
+async def load_user(email: str, loader: Callable[[], Awaitable[Optional[UserSnapshot]]]) -> UserSnapshot | None:
+    """
+    Повертає користувача з кешу, а при промаху завантажує його через loader і кешує.
+
+    Одночасні промахи для одного email у межах процесу чекають на одне
+    завантаження замість того, щоб кожен робив власний запит до БД.
+    """
+    cached = await get_cached_user(email)
+    if cached is not None:
+        return cached
+
+    pending = _inflight.get(email)
+    if pending is not None:
+        return await asyncio.shield(pending)
+
+    future = asyncio.get_running_loop().create_future()
+    _inflight[email] = future
+    try:
+        user = await loader()
+        if user is not None and _inflight.get(email) is future:
+            await set_cached_user(user)
+        future.set_result(user)
+        return user
+    except BaseException as exc:
+        future.set_exception(exc)
+        future.exception()  # позначаємо як оброблену, якщо ніхто не чекав
+        raise
+    finally:
+        if _inflight.get(email) is future:
+            del _inflight[email]
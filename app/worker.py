@@ -0,0 +1,43 @@
+"""
+Background worker process: runs queued jobs and delivers queued email.
+
+Use it with ``JOBS_BACKEND=redis`` and ``EMAIL_QUEUE=redis`` so the work
+reaches it through Redis; set ``JOBS_RUN_IN_API=false`` on the API to leave
+that work to this process. Stops gracefully on SIGINT / SIGTERM::
+
+    python -m app.worker
+"""
+import asyncio
+import logging
+import signal
+
+from app.config import settings
+from app.services import avatar  # noqa: F401  (registers the store_avatar job)
+from app.services.email_queue import email_outbox
+from app.services.jobs import job_runner
+from app.services.redis_cache import close_redis, open_redis
+
+logger = logging.getLogger(__name__)
+
+
+async def main() -> None:
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    await open_redis()
+    job_runner.start()
+    email_outbox.start()
+    logger.info("Worker started: %d job workers, jobs backend %s", job_runner.workers, settings.JOBS_BACKEND)
+    await stop.wait()
+
+    logger.info("Worker stopping")
+    await job_runner.stop(settings.JOBS_DRAIN_TIMEOUT)
+    await email_outbox.stop()
+    await close_redis()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    asyncio.run(main())
@@ -0,0 +1,127 @@
+"""
+Compare the ILIKE baseline of contact search with the indexed search path.
+
+Seeds one owner with N contacts for every size and times both queries on the
+same data. The baseline is the unbounded ILIKE query the endpoint used to run;
+the indexed path returns one ranked page of results. Times are milliseconds. Runs against a throwaway SQLite file by default; pass
+``--database-url`` to benchmark PostgreSQL instead.
+
+Usage::
+
+    python -m benchmarks.bench_search --sizes 10000,100000,1000000
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import tempfile
+import time
+
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+
+from sqlalchemy import insert, or_
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.future import select
+
+from app import crud, models
+from app.database import Base
+
+SYLLABLES = ["an", "bel", "cor", "dan", "el", "fin", "gra", "hal", "ir", "jo",
+             "ka", "lin", "mar", "nor", "os", "pet", "quin", "ros", "sam", "tor"]
+TERMS = ["mar", "linos", "petjo", "example", "qu", "zzz"]
+PAGE_SIZE = 50
+
+
+def _name(rng: random.Random) -> str:
+    return "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))).capitalize()
+
+
+def _contacts(owner_id: int, count: int, seed: int = 42):
+    rng = random.Random(seed)
+    for i in range(count):
+        first, last = _name(rng), _name(rng)
+        yield {
+            "first_name": first,
+            "last_name": last,
+            "email": f"{first.lower()}.{last.lower()}{i}@example.com",
+            "phone": f"+380{i:09d}",
+            "owner_id": owner_id,
+        }
+
+
+async def _seed(engine, count: int) -> int:
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+        result = await conn.execute(
+            insert(models.User).values(email="bench@example.com", password="-").returning(models.User.id)
+        )
+        owner_id = result.scalar_one()
+
+        batch = []
+        for row in _contacts(owner_id, count):
+            batch.append(row)
+            if len(batch) == 10_000:
+                await conn.execute(insert(models.Contact), batch)
+                batch = []
+        if batch:
+            await conn.execute(insert(models.Contact), batch)
+    return owner_id
+
+
+async def _baseline_search(query: str, db: AsyncSession, owner_id: int):
+    result = await db.execute(
+        select(models.Contact).where(
+            models.Contact.owner_id == owner_id,
+            or_(
+                models.Contact.first_name.ilike(f"%{query}%"),
+                models.Contact.last_name.ilike(f"%{query}%"),
+                models.Contact.email.ilike(f"%{query}%")
+            )
+        )
+    )
+    return result.scalars().all()
+
+
+async def _time(fn, repeat: int) -> tuple[float, float]:
+    """Return the median and the worst query time in milliseconds."""
+    timings = []
+    for _ in range(repeat):
+        for term in TERMS:
+            started = time.perf_counter()
+            await fn(term)
+            timings.append(time.perf_counter() - started)
+    return statistics.median(timings) * 1000, max(timings) * 1000
+
+
+async def run(database_url: str, sizes: list[int], repeat: int) -> None:
+    engine = create_async_engine(database_url)
+    print(f"{'contacts':>10} {'ilike p50':>10} {'ilike max':>10} {'index p50':>10} {'index max':>10}")
+    for size in sizes:
+        owner_id = await _seed(engine, size)
+        owner = models.User(id=owner_id)
+        async with AsyncSession(engine, expire_on_commit=False) as db:
+            baseline = await _time(lambda q: _baseline_search(q, db, owner_id), repeat)
+            indexed = await _time(lambda q: crud.search_contacts(q, db, owner, limit=PAGE_SIZE), repeat)
+        print(f"{size:>10} {baseline[0]:>10.2f} {baseline[1]:>10.2f} {indexed[0]:>10.2f} {indexed[1]:>10.2f}")
+    await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10000,100000,1000000", help="Comma-separated contact counts")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs of every search term per size")
+    parser.add_argument("--database-url", default=None, help="Database to benchmark (default: temporary SQLite file)")
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(",")]
+    if args.database_url:
+        asyncio.run(run(args.database_url, sizes, args.repeat))
+        return
+    with tempfile.TemporaryDirectory() as tmp:
+        asyncio.run(run(f"sqlite+aiosqlite:///{tmp}/bench_search.db", sizes, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Per-row CPU cost of turning a page of contacts into a JSON response body.
+
+Compares, on the same page of rows:
+
+- ``orm+stdlib``: ORM objects validated into ``ContactResponse`` and encoded
+  with the stdlib ``json`` module (the classic FastAPI path).
+- ``orm+pydantic``: ORM objects validated and encoded by Pydantic's
+  ``dump_json`` (FastAPI's path when an endpoint returns data for its
+  ``response_model``).
+- ``columns+fast``: response columns only, read as mappings and encoded by
+  ``FastJSONResponse`` (orjson when installed), which the list endpoints use.
+
+Every path includes the query, so the numbers are what a request pays per
+row. All three bodies are checked to decode to the same JSON. Times are CPU
+microseconds per row (``time.process_time``, median of ``--repeat`` runs).
+
+Usage::
+
+    python -m benchmarks.bench_serialization --rows 100,1000,10000
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import date, timedelta
+from typing import List
+
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+
+from pydantic import TypeAdapter
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app import crud, models, schemas
+from app.database import Base
+from app.responses import FastJSONResponse, orjson
+
+CONTACT_LIST = TypeAdapter(List[schemas.ContactResponse])
+
+
+async def _seed(engine, count: int, seed: int = 11) -> models.User:
+    rng = random.Random(seed)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+        result = await conn.execute(
+            insert(models.User).values(email="bench@example.com", password="-").returning(models.User.id)
+        )
+        owner_id = result.scalar_one()
+        rows = []
+        for i in range(count):
+            birthday = date(1970, 1, 1) + timedelta(days=rng.randrange(365 * 40))
+            rows.append({
+                "first_name": f"First{i}",
+                "last_name": f"Last{rng.randrange(1000)}",
+                "email": f"contact{i}@example.com",
+                "phone": f"+380{i:09d}",
+                "birthday": birthday,
+                "birthday_mmdd": models.birthday_mmdd(birthday),
+                "extra_info": "Met at a conference" if i % 3 else None,
+                "owner_id": owner_id,
+            })
+        await conn.execute(insert(models.Contact), rows)
+    return models.User(id=owner_id)
+
+
+async def orm_stdlib(db: AsyncSession, owner: models.User, rows: int) -> bytes:
+    contacts = await crud.get_contacts(db, owner, limit=rows)
+    validated = CONTACT_LIST.validate_python(contacts, from_attributes=True)
+    return json.dumps(CONTACT_LIST.dump_python(validated, mode="json")).encode("utf-8")
+
+
+async def orm_pydantic(db: AsyncSession, owner: models.User, rows: int) -> bytes:
+    contacts = await crud.get_contacts(db, owner, limit=rows)
+    return CONTACT_LIST.dump_json(CONTACT_LIST.validate_python(contacts, from_attributes=True))
+
+
+async def columns_fast(db: AsyncSession, owner: models.User, rows: int) -> bytes:
+    data = await crud._fetch_contact_data(crud._get_contacts_stmt(owner, rows, None), db)
+    return FastJSONResponse(data).body
+
+
+PATHS = {"orm+stdlib": orm_stdlib, "orm+pydantic": orm_pydantic, "columns+fast": columns_fast}
+
+
+async def _cpu_per_row(fn, db: AsyncSession, owner: models.User, rows: int, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        db.expunge_all()
+        started = time.process_time()
+        await fn(db, owner, rows)
+        timings.append(time.process_time() - started)
+    return statistics.median(timings) / rows * 1_000_000
+
+
+async def run(database_url: str, sizes: list[int], repeat: int) -> None:
+    engine = create_async_engine(database_url)
+    owner = await _seed(engine, max(sizes))
+    print(f"JSON backend: {'orjson' if orjson is not None else 'stdlib'}")
+    print(f"{'rows':>8}" + "".join(f"{name:>16}" for name in PATHS) + f"{'speed-up':>10}")
+    async with AsyncSession(engine, expire_on_commit=False) as db:
+        for rows in sizes:
+            bodies = [json.loads(await fn(db, owner, rows)) for fn in PATHS.values()]
+            assert all(body == bodies[0] for body in bodies), "Serialization paths disagree"
+            costs = [await _cpu_per_row(fn, db, owner, rows, repeat) for fn in PATHS.values()]
+            print(f"{rows:>8}" + "".join(f"{cost:>14.2f}us" for cost in costs) + f"{costs[0] / costs[-1]:>9.1f}x")
+    await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", default="100,1000,10000", help="Comma-separated page sizes")
+    parser.add_argument("--repeat", type=int, default=7, help="Runs per path and page size")
+    parser.add_argument("--database-url", default=None, help="Database to benchmark (default: temporary SQLite file)")
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.rows.split(",")]
+    if args.database_url:
+        asyncio.run(run(args.database_url, sizes, args.repeat))
+        return
+    with tempfile.TemporaryDirectory() as tmp:
+        asyncio.run(run(f"sqlite+aiosqlite:///{tmp}/bench_serialization.db", sizes, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Signup -> email verification throughput.
+
+Signs up ``--users`` accounts through the API, takes the verification link
+of each from the queued email, and follows it. Reports throughput and
+p50/p95/p99 latency for:
+
+- ``signup``: user creation plus queueing the verification email. Bound by
+  bcrypt on the hashing pool, so it is far slower than verification.
+- ``verify``: the first visit of each link, one conditional ``UPDATE``.
+- ``verify_again``: a second visit of the same links, which updates nothing
+  and reads the user to answer "already verified".
+
+Runs offline on the same throwaway SQLite database and fakeredis as
+``benchmarks.run``.
+
+Usage::
+
+    python -m benchmarks.bench_verify --users 500 --concurrency 16
+"""
+import argparse
+import asyncio
+import itertools
+from urllib.parse import parse_qs, urlparse
+
+# Imported first: it points the app at a throwaway database before the app loads.
+from benchmarks.run import run_scenario
+
+import fakeredis
+from httpx import ASGITransport, AsyncClient
+
+from app.database import Base, engine
+from app.main import app
+from app.services import redis_cache
+from app.services.email_queue import MemoryEmailQueue, email_outbox
+from app.services.hashing import password_hasher
+
+PASSWORD = "benchmark-password"
+
+
+def _token(body: str) -> str:
+    link = next(word for word in body.split() if "/auth/verify-email" in word)
+    return parse_qs(urlparse(link).query)["token"][0]
+
+
+async def main_async(args) -> dict:
+    redis_cache.redis_client = fakeredis.FakeAsyncRedis()
+    email_outbox.queue = MemoryEmailQueue()
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    numbers = itertools.count()
+
+    async def signup(client: AsyncClient):
+        email = f"signup{next(numbers)}@example.com"
+        return await client.post("/auth/signup", json={"email": email, "password": PASSWORD})
+
+    def verify(queue: list[str]):
+        async def request(client: AsyncClient):
+            return await client.get("/auth/verify-email", params={"token": queue.pop()})
+        return request
+
+    results = {}
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://bench") as client:
+        results["signup"] = await run_scenario(client, signup, args.users, args.concurrency)
+        messages = await email_outbox.queue.pop_batch(args.users)
+        tokens = [_token(message.body) for message in messages]
+        results["verify"] = await run_scenario(client, verify(list(tokens)), len(tokens), args.concurrency)
+        results["verify_again"] = await run_scenario(client, verify(list(tokens)), len(tokens), args.concurrency)
+
+    for name, result in results.items():
+        print(
+            f"{name:<14} {result['rps']:>9.1f} req/s  p50 {result['p50_ms']:>8.2f} ms  "
+            f"p95 {result['p95_ms']:>8.2f} ms  p99 {result['p99_ms']:>8.2f} ms  errors {result['errors']}"
+        )
+    await engine.dispose()
+    password_hasher.shutdown()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=500, help="Accounts to sign up and verify")
+    parser.add_argument("--concurrency", type=int, default=16)
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
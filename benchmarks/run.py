@@ -0,0 +1,245 @@
+"""
+Load test and micro-benchmarks for the Contacts API.
+
+Runs fully offline: the app talks to a throwaway SQLite database through
+aiosqlite and to an in-process fakeredis instead of Redis, and requests go
+through httpx's ASGITransport without a server. Every scenario reports
+throughput and p50/p95/p99 latency; results are written as JSON and can be
+compared with a stored baseline.
+
+Usage::
+
+    python -m benchmarks.run --users 1000 --contacts-per-user 10 --output bench.json
+    python -m benchmarks.run --baseline benchmarks/baseline.json   # exit 1 on regression
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+_tmp_dir = tempfile.TemporaryDirectory()
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{_tmp_dir.name}/bench.db"
+os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+# Measure the app, not the limiter: the load generator is one client.
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+
+import fakeredis
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import insert
+
+from app import models
+from app.auth.security import create_access_token
+from app.database import Base, engine
+from app.main import app
+from app.services import redis_cache
+from app.services.hashing import password_hasher
+
+PASSWORD = "benchmark-password"
+SEARCH_TERMS = ["ann", "mar", "son", "example", "zzz"]
+FIRST_NAMES = ["Anna", "Maria", "Olena", "Taras", "Ivan", "Petro", "Sofia", "Marko", "Iryna", "Andrii"]
+LAST_NAMES = ["Shevchenko", "Kovalenko", "Bondarenko", "Tkachenko", "Melnyk", "Boyko", "Moroz", "Lysenko"]
+
+
+async def seed(users: int, contacts_per_user: int, seed_value: int = 7) -> list[dict]:
+    """
+    Create the schema and insert users and contacts directly, bypassing bcrypt.
+    """
+    rng = random.Random(seed_value)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    password_hash = await password_hasher.hash(PASSWORD)
+    accounts = []
+    async with engine.begin() as conn:
+        for user_index in range(users):
+            email = f"user{user_index}@bench.example.com"
+            result = await conn.execute(
+                insert(models.User)
+                .values(email=email, password=password_hash, is_verified=True)
+                .returning(models.User.id)
+            )
+            user_id = result.scalar_one()
+            rows = []
+            for i in range(contacts_per_user):
+                first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+                birthday = date(1990, 1, 1) + timedelta(days=rng.randrange(365 * 30))
+                rows.append({
+                    "first_name": first,
+                    "last_name": last,
+                    "email": f"{first}.{last}.{user_index}.{i}@example.com".lower(),
+                    "phone": f"+380{rng.randrange(10 ** 9):09d}",
+                    "birthday": birthday,
+                    "birthday_mmdd": models.birthday_mmdd(birthday),
+                    "owner_id": user_id,
+                })
+            if rows:
+                result = await conn.execute(insert(models.Contact).returning(models.Contact.id), rows)
+                contact_ids = result.scalars().all()
+            else:
+                contact_ids = []
+            accounts.append({
+                "email": email,
+                "token": create_access_token({"sub": email}),
+                "contact_ids": contact_ids,
+            })
+    return accounts
+
+
+def scenarios(accounts: list[dict], rng: random.Random) -> dict:
+    """
+    Map scenario names to functions that issue one request with an httpx client.
+    """
+    def auth(account):
+        return {"Authorization": f"Bearer {account['token']}"}
+
+    async def list_contacts(client):
+        account = rng.choice(accounts)
+        return await client.get("/contacts/?limit=100", headers=auth(account))
+
+    async def get_contact(client):
+        account = rng.choice([a for a in accounts if a["contact_ids"]] or accounts)
+        contact_id = rng.choice(account["contact_ids"] or [0])
+        return await client.get(f"/contacts/{contact_id}", headers=auth(account))
+
+    async def search_contacts(client):
+        account = rng.choice(accounts)
+        return await client.get(f"/contacts/search/?query={rng.choice(SEARCH_TERMS)}", headers=auth(account))
+
+    async def upcoming_birthdays(client):
+        account = rng.choice(accounts)
+        return await client.get("/contacts/upcoming-birthdays/?days=30", headers=auth(account))
+
+    async def login(client):
+        account = rng.choice(accounts)
+        return await client.post("/auth/login", json={"email": account["email"], "password": PASSWORD})
+
+    return {
+        "list_contacts": list_contacts,
+        "get_contact": get_contact,
+        "search_contacts": search_contacts,
+        "upcoming_birthdays": upcoming_birthdays,
+        "login": login,
+    }
+
+
+async def run_scenario(client: AsyncClient, request, requests: int, concurrency: int) -> dict:
+    """
+    Issue ``requests`` requests from ``concurrency`` concurrent workers and summarize latencies.
+    """
+    latencies = []
+    errors = 0
+    remaining = requests
+
+    async def worker():
+        nonlocal remaining, errors
+        while remaining > 0:
+            remaining -= 1
+            started = time.perf_counter()
+            response = await request(client)
+            latencies.append(time.perf_counter() - started)
+            if response.status_code >= 400:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    percentiles = statistics.quantiles(latencies, n=100, method="inclusive") if len(latencies) > 1 else latencies * 99
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 2),
+        "p50_ms": round(percentiles[49] * 1000, 3),
+        "p95_ms": round(percentiles[94] * 1000, 3),
+        "p99_ms": round(percentiles[98] * 1000, 3),
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """
+    Return a description of every scenario that regressed beyond ``tolerance``.
+    """
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        if current["p95_ms"] > previous["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {previous['p95_ms']} ms -> {current['p95_ms']} ms")
+        if current["rps"] < previous["rps"] * (1 - tolerance):
+            regressions.append(f"{name}: throughput {previous['rps']} -> {current['rps']} req/s")
+    return regressions
+
+
+async def main_async(args) -> dict:
+    redis_cache.redis_client = fakeredis.FakeAsyncRedis()
+    accounts = await seed(args.users, args.contacts_per_user)
+    rng = random.Random(args.seed)
+    selected = scenarios(accounts, rng)
+    names = args.scenarios.split(",") if args.scenarios else list(selected)
+
+    results = {}
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://bench") as client:
+        for name in names:
+            requests = args.login_requests if name == "login" else args.requests
+            await run_scenario(client, selected[name], min(args.warmup, requests), args.concurrency)
+            results[name] = await run_scenario(client, selected[name], requests, args.concurrency)
+            print(
+                f"{name:<20} {results[name]['rps']:>9.1f} req/s  "
+                f"p50 {results[name]['p50_ms']:>8.2f} ms  p95 {results[name]['p95_ms']:>8.2f} ms  "
+                f"p99 {results[name]['p99_ms']:>8.2f} ms  errors {results[name]['errors']}"
+            )
+    await engine.dispose()
+    password_hasher.shutdown()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--contacts-per-user", type=int, default=10)
+    parser.add_argument("--requests", type=int, default=2000, help="Requests per scenario")
+    parser.add_argument("--login-requests", type=int, default=100, help="Requests for the bcrypt-bound login scenario")
+    parser.add_argument("--warmup", type=int, default=50, help="Unmeasured requests before each scenario")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--scenarios", default=None, help="Comma-separated subset of scenarios to run")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", default=None, help="Write results as JSON to this file")
+    parser.add_argument("--baseline", default=None, help="Compare with a results file from an earlier run")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative regression (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    results = asyncio.run(main_async(args))
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "users": args.users,
+            "contacts_per_user": args.contacts_per_user,
+            "concurrency": args.concurrency,
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Alembic environment.
+
+Run from the command line (``alembic upgrade head``) it connects to
+``settings.DATABASE_URL``. The application runs it at startup through
+``app.database.run_migrations``, which passes its own connection in
+``config.attributes["connection"]``.
+"""
+import asyncio
+from logging.config import fileConfig
+
+from alembic import context
+from sqlalchemy import pool, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.config import settings
+from app.database import Base
+from app import models  # noqa: F401  (registers the tables on Base.metadata)
+
+config = context.config
+target_metadata = Base.metadata
+
+# Arbitrary key of the PostgreSQL advisory lock that serializes migrations
+# when several workers start at once.
+MIGRATION_LOCK_ID = 72_001
+
+
+def include_object(obj, name, type_, reflected, compare_to) -> bool:
+    """
+    Leave the search index (FTS5 tables, trigram indexes) out of autogenerate;
+    it is raw DDL that the models do not describe.
+    """
+    return not (reflected and compare_to is None and (name.startswith("contacts_fts") or name.endswith("_trgm")))
+
+
+def do_run_migrations(connection: Connection) -> None:
+    context.configure(connection=connection, target_metadata=target_metadata, include_object=include_object)
+    with context.begin_transaction():
+        if connection.dialect.name == "postgresql":
+            connection.execute(text("SELECT pg_advisory_xact_lock(:id)"), {"id": MIGRATION_LOCK_ID})
+        context.run_migrations()
+
+
+async def run_async_migrations() -> None:
+    connectable = create_async_engine(settings.DATABASE_URL, poolclass=pool.NullPool)
+    async with connectable.connect() as connection:
+        await connection.run_sync(do_run_migrations)
+    await connectable.dispose()
+
+
+def run_migrations_offline() -> None:
+    context.configure(
+        url=settings.DATABASE_URL,
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+connection = config.attributes.get("connection")
+if connection is not None:
+    do_run_migrations(connection)
+elif context.is_offline_mode():
+    run_migrations_offline()
+else:
+    if config.config_file_name is not None:
+        fileConfig(config.config_file_name)
+    asyncio.run(run_async_migrations())
@@ -0,0 +1,52 @@
+"""Owner-scoped contact indexes.
+
+Every contact query filters on ``owner_id``, so the single-column indexes on
+``id`` (already covered by the primary key) and ``email`` are replaced with
+composite indexes that lead with ``owner_id``. ``(owner_id, email)`` is
+unique: a user cannot have two contacts with the same email. It is a unique
+index rather than a table constraint, so SQLite does not have to rebuild
+the table (and its search triggers) to add it.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 09:30:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, Sequence[str], None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    duplicates = op.get_bind().execute(sa.text(
+        "SELECT owner_id, email, COUNT(*) FROM contacts GROUP BY owner_id, email HAVING COUNT(*) > 1 LIMIT 5"
+    )).all()
+    if duplicates:
+        raise RuntimeError(
+            "Cannot add the unique (owner_id, email) index: some owners have several contacts with the same "
+            f"email, e.g. {duplicates}. Merge or delete the duplicates and run the migration again."
+        )
+
+    op.create_index("ix_contacts_owner_id_id", "contacts", ["owner_id", "id"], if_not_exists=True)
+    op.create_index("ix_contacts_owner_name", "contacts", ["owner_id", "last_name", "first_name"], if_not_exists=True)
+    op.create_index("uq_contacts_owner_email", "contacts", ["owner_id", "email"], unique=True, if_not_exists=True)
+    op.drop_index("ix_contacts_id", table_name="contacts", if_exists=True)
+    op.drop_index("ix_contacts_email", table_name="contacts", if_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index("ix_contacts_email", "contacts", ["email"], if_not_exists=True)
+    op.create_index("ix_contacts_id", "contacts", ["id"], if_not_exists=True)
+    op.drop_index("uq_contacts_owner_email", table_name="contacts")
+    op.drop_index("ix_contacts_owner_name", table_name="contacts")
+    op.drop_index("ix_contacts_owner_id_id", table_name="contacts")
@@ -0,0 +1,55 @@
+"""Contact birthday month-and-day column.
+
+Adds ``contacts.birthday_mmdd`` (``month * 100 + day`` of ``birthday``),
+fills it for existing contacts and indexes it with ``owner_id`` for the
+upcoming-birthdays range scan. Databases that already have the column are
+left as they are.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19 09:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: Union[str, Sequence[str], None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BACKFILL = {
+    "sqlite": (
+        "UPDATE contacts SET birthday_mmdd = "
+        "CAST(strftime('%m', birthday) AS INTEGER) * 100 + CAST(strftime('%d', birthday) AS INTEGER) "
+        "WHERE birthday IS NOT NULL"
+    ),
+    "postgresql": (
+        "UPDATE contacts SET birthday_mmdd = "
+        "CAST(EXTRACT(MONTH FROM birthday) * 100 + EXTRACT(DAY FROM birthday) AS INTEGER) "
+        "WHERE birthday IS NOT NULL"
+    ),
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    columns = {column["name"] for column in sa.inspect(bind).get_columns("contacts")}
+    if "birthday_mmdd" not in columns:
+        op.add_column("contacts", sa.Column("birthday_mmdd", sa.Integer(), nullable=True))
+        op.execute(BACKFILL[bind.dialect.name])
+    op.create_index(
+        "ix_contacts_owner_birthday_mmdd", "contacts", ["owner_id", "birthday_mmdd"], if_not_exists=True
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_contacts_owner_birthday_mmdd", table_name="contacts")
+    with op.batch_alter_table("contacts") as batch_op:
+        batch_op.drop_column("birthday_mmdd")
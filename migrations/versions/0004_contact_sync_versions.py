@@ -0,0 +1,77 @@
+"""Delta sync columns and contact tombstones.
+
+Adds the per-owner change counter ``users.contacts_version``, the per-contact
+``contacts.version`` and ``contacts.updated_at``, and the
+``contact_tombstones`` table of deletions. Existing contacts start at
+version 0, which a full sync returns and an incremental sync has already
+seen. Columns and tables that already exist are left as they are.
+
+SQLite cannot add a column whose default is ``CURRENT_TIMESTAMP``, so there
+``contacts`` is rebuilt with the new columns; the search triggers are
+created by a later revision.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19 09:30:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0004"
+down_revision: Union[str, Sequence[str], None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    user_columns = {column["name"] for column in inspector.get_columns("users")}
+    if "contacts_version" not in user_columns:
+        op.add_column("users", sa.Column("contacts_version", sa.Integer(), server_default="0", nullable=False))
+
+    contact_columns = {column["name"] for column in inspector.get_columns("contacts")}
+    new_columns = [
+        column for column in (
+            sa.Column("version", sa.Integer(), server_default="0", nullable=False),
+            sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        )
+        if column.name not in contact_columns
+    ]
+    if new_columns:
+        recreate = "always" if bind.dialect.name == "sqlite" and "updated_at" not in contact_columns else "auto"
+        with op.batch_alter_table("contacts", recreate=recreate) as batch_op:
+            for column in new_columns:
+                batch_op.add_column(column)
+    op.create_index("ix_contacts_owner_version", "contacts", ["owner_id", "version"], if_not_exists=True)
+
+    op.create_table(
+        "contact_tombstones",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("owner_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("contact_id", sa.Integer(), nullable=False),
+        sa.Column("version", sa.Integer(), nullable=False),
+        sa.Column("deleted_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        if_not_exists=True,
+    )
+    op.create_index(
+        "ix_contact_tombstones_owner_version", "contact_tombstones", ["owner_id", "version"], if_not_exists=True
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("contact_tombstones")
+    op.drop_index("ix_contacts_owner_version", table_name="contacts")
+    with op.batch_alter_table("contacts") as batch_op:
+        batch_op.drop_column("updated_at")
+        batch_op.drop_column("version")
+    with op.batch_alter_table("users") as batch_op:
+        batch_op.drop_column("contacts_version")
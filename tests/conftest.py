@@ -34,3 +34,16 @@ async def test_db():
     finally:
         await session.close()
         await engine.dispose()
+
+
+@pytest.fixture(autouse=True)
+def clear_local_caches():
+    from app.auth.token_cache import token_cache
+    from app.services.contact_cache import contact_cache
+    from app.services.limiter import limiter
+    from app.services.redis_cache import breaker
+    token_cache.clear()
+    contact_cache.clear()
+    limiter.reset_local()
+    breaker.record_success()
+    yield
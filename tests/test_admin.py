@@ -4,7 +4,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.main import app
 from app.database import get_db
-from app.schemas import UserCreate
+from app.schemas import ContactCreate, UserCreate
 from app.auth.security import create_access_token
 from app import crud
 
@@ -36,3 +36,41 @@ async def test_get_users_as_admin(test_db: AsyncSession):
     data = response.json()
     assert isinstance(data, list)
     assert any(user["email"] == "admin@example.com" for user in data)
+
+
+@pytest.mark.asyncio
+async def test_admin_user_listing_filters_counts_and_export(test_db: AsyncSession):
+    app.dependency_overrides[get_db] = lambda: test_db
+    admin = await crud.create_user(UserCreate(email="boss@example.com", password="adminpass"), test_db, is_admin=True)
+    alice = await crud.create_user(UserCreate(email="alice@example.com", password="secret"), test_db)
+    await crud.create_user(UserCreate(email="albert@example.com", password="secret"), test_db)
+    for i in range(3):
+        await crud.create_contact(
+            ContactCreate(first_name=f"C{i}", last_name="Count", email=f"c{i}@example.com", phone="+1"), test_db, alice
+        )
+    await crud.verify_user_email("alice@example.com", test_db)
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': admin.email})}"}
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        first = await ac.get("/admin/users", params={"limit": 2}, headers=headers)
+        rest = await ac.get("/admin/users", params={"limit": 2, "after": first.headers["X-Next-Cursor"]}, headers=headers)
+        prefixed = await ac.get("/admin/users", params={"email_prefix": "al", "is_verified": True}, headers=headers)
+        admins = await ac.get("/admin/users", params={"is_admin": True}, headers=headers)
+        export = await ac.get("/admin/users/export", params={"email_prefix": "al"}, headers=headers)
+
+    assert [user["email"] for user in first.json() + rest.json()] == [
+        "boss@example.com", "alice@example.com", "albert@example.com"
+    ]
+    assert "X-Next-Cursor" not in rest.headers
+    assert prefixed.json() == [
+        {"id": alice.id, "email": "alice@example.com", "is_admin": False, "is_verified": True, "contact_count": 3}
+    ]
+    assert [user["email"] for user in admins.json()] == ["boss@example.com"]
+    assert "password" not in first.text
+    assert export.headers["content-type"].startswith("text/csv")
+    assert export.text.splitlines() == [
+        "id,email,is_admin,is_verified,contact_count",
+        f"{alice.id},alice@example.com,False,True,3",
+        f"{alice.id + 1},albert@example.com,False,False,0",
+    ]
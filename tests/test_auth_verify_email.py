@@ -0,0 +1,51 @@
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import crud
+from app.auth.security import create_access_token
+from app.database import get_db
+from app.main import app
+from app.services import email_queue
+from app.services.email_queue import MemoryEmailQueue
+
+
+@pytest.mark.asyncio
+async def test_signup_then_verify_with_signed_token(test_db: AsyncSession, monkeypatch):
+    app.dependency_overrides[get_db] = lambda: test_db
+    queue = MemoryEmailQueue()
+    monkeypatch.setattr(email_queue.email_outbox, "queue", queue)
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        response = await ac.post("/auth/signup", json={"email": "verify@example.com", "password": "secret"})
+        assert response.status_code == 201
+
+        [message] = await queue.pop_batch(10)
+        link = next(word for word in message.body.split() if "/auth/verify-email" in word)
+        token = parse_qs(urlparse(link).query)["token"][0]
+        assert "verify@example.com" not in link, "The link must carry a signed token, not the email."
+
+        assert (await ac.get("/auth/verify-email", params={"token": token[:-2]})).status_code == 400
+        reset_token = create_access_token({"sub": "verify@example.com", "type": "reset"})
+        assert (await ac.get("/auth/verify-email", params={"token": reset_token})).status_code == 400
+        assert (await ac.get("/users/me", headers={"Authorization": f"Bearer {token}"})).status_code == 401, \
+            "A verification token must not work as an access token."
+
+        event.listen(test_db.bind.sync_engine, "before_cursor_execute", capture)
+        response = await ac.get("/auth/verify-email", params={"token": token})
+        event.remove(test_db.bind.sync_engine, "before_cursor_execute", capture)
+        assert response.json() == {"message": "Email verified successfully"}
+        assert len(statements) == 1 and statements[0].lstrip().upper().startswith("UPDATE USERS")
+
+        response = await ac.get("/auth/verify-email", params={"token": token})
+        assert response.json() == {"message": "Email already verified"}
+
+    assert (await crud.get_user_by_email("verify@example.com", test_db)).is_verified
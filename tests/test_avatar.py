@@ -0,0 +1,71 @@
+import io
+
+import pytest
+from fastapi import HTTPException, UploadFile
+from PIL import Image
+
+from app.services.avatar import LocalAvatarStorage, read_upload, resize_avatar
+
+
+def _png(width: int, height: int) -> bytes:
+    output = io.BytesIO()
+    Image.new("RGB", (width, height), "red").save(output, format="PNG")
+    return output.getvalue()
+
+
+def test_resize_avatar_makes_square_jpeg():
+    avatar = resize_avatar(_png(800, 400), 128)
+    with Image.open(io.BytesIO(avatar)) as image:
+        assert image.format == "JPEG"
+        assert image.size == (128, 128)
+
+
+def test_resize_avatar_rejects_non_images():
+    with pytest.raises(ValueError):
+        resize_avatar(b"not an image", 128)
+
+
+@pytest.mark.asyncio
+async def test_read_upload_enforces_size_limit():
+    data = _png(64, 64)
+    assert await read_upload(UploadFile(io.BytesIO(data)), max_bytes=len(data)) == data
+
+    with pytest.raises(HTTPException) as exc:
+        await read_upload(UploadFile(io.BytesIO(data)), max_bytes=len(data) - 1)
+    assert exc.value.status_code == 413
+
+
+def test_local_avatar_storage_writes_file(tmp_path):
+    storage = LocalAvatarStorage(str(tmp_path), "/media/avatars/")
+    url = storage.save(b"jpeg-bytes", "user_1_avatar")
+
+    assert url.startswith("/media/avatars/user_1_avatar.jpg?v=")
+    assert (tmp_path / "user_1_avatar.jpg").read_bytes() == b"jpeg-bytes"
+
+
+@pytest.mark.asyncio
+async def test_oversized_upload_is_refused_before_the_body_is_read(monkeypatch):
+    from httpx import ASGITransport, AsyncClient
+    from app.main import app
+    from app.services import avatar
+
+    limit = 1024
+    monkeypatch.setattr(avatar, "MULTIPART_OVERHEAD", 0)
+    limited = avatar.AvatarUploadLimitMiddleware(app, path="/users/avatar", max_bytes=limit)
+    sent = []
+
+    async def body():
+        yield b'--b\r\nContent-Disposition: form-data; name="file"; filename="a.png"\r\n\r\n'
+        for _ in range(100):
+            sent.append(1)
+            yield b"x" * 512
+
+    async with AsyncClient(transport=ASGITransport(app=limited), base_url="http://test") as ac:
+        declared = await ac.post("/users/avatar", content=b"x" * (limit + 1),
+                                 headers={"Content-Type": "multipart/form-data; boundary=b"})
+        streamed = await ac.post("/users/avatar", content=body(),
+                                 headers={"Content-Type": "multipart/form-data; boundary=b"})
+
+    assert declared.status_code == 413
+    assert streamed.status_code == 413
+    assert len(sent) < 100, "A body without Content-Length must be cut off at the limit."
@@ -0,0 +1,131 @@
+import asyncio
+
+import fakeredis
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from app import crud, schemas
+from app.auth.security import create_access_token
+from app.database import get_db, get_read_db
+from app.main import app
+from app.services import contact_cache as contact_cache_module, redis_cache
+from app.services.contact_cache import ContactCache
+
+
+@pytest.mark.asyncio
+async def test_read_through_and_owner_invalidation():
+    cache = ContactCache(maxsize=100, ttl=60, redis_ttl=60)
+    await cache.invalidate_owner(1)
+    loads = []
+
+    async def loader():
+        loads.append(1)
+        return [{"id": 1, "first_name": f"v{len(loads)}"}]
+
+    first = await cache.get_or_load(1, "list:100:None", loader)
+    second = await cache.get_or_load(1, "list:100:None", loader)
+    assert first == second
+    assert len(loads) == 1
+    assert cache.stats()["l1_hits"] == 1
+
+    await cache.invalidate_owner(1)
+    third = await cache.get_or_load(1, "list:100:None", loader)
+    assert third[0]["first_name"] == "v2", "A write must drop the owner's cached reads."
+
+
+@pytest.mark.asyncio
+async def test_l1_is_bounded_and_scoped_by_owner():
+    cache = ContactCache(maxsize=2, ttl=60, redis_ttl=60)
+
+    async def loader():
+        return {"id": 1}
+
+    for owner_id in (1, 2, 3):
+        await cache.get_or_load(owner_id, "contact:1", loader)
+
+    assert cache.stats()["l1_size"] == 2
+    cache.drop_local(3)
+    assert cache.stats()["l1_size"] == 1
+
+
+@pytest.mark.asyncio
+async def test_load_racing_with_a_write_in_another_worker_is_not_cached(monkeypatch):
+    pytest.importorskip("lupa")
+    monkeypatch.setattr(redis_cache, "redis_client", fakeredis.FakeAsyncRedis())
+    reader, writer, later = (ContactCache(maxsize=100, ttl=60, redis_ttl=60) for _ in range(3))
+
+    async def stale_loader():
+        # Another worker commits a write and invalidates while this load runs.
+        await writer.invalidate_owner(1)
+        return ["stale"]
+
+    async def fresh_loader():
+        return ["fresh"]
+
+    assert await reader.get_or_load(1, "list", stale_loader) == ["stale"]
+    assert await later.get_or_load(1, "list", fresh_loader) == ["fresh"], "The stale load must not reach L2."
+
+    assert await ContactCache().get_or_load(1, "list", stale_loader) == ["fresh"]
+
+
+@pytest.mark.asyncio
+async def test_cached_endpoints_load_from_the_primary(test_db):
+    class LaggingReplica:
+        async def execute(self, *args, **kwargs):
+            raise AssertionError("Cached reads must not be loaded from the replica.")
+
+    user = await crud.create_user(schemas.UserCreate(email="primary@example.com", password="secret"), test_db)
+    await crud.create_contact(
+        schemas.ContactCreate(first_name="Pri", last_name="Mary", email="pri@example.com", phone="+1"), test_db, user
+    )
+    app.dependency_overrides[get_db] = lambda: test_db
+    app.dependency_overrides[get_read_db] = lambda: LaggingReplica()
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': user.email})}"}
+    try:
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+            listed = await ac.get("/contacts/", headers=headers)
+            birthdays = await ac.get("/contacts/upcoming-birthdays/", headers=headers)
+    finally:
+        app.dependency_overrides.pop(get_read_db)
+    assert [c["email"] for c in listed.json()] == ["pri@example.com"]
+    assert birthdays.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_listener_drops_local_entries_on_invalidation(monkeypatch):
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(redis_cache, "redis_client", fakeredis.FakeAsyncRedis(server=server))
+    monkeypatch.setattr(contact_cache_module, "create_pubsub_client", lambda: fakeredis.FakeAsyncRedis(server=server))
+    cache = ContactCache(maxsize=100, ttl=60, redis_ttl=60)
+    listener = asyncio.create_task(cache.listen())
+    await asyncio.sleep(0.05)
+
+    async def loader():
+        return {"id": 1}
+
+    await cache.get_or_load(1, "contact:1", loader)
+    assert cache.stats()["l1_size"] == 1
+    await ContactCache().invalidate_owner(1)
+    for _ in range(50):
+        if not cache.stats()["l1_size"]:
+            break
+        await asyncio.sleep(0.01)
+    listener.cancel()
+    assert cache.stats()["l1_size"] == 0, "An invalidation from another worker must drop L1 entries."
+
+
+@pytest.mark.asyncio
+async def test_clearing_l1_does_not_revive_loads_that_raced_with_a_write():
+    cache = ContactCache(maxsize=100, ttl=60, redis_ttl=60)
+
+    async def stale_loader():
+        # A local write invalidates, then the listener reconnects and clears L1.
+        await cache.invalidate_owner(1)
+        cache.clear()
+        return ["stale"]
+
+    async def fresh_loader():
+        return ["fresh"]
+
+    assert await cache.get_or_load(1, "list", stale_loader) == ["stale"]
+    assert await cache.get_or_load(1, "list", fresh_loader) == ["fresh"], "The stale load must not reach L1."
@@ -0,0 +1,138 @@
+import csv
+import gzip
+import io
+import json
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from app import crud, schemas
+from app.auth.security import create_access_token
+from app.database import get_db, get_read_db
+from app.main import app
+from app.services import contact_io
+from app.services.contact_io import gzip_stream, iter_csv, iter_ndjson, read_records
+
+
+async def _chunks(data: bytes, size: int = 7):
+    for start in range(0, len(data), size):
+        yield data[start:start + size]
+
+
+@pytest.mark.asyncio
+async def test_read_csv_records_across_chunks():
+    body = (
+        "first_name,last_name,email,phone,birthday,extra_info\r\n"
+        'Ann,Lee,ann@example.com,+1,1990-01-02,"multi\nline"\r\n'
+        "Bob,Ray,bob@example.com,+2,,\r\n"
+        "broken,row\r\n"
+    ).encode()
+
+    records = [record async for record in read_records(_chunks(body), "csv")]
+
+    assert records[0] == (1, {
+        "first_name": "Ann", "last_name": "Lee", "email": "ann@example.com",
+        "phone": "+1", "birthday": "1990-01-02", "extra_info": "multi\nline",
+    })
+    assert records[1][1]["birthday"] is None
+    assert records[2] == (3, "Expected 6 columns, got 2")
+
+
+@pytest.mark.asyncio
+async def test_import_contacts_in_batches_with_error_report(test_db):
+    user = await crud.create_user(schemas.UserCreate(email="bulk@example.com", password="secret"), test_db)
+    lines = [
+        json.dumps({"first_name": f"Bulk{i}", "last_name": "Import", "email": f"bulk{i}@example.com", "phone": "+1"})
+        for i in range(5)
+    ]
+    lines.insert(2, json.dumps({"first_name": "NoEmail", "last_name": "Import", "phone": "+1"}))
+    lines.insert(4, "{not json")
+    body = "\n".join(lines).encode()
+
+    report = await crud.import_contacts(read_records(_chunks(body), "ndjson"), test_db, user, batch_size=2)
+
+    assert report["inserted"] == 5
+    assert report["failed"] == 2
+    assert [error["row"] for error in report["errors"]] == [3, 5]
+    assert "email" in report["errors"][0]["error"]
+    assert len(await crud.get_contacts(test_db, user)) == 5
+
+
+@pytest.mark.asyncio
+async def test_import_skips_duplicate_emails(test_db):
+    user = await crud.create_user(schemas.UserCreate(email="dupes@example.com", password="secret"), test_db)
+    await crud.create_contact(
+        schemas.ContactCreate(first_name="Old", last_name="Dup", email="old@example.com", phone="+1"), test_db, user
+    )
+    lines = [
+        json.dumps({"first_name": "New", "last_name": "Dup", "email": email, "phone": "+1"})
+        for email in ("old@example.com", "new@example.com", "new@example.com", "other@example.com")
+    ]
+    body = "\n".join(lines).encode()
+
+    report = await crud.import_contacts(read_records(_chunks(body), "ndjson"), test_db, user, batch_size=3)
+
+    assert report["inserted"] == 2
+    assert [error["row"] for error in report["errors"]] == [1, 3]
+    assert sorted(c.email for c in await crud.get_contacts(test_db, user)) == [
+        "new@example.com", "old@example.com", "other@example.com"
+    ]
+
+
+@pytest.mark.asyncio
+async def test_import_reports_committed_rows_when_the_body_breaks_off(test_db, monkeypatch):
+    monkeypatch.setattr(contact_io, "MAX_LINE_LENGTH", 200)
+    user = await crud.create_user(schemas.UserCreate(email="broken@example.com", password="secret"), test_db)
+    lines = [
+        json.dumps({"first_name": f"Row{i}", "last_name": "Import", "email": f"row{i}@example.com", "phone": "+1"})
+        for i in range(3)
+    ]
+    body = ("\n".join(lines) + "\n" + "x" * 500).encode()
+
+    report = await crud.import_contacts(read_records(_chunks(body, 64), "ndjson"), test_db, user, batch_size=2)
+
+    assert report["inserted"] == 3
+    assert report["errors"] == [{"row": 4, "error": "Line too long; import stopped"}]
+    assert len(await crud.get_contacts(test_db, user)) == 3
+
+
+@pytest.mark.asyncio
+async def test_export_streams_csv_and_gzipped_ndjson(test_db):
+    user = await crud.create_user(schemas.UserCreate(email="export@example.com", password="secret"), test_db)
+    for i in range(3):
+        contact = schemas.ContactCreate(
+            first_name=f"Export{i}", last_name="Stream", email=f"export{i}@example.com",
+            phone="+1", birthday="1991-02-03" if i == 0 else None,
+        )
+        await crud.create_contact(contact, test_db, user)
+
+    chunks = [chunk async for chunk in iter_csv(crud.stream_contacts(test_db, user), rows_per_chunk=2)]
+    assert chunks[0].startswith("id,first_name"), "The header should be sent before any row."
+    rows = list(csv.DictReader(io.StringIO("".join(chunks))))
+    assert [row["first_name"] for row in rows] == ["Export0", "Export1", "Export2"]
+    assert rows[0]["birthday"] == "1991-02-03"
+    assert rows[1]["birthday"] == ""
+
+    compressed = b"".join([chunk async for chunk in gzip_stream(iter_ndjson(crud.stream_contacts(test_db, user)))])
+    lines = gzip.decompress(compressed).decode().splitlines()
+    assert [json.loads(line)["email"] for line in lines] == [f"export{i}@example.com" for i in range(3)]
+
+
+@pytest.mark.asyncio
+async def test_list_stream_redirects_to_the_ndjson_stream(test_db):
+    user = await crud.create_user(schemas.UserCreate(email="stream@example.com", password="secret"), test_db)
+    await crud.create_contact(
+        schemas.ContactCreate(first_name="Stre", last_name="Am", email="stre@example.com", phone="+1"), test_db, user
+    )
+    app.dependency_overrides[get_db] = lambda: test_db
+    app.dependency_overrides[get_read_db] = lambda: test_db
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': user.email})}"}
+    try:
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+            redirect = await ac.get("/contacts/?stream=true", headers=headers)
+            streamed = await ac.get(redirect.headers["location"], headers=headers)
+    finally:
+        app.dependency_overrides.pop(get_read_db)
+    assert redirect.status_code == 307
+    assert redirect.headers["location"] == "http://test/contacts/stream"
+    assert [json.loads(line)["email"] for line in streamed.text.splitlines()] == ["stre@example.com"]
@@ -10,6 +10,8 @@ from datetime import datetime, timedelta
 # Import necessary components from SQLAlchemy for creating an in-memory test database
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker
+from fastapi import HTTPException
+from pydantic import ValidationError
 
 # Import our CRUD functions, models, and Pydantic schemas from the app
 from app import crud, models, schemas
@@ -159,3 +161,308 @@ async def test_upcoming_birthdays(test_db):
     
     upcoming = await crud.upcoming_birthdays(test_db, user)
     assert len(upcoming) > 0, "There should be at least one contact with an upcoming birthday."
+
+@pytest.mark.asyncio
+async def test_get_contacts_keyset_pagination(test_db):
+    """
+    Test that get_contacts pages through contacts by ID using limit/after,
+    and that stream_contacts yields the same contacts in the same order.
+    """
+    user_data = schemas.UserCreate(email="pages@example.com", password="secret")
+    user = await crud.create_user(user_data, test_db)
+
+    for i in range(5):
+        contact_create = schemas.ContactCreate(
+            first_name=f"Page{i}",
+            last_name="Reader",
+            email=f"page{i}@example.com",
+            phone=f"+10000000{i}",
+        )
+        await crud.create_contact(contact_create, test_db, user)
+
+    first_page = await crud.get_contacts(test_db, user, limit=2)
+    second_page = await crud.get_contacts(test_db, user, limit=2, after=first_page[-1].id)
+    last_page = await crud.get_contacts(test_db, user, limit=2, after=second_page[-1].id)
+
+    paged_ids = [c.id for c in first_page + second_page + last_page]
+    assert len(last_page) == 1, "The last page should contain the remaining contact."
+    assert paged_ids == sorted(paged_ids), "Pages should be ordered by ID without overlaps."
+
+    streamed_ids = [c.id async for c in crud.stream_contacts(test_db, user, batch_size=2)]
+    assert streamed_ids == paged_ids, "Streaming should yield every contact in ID order."
+
+@pytest.mark.asyncio
+async def test_search_index_stays_in_sync(test_db):
+    """
+    Test that the search index follows contact updates and deletions,
+    and that search results are paginated.
+    """
+    user_data = schemas.UserCreate(email="index@example.com", password="secret")
+    user = await crud.create_user(user_data, test_db)
+
+    contacts = []
+    for name in ("Maximilian", "Maxine", "Maxwell"):
+        contact_create = schemas.ContactCreate(
+            first_name=name,
+            last_name="Indexed",
+            email=f"{name.lower()}@example.com",
+            phone="+444444444",
+        )
+        contacts.append(await crud.create_contact(contact_create, test_db, user))
+
+    assert len(await crud.search_contacts("maxi", test_db, user)) == 2
+    assert len(await crud.search_contacts("Max", test_db, user, limit=2)) == 2
+    assert len(await crud.search_contacts("Max", test_db, user, limit=2, offset=2)) == 1
+
+    await crud.update_contact(contacts[0].id, schemas.ContactUpdate(first_name="Renamed", email="renamed@example.com"), test_db, user)
+    results = await crud.search_contacts("maxi", test_db, user)
+    assert [c.first_name for c in results] == ["Maxine"], "Updated names should be re-indexed."
+
+    await crud.delete_contact(contacts[1].id, test_db, user)
+    assert await crud.search_contacts("maxi", test_db, user) == [], "Deleted contacts should leave the index."
+
+@pytest.mark.asyncio
+async def test_upcoming_birthdays_across_month_boundary(test_db):
+    """
+    Test that a window longer than the rest of the month still finds
+    birthdays in the next month, ignores past ones, and orders by date.
+    """
+    user_data = schemas.UserCreate(email="window@example.com", password="secret")
+    user = await crud.create_user(user_data, test_db)
+
+    today = datetime.today().date()
+    birthdays = {
+        "Later": (today + timedelta(days=35)).replace(year=2000),
+        "Sooner": (today + timedelta(days=1)).replace(year=2000),
+        "Past": (today - timedelta(days=10)).replace(year=2000),
+    }
+    for name, birthday in birthdays.items():
+        contact_create = schemas.ContactCreate(
+            first_name=name,
+            last_name="Window",
+            email=f"{name.lower()}@example.com",
+            phone="+555555555",
+            birthday=birthday,
+        )
+        await crud.create_contact(contact_create, test_db, user)
+
+    upcoming = await crud.upcoming_birthdays(test_db, user, days=40)
+    assert [c.first_name for c in upcoming] == ["Sooner", "Later"]
+
+    upcoming = await crud.upcoming_birthdays(test_db, user, days=7)
+    assert [c.first_name for c in upcoming] == ["Sooner"]
+
+@pytest.mark.asyncio
+async def test_update_and_delete_are_scoped_to_owner(test_db):
+    """
+    Test that single-statement update/delete only touch the owner's contacts
+    and that a partial update keeps the other fields and the birthday key.
+    """
+    owner = await crud.create_user(schemas.UserCreate(email="owner@example.com", password="secret"), test_db)
+    other = await crud.create_user(schemas.UserCreate(email="other@example.com", password="secret"), test_db)
+
+    contact_create = schemas.ContactCreate(
+        first_name="Eve",
+        last_name="Owner",
+        email="eve@example.com",
+        phone="+666666666",
+        birthday="1990-05-01",
+    )
+    contact = await crud.create_contact(contact_create, test_db, owner)
+
+    assert await crud.update_contact(contact.id, schemas.ContactUpdate(first_name="Mallory"), test_db, other) is None
+    assert await crud.delete_contact(contact.id, test_db, other) is False
+
+    updated = await crud.update_contact(contact.id, schemas.ContactUpdate(birthday="1990-12-31"), test_db, owner)
+    assert updated.first_name == "Eve"
+    assert updated.birthday_mmdd == 1231
+
+    assert await crud.delete_contact(contact.id, test_db, owner) is True
+    assert await crud.get_contact(contact.id, test_db, owner) is None
+
+@pytest.mark.asyncio
+async def test_batch_operations(test_db):
+    """
+    Test batch get/update/delete: only the owner's contacts are affected and
+    items with different field sets are updated in the same call.
+    """
+    owner = await crud.create_user(schemas.UserCreate(email="batch@example.com", password="secret"), test_db)
+    other = await crud.create_user(schemas.UserCreate(email="batch-other@example.com", password="secret"), test_db)
+
+    ids = []
+    for i in range(3):
+        contact_create = schemas.ContactCreate(
+            first_name=f"Batch{i}", last_name="Sync", email=f"batch{i}@example.com", phone="+777777777"
+        )
+        ids.append((await crud.create_contact(contact_create, test_db, owner)).id)
+    foreign = await crud.create_contact(
+        schemas.ContactCreate(first_name="Foreign", last_name="Sync", email="foreign@example.com", phone="+1"),
+        test_db, other
+    )
+
+    found = await crud.get_contacts_by_ids(ids + [foreign.id], test_db, owner)
+    assert sorted(c.id for c in found) == ids
+
+    items = [
+        schemas.ContactBatchUpdateItem(id=ids[0], first_name="Renamed"),
+        schemas.ContactBatchUpdateItem(id=ids[1], phone="+000", birthday="2000-02-29"),
+        schemas.ContactBatchUpdateItem(id=foreign.id, first_name="Hijacked"),
+    ]
+    updated = await crud.batch_update_contacts(items, test_db, owner)
+    assert set(updated) == {ids[0], ids[1]}
+    assert updated[ids[0]].first_name == "Renamed"
+    assert updated[ids[1]].phone == "+000"
+    assert updated[ids[1]].birthday_mmdd == 229
+    assert (await crud.get_contact(foreign.id, test_db, other)).first_name == "Foreign"
+
+    version = (await crud.get_changes(None, test_db, owner))["version"]
+    foreign_only = [schemas.ContactBatchUpdateItem(id=foreign.id, first_name="Hijacked")]
+    assert await crud.batch_update_contacts(foreign_only, test_db, owner) == {}
+    assert (await crud.get_changes(None, test_db, owner))["version"] == version, "A no-op batch must not use a version."
+
+    deleted = await crud.batch_delete_contacts([ids[0], ids[2], foreign.id], test_db, owner)
+    assert deleted == {ids[0], ids[2]}
+    assert [c.id for c in await crud.get_contacts(test_db, owner)] == [ids[1]]
+
+@pytest.mark.asyncio
+async def test_get_changes_since_version(test_db):
+    """
+    Test delta sync: only contacts written after the token are returned and
+    deletions are reported as tombstones.
+    """
+    owner = await crud.create_user(schemas.UserCreate(email="delta@example.com", password="secret"), test_db)
+    other = await crud.create_user(schemas.UserCreate(email="delta-other@example.com", password="secret"), test_db)
+
+    kept = await crud.create_contact(
+        schemas.ContactCreate(first_name="Kept", last_name="Delta", email="kept@example.com", phone="+1"), test_db, owner
+    )
+    removed = await crud.create_contact(
+        schemas.ContactCreate(first_name="Removed", last_name="Delta", email="removed@example.com", phone="+2"), test_db, owner
+    )
+    await crud.create_contact(
+        schemas.ContactCreate(first_name="Other", last_name="Delta", email="other@example.com", phone="+3"), test_db, other
+    )
+    # A contact from before versions were tracked (version 0).
+    legacy = models.Contact(first_name="Legacy", last_name="Delta", email="legacy@example.com", phone="+4",
+                            owner_id=owner.id, version=0)
+    test_db.add(legacy)
+    await test_db.commit()
+
+    full = await crud.get_changes(None, test_db, owner)
+    assert [c.id for c in full["changed"]] == [legacy.id, kept.id, removed.id]
+    assert full["deleted"] == []
+
+    since = full["version"]
+    nothing = await crud.get_changes(since, test_db, owner)
+    assert nothing["changed"] == [] and nothing["deleted"] == []
+    assert nothing["version"] == since
+
+    assert await crud.delete_contact(removed.id + 100, test_db, owner) is False
+    assert await crud.batch_delete_contacts([removed.id + 100], test_db, owner) == set()
+    assert await crud.update_contact(removed.id + 100, schemas.ContactUpdate(phone="+0"), test_db, owner) is None
+    assert (await crud.get_changes(None, test_db, owner))["version"] == since, "A miss must not use up a version."
+
+    await crud.update_contact(kept.id, schemas.ContactUpdate(phone="+10"), test_db, owner)
+    await crud.delete_contact(removed.id, test_db, owner)
+    assert await crud.update_contact(removed.id, schemas.ContactUpdate(phone="+20"), test_db, owner) is None
+
+    delta = await crud.get_changes(since, test_db, owner)
+    assert [(c.id, c.phone) for c in delta["changed"]] == [(kept.id, "+10")]
+    assert delta["deleted"] == [removed.id]
+    assert delta["version"] > since
+
+    assert await crud.get_changes(delta["version"] + 1, test_db, owner) is None
+
+@pytest.mark.asyncio
+async def test_get_changes_pages_a_full_sync(test_db):
+    """
+    Test that a full sync is returned in pages of at most ``limit`` contacts
+    and that writes between pages are reported by a later page.
+    """
+    owner = await crud.create_user(schemas.UserCreate(email="pages@example.com", password="secret"), test_db)
+    ids = []
+    for i in range(5):
+        contact = schemas.ContactCreate(first_name=f"Page{i}", last_name="Sync", email=f"page{i}@example.com", phone="+1")
+        ids.append((await crud.create_contact(contact, test_db, owner)).id)
+
+    first = await crud.get_changes(None, test_db, owner, limit=2)
+    assert [c.id for c in first["changed"]] == ids[:2]
+    assert first["after"] == ids[1]
+
+    await crud.delete_contact(ids[0], test_db, owner)
+    await crud.update_contact(ids[1], schemas.ContactUpdate(phone="+2"), test_db, owner)
+
+    seen, deleted, page = [], [], first
+    while page["after"] is not None:
+        page = await crud.get_changes(page["version"], test_db, owner, limit=2, after=page["after"])
+        assert len(page["changed"]) <= 2
+        seen += [c.id for c in page["changed"]]
+        deleted += page["deleted"]
+    assert seen == ids[2:] + [ids[1]]
+    assert deleted == [ids[0]]
+
+    done = await crud.get_changes(page["version"], test_db, owner, limit=2)
+    assert done["changed"] == [] and done["deleted"] == [] and done["after"] is None
+
+@pytest.mark.asyncio
+async def test_search_contacts_data_matches_response_schema(test_db):
+    """
+    Test that the column-only read used by the fast JSON endpoints returns
+    exactly what ContactResponse would serialize for the same contacts.
+    """
+    user = await crud.create_user(schemas.UserCreate(email="data@example.com", password="secret"), test_db)
+    await crud.create_contact(
+        schemas.ContactCreate(first_name="Dana", last_name="Data", email="dana@example.com",
+                              phone="+1", birthday="1990-02-03", extra_info="Friend"), test_db, user
+    )
+    await crud.create_contact(
+        schemas.ContactCreate(first_name="Dan", last_name="Data", email="dan@example.com", phone="+2"), test_db, user
+    )
+
+    contacts = await crud.search_contacts("Data", test_db, user)
+    data = await crud.search_contacts_data("Data", test_db, user)
+
+    assert data == [schemas.ContactResponse.model_validate(c).model_dump(mode="json") for c in contacts]
+
+@pytest.mark.asyncio
+async def test_contact_email_is_unique_per_owner(test_db):
+    """
+    Test that an owner cannot have two contacts with the same email, while
+    different owners can.
+    """
+    owner = await crud.create_user(schemas.UserCreate(email="uniq@example.com", password="secret"), test_db)
+    other = await crud.create_user(schemas.UserCreate(email="uniq2@example.com", password="secret"), test_db)
+    owner_id = owner.id
+    contact = schemas.ContactCreate(first_name="Una", last_name="Unique", email="una@example.com", phone="+1")
+    await crud.create_contact(contact, test_db, owner)
+    await crud.create_contact(contact, test_db, other)
+
+    with pytest.raises(HTTPException) as exc_info:
+        await crud.create_contact(contact, test_db, owner)
+    assert exc_info.value.status_code == 409
+
+    owner = await test_db.get(models.User, owner_id)
+    second = await crud.create_contact(
+        schemas.ContactCreate(first_name="Una", last_name="Second", email="una2@example.com", phone="+2"), test_db, owner
+    )
+    with pytest.raises(HTTPException) as exc_info:
+        await crud.update_contact(second.id, schemas.ContactUpdate(email="una@example.com"), test_db, owner)
+    assert exc_info.value.status_code == 409
+
+    with pytest.raises(ValidationError):
+        schemas.ContactUpdate(first_name=None)
+    assert schemas.ContactUpdate(extra_info=None).model_dump(exclude_unset=True) == {"extra_info": None}
+
+@pytest.mark.asyncio
+async def test_list_users_email_prefix_is_an_exact_case_sensitive_prefix(test_db):
+    """
+    Test that the email prefix filter matches "starts with" exactly, without
+    case folding or LIKE wildcards.
+    """
+    for email in ["Alice@example.com", "alice@example.com", "a.lice@example.com", "al_x@example.com", "alx@example.com"]:
+        await crud.create_user(schemas.UserCreate(email=email, password="secret"), test_db)
+
+    assert [u["email"] for u in await crud.list_users(test_db, email_prefix="al")] == [
+        "alice@example.com", "al_x@example.com", "alx@example.com"
+    ]
+    assert [u["email"] for u in await crud.list_users(test_db, email_prefix="al_")] == ["al_x@example.com"]
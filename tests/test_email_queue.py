@@ -0,0 +1,113 @@
+import fakeredis
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from app.database import get_db
+from app.main import app
+from app.services import email_queue, redis_cache
+from app.services.email_queue import (
+    EmailDeliveryError, EmailOutbox, MemoryEmailQueue, MemoryTransport, OutboundEmail, RedisEmailQueue
+)
+
+
+class FlakyTransport(MemoryTransport):
+    """
+    Fails the first ``failures`` deliveries of every message.
+    """
+
+    def __init__(self, failures: int, permanent: bool = False):
+        super().__init__()
+        self.failures = failures
+        self.permanent = permanent
+        self.attempts: dict[str, int] = {}
+
+    async def send_batch(self, messages):
+        results = []
+        for message in messages:
+            self.attempts[message.id] = self.attempts.get(message.id, 0) + 1
+            if self.attempts[message.id] <= self.failures:
+                results.append(EmailDeliveryError("450 try later", permanent=self.permanent))
+            else:
+                self.sent.append(message)
+                results.append(None)
+        return results
+
+
+@pytest.mark.asyncio
+async def test_queued_emails_are_delivered_in_batches():
+    transport = MemoryTransport()
+    outbox = EmailOutbox(MemoryEmailQueue(), transport, batch_size=2)
+    for i in range(3):
+        await outbox.enqueue(f"user{i}@example.com", "Hello", "Body")
+
+    assert transport.sent == [], "Enqueue must not deliver."
+    assert await outbox.process_batch() == 2
+    assert await outbox.process_batch() == 1
+    assert await outbox.process_batch() == 0
+    assert [message.to for message in transport.sent] == [f"user{i}@example.com" for i in range(3)]
+    assert transport.batches == 2
+
+
+@pytest.mark.asyncio
+async def test_failed_emails_back_off_then_go_to_dead_letters():
+    queue = MemoryEmailQueue()
+    outbox = EmailOutbox(queue, FlakyTransport(failures=5), max_attempts=3, retry_base=0)
+    await outbox.enqueue("flaky@example.com", "Hello", "Body")
+
+    for _ in range(3):
+        await outbox.process_batch()
+
+    assert outbox.retried == 2 and outbox.dead == 1
+    assert queue.dead[0].attempts == 3 and "try later" in queue.dead[0].last_error
+    assert [outbox.retry_delay(n) for n in (1, 2, 3)] == [0, 0, 0]
+    assert [EmailOutbox(queue, None, retry_base=30, retry_max=100).retry_delay(n) for n in (1, 2, 3)] == [30, 60, 100]
+
+    permanent = EmailOutbox(MemoryEmailQueue(), FlakyTransport(failures=1, permanent=True))
+    await permanent.enqueue("bounce@example.com", "Hello", "Body")
+    await permanent.process_batch()
+    assert permanent.dead == 1 and permanent.retried == 0
+
+
+@pytest.mark.asyncio
+async def test_redis_queue_keeps_taken_messages_until_acknowledged(monkeypatch):
+    pytest.importorskip("lupa")
+    client = fakeredis.FakeAsyncRedis()
+    monkeypatch.setattr(redis_cache, "redis_client", client)
+    queue = RedisEmailQueue(prefix="test-email")
+    for to in ("a@example.com", "b@example.com"):
+        await queue.push(OutboundEmail(to=to, subject="Hi", body="Body"))
+
+    taken = await queue.pop_batch(10)
+    assert [message.to for message in taken] == ["a@example.com", "b@example.com"]
+    assert await client.llen(queue.processing_key) == 2
+
+    await queue.ack(taken[:1])
+    await queue.retry(taken[1], 0)
+    assert await client.llen(queue.processing_key) == 0
+    retried = await queue.pop_batch(10)
+    assert [message.to for message in retried] == ["b@example.com"]
+
+    # Another worker starting up leaves the messages of a live worker alone...
+    await RedisEmailQueue(prefix="test-email").recover()
+    assert await client.llen(queue.queue_key) == 0
+    # ...and re-queues them once the worker stopped heartbeating.
+    await RedisEmailQueue(prefix="test-email", worker_timeout=0).recover()
+    assert [message.to for message in await queue.pop_batch(10)] == ["b@example.com"]
+
+
+@pytest.mark.asyncio
+async def test_signup_only_enqueues_the_verification_email(test_db, monkeypatch):
+    app.dependency_overrides[get_db] = lambda: test_db
+    transport = MemoryTransport()
+    queue = MemoryEmailQueue()
+    monkeypatch.setattr(email_queue.email_outbox, "queue", queue)
+    monkeypatch.setattr(email_queue.email_outbox, "transport", transport)
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        response = await ac.post("/auth/signup", json={"email": "queued@example.com", "password": "secret"})
+
+    assert response.status_code == 201
+    assert transport.sent == []
+    [message] = await queue.pop_batch(10)
+    assert message.to == "queued@example.com"
+    assert "/auth/verify-email?token=" in message.body
@@ -0,0 +1,34 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from app.services.hashing import PasswordHasher
+
+
+@pytest.mark.asyncio
+async def test_hash_and_verify_off_the_event_loop():
+    hasher = PasswordHasher(max_workers=1, max_pending=4)
+    try:
+        hashed = await hasher.hash("secret")
+        assert await hasher.verify("secret", hashed)
+        assert not await hasher.verify("wrong", hashed)
+        assert hasher.stats()["calls"] == 3
+        assert hasher.stats()["pending"] == 0
+    finally:
+        hasher.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_hasher_rejects_when_queue_is_full():
+    hasher = PasswordHasher(max_workers=1, max_pending=1)
+    try:
+        results = await asyncio.gather(
+            hasher.hash("first"), hasher.hash("second"), return_exceptions=True
+        )
+        assert isinstance(results[0], str)
+        assert isinstance(results[1], HTTPException)
+        assert results[1].status_code == 503
+        assert hasher.stats()["rejected"] == 1
+    finally:
+        hasher.shutdown()
@@ -0,0 +1,117 @@
+import asyncio
+import time
+
+import fakeredis
+import pytest
+from fastapi import HTTPException
+
+from app.services import redis_cache
+from app.services.jobs import PRIORITY_HIGH, PRIORITY_LOW, Job, JobRunner, dump_job
+
+
+@pytest.mark.asyncio
+async def test_jobs_run_by_priority_and_drain_on_stop():
+    runner = JobRunner(workers=1, max_queue=3)
+    release = asyncio.Event()
+    done = []
+
+    @runner.job()
+    async def blocker():
+        await release.wait()
+
+    @runner.job()
+    async def record(label):
+        done.append(label)
+
+    @runner.job()
+    async def broken():
+        raise RuntimeError("boom")
+
+    runner.start()
+    await runner.submit("blocker")
+    await asyncio.sleep(0)
+    await runner.submit("record", "low", priority=PRIORITY_LOW)
+    await runner.submit("record", "normal")
+    await runner.submit("record", "high", priority=PRIORITY_HIGH)
+    with pytest.raises(HTTPException) as exc_info:
+        await runner.submit("record", "overflow")
+    assert exc_info.value.status_code == 503
+
+    release.set()
+    await asyncio.sleep(0)
+    await runner.submit("broken")
+    await runner.stop(timeout=1)
+
+    assert done == ["high", "normal", "low"]
+    assert (runner.completed, runner.failed, runner.rejected) == (4, 1, 1)
+
+
+@pytest.mark.asyncio
+async def test_jobs_run_inline_without_workers():
+    runner = JobRunner()
+    done = []
+
+    @runner.job("append")
+    async def append(value):
+        done.append(value)
+
+    await runner.submit("append", 1)
+    assert done == [1]
+
+
+@pytest.mark.asyncio
+async def test_redis_jobs_survive_until_a_worker_runs_them(monkeypatch):
+    pytest.importorskip("lupa")
+    client = fakeredis.FakeAsyncRedis()
+    monkeypatch.setattr(redis_cache, "redis_client", client)
+    runner = JobRunner(workers=2, redis_prefix="test-jobs", poll_interval=0.01)
+    done = []
+
+    @runner.job()
+    async def store(data):
+        done.append(data)
+
+    # Submitted by an API process without workers: kept in Redis.
+    await runner.submit("store", b"\x00avatar")
+    # Left in processing by a worker that died mid-job, and taken by one that is still running it.
+    orphan = Job(name="store", args=[b"orphan"], kwargs={})
+    busy = Job(name="store", args=[b"busy"], kwargs={})
+    await client.hset(f"{runner.processing_prefix}dead", dump_job(orphan), orphan.score)
+    await client.hset(f"{runner.processing_prefix}live", dump_job(busy), busy.score)
+    await client.zadd(runner.workers_key, {"dead": time.time() - 120, "live": time.time()})
+    assert done == [] and await client.zcard(runner.queue_key) == 1
+
+    runner.start()
+    for _ in range(100):
+        if len(done) == 2:
+            break
+        await asyncio.sleep(0.01)
+    await runner.stop(timeout=1)
+
+    assert sorted(done) == [b"\x00avatar", b"orphan"]
+    assert await client.zcard(runner.queue_key) == 0
+    assert await client.hlen(runner.processing_key) == 0
+    assert await client.hlen(f"{runner.processing_prefix}live") == 1, "A live worker's job must not be re-queued."
+    assert await client.zrange(runner.workers_key, 0, -1) == [b"live"]
+
+
+@pytest.mark.asyncio
+async def test_redis_job_cut_off_by_shutdown_stays_in_processing(monkeypatch):
+    pytest.importorskip("lupa")
+    client = fakeredis.FakeAsyncRedis()
+    monkeypatch.setattr(redis_cache, "redis_client", client)
+    runner = JobRunner(workers=1, redis_prefix="test-jobs-stop", poll_interval=0.01)
+    started = asyncio.Event()
+
+    @runner.job()
+    async def slow():
+        started.set()
+        await asyncio.sleep(60)
+
+    await runner.submit("slow")
+    runner.start()
+    await asyncio.wait_for(started.wait(), 1)
+    await runner.stop(timeout=0.05)
+
+    assert await client.hlen(runner.processing_key) == 1, "An unfinished job must be re-queued later, not dropped."
+    assert await client.zrange(runner.workers_key, 0, -1) == [runner.worker_id.encode()]
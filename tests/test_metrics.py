@@ -0,0 +1,51 @@
+import pytest
+from fastapi import Depends, FastAPI
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.services.metrics import MetricsMiddleware, Registry, http_request_duration, instrument_engine
+
+
+def test_registry_renders_prometheus_text():
+    registry = Registry()
+    requests = registry.counter("requests_total", "Requests.", ("route",))
+    latency = registry.histogram("latency_seconds", "Latency.", buckets=(0.1, 1))
+    requests.inc(route="/a")
+    requests.inc(2, route="/a")
+    latency.observe(0.05)
+    latency.observe(0.5)
+
+    output = registry.render()
+
+    assert "# TYPE requests_total counter" in output
+    assert 'requests_total{route="/a"} 3' in output
+    assert 'latency_seconds_bucket{le="0.1"} 1' in output
+    assert 'latency_seconds_bucket{le="+Inf"} 2' in output
+    assert "latency_seconds_count 2" in output
+
+
+@pytest.mark.asyncio
+async def test_middleware_times_route_and_db_queries(test_db):
+    instrument_engine(test_db.bind, "test")
+    app = FastAPI()
+
+    async def get_session():
+        yield test_db
+
+    @app.get("/items/{item_id}")
+    async def read_item(item_id: int, db: AsyncSession = Depends(get_session)):
+        await db.execute(text("SELECT 1"))
+        await db.execute(text("SELECT 2"))
+        return {"id": item_id}
+
+    before = http_request_duration.count(method="GET", route="/items/{item_id}", status=200)
+    transport = ASGITransport(app=MetricsMiddleware(app, server_timing=True))
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        response = await ac.get("/items/42")
+
+    assert response.status_code == 200
+    assert 'db;dur=' in response.headers["server-timing"]
+    assert '"2 queries"' in response.headers["server-timing"]
+    assert http_request_duration.count(method="GET", route="/items/{item_id}", status=200) == before + 1, \
+        "Requests must be labelled with the route template, not the raw path."
@@ -0,0 +1,126 @@
+import re
+
+import pytest
+from alembic.autogenerate import compare_metadata
+from alembic.migration import MigrationContext
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app import crud, models, schemas
+from app.database import Base, run_migrations
+
+# Full scans of a real table; scans of the FTS virtual table are index lookups.
+FULL_SCAN = re.compile(r"\bSCAN (users|contacts|contact_tombstones)\b")
+
+# What Base.metadata.create_all built on SQLite in the first release.
+BASELINE_DDL = [
+    """
+    CREATE TABLE users (
+        id INTEGER NOT NULL, email VARCHAR NOT NULL, password VARCHAR NOT NULL,
+        is_verified BOOLEAN, avatar_url VARCHAR, is_admin BOOLEAN, PRIMARY KEY (id)
+    )
+    """,
+    "CREATE INDEX ix_users_id ON users (id)",
+    "CREATE UNIQUE INDEX ix_users_email ON users (email)",
+    """
+    CREATE TABLE contacts (
+        id INTEGER NOT NULL, first_name VARCHAR NOT NULL, last_name VARCHAR NOT NULL,
+        email VARCHAR NOT NULL, phone VARCHAR NOT NULL, birthday DATE, extra_info VARCHAR,
+        owner_id INTEGER, PRIMARY KEY (id), FOREIGN KEY(owner_id) REFERENCES users (id)
+    )
+    """,
+    "CREATE INDEX ix_contacts_id ON contacts (id)",
+    "CREATE INDEX ix_contacts_email ON contacts (email)",
+]
+
+
+def _schema_diff(connection):
+    def include_object(obj, name, type_, reflected, compare_to):
+        return not (reflected and compare_to is None and name.startswith("contacts_fts"))
+
+    context = MigrationContext.configure(connection, opts={"include_object": include_object})
+    return compare_metadata(context, Base.metadata)
+
+
+@pytest.mark.asyncio
+async def test_migrations_build_the_model_schema(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/migrated.db")
+    await run_migrations(engine)
+    await run_migrations(engine)
+
+    async with engine.connect() as conn:
+        assert await conn.run_sync(_schema_diff) == [], "Models changed without a migration."
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_migrations_upgrade_a_first_release_database(tmp_path):
+    """
+    A database created by ``create_all`` in the first release, with data,
+    is upgraded to the current schema and its contacts are backfilled.
+    """
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/legacy.db")
+    async with engine.begin() as conn:
+        for statement in BASELINE_DDL:
+            await conn.execute(text(statement))
+        await conn.execute(text("INSERT INTO users (id, email, password) VALUES (1, 'old@example.com', '-')"))
+        await conn.execute(text(
+            "INSERT INTO contacts (first_name, last_name, email, phone, birthday, owner_id) "
+            "VALUES ('Olga', 'Legacy', 'olga@example.com', '+1', '1990-05-06', 1)"
+        ))
+
+    await run_migrations(engine)
+
+    async with engine.connect() as conn:
+        assert await conn.run_sync(_schema_diff) == []
+    async with AsyncSession(engine, expire_on_commit=False) as db:
+        user = await crud.get_user_by_email("old@example.com", db)
+        [contact] = await crud.search_contacts("legac", db, user)
+        assert contact.birthday_mmdd == 506 and contact.version == 0 and contact.updated_at is not None
+        assert [c.id for c in (await crud.get_changes(None, db, user))["changed"]] == [contact.id]
+        created = await crud.create_contact(
+            schemas.ContactCreate(first_name="New", last_name="Contact", email="new@example.com", phone="+2"), db, user
+        )
+        assert created.version == 1
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_crud_queries_do_not_scan_tables(test_db):
+    """
+    Run the owner-scoped CRUD operations, then check the SQLite plan of
+    every statement they executed for a full-table scan.
+    """
+    statements = []
+
+    @event.listens_for(test_db.bind.sync_engine, "before_cursor_execute")
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if not statement.lstrip().upper().startswith("INSERT"):
+            statements.append((statement, parameters[0] if executemany else parameters))
+
+    user = await crud.create_user(schemas.UserCreate(email="plan@example.com", password="secret"), test_db)
+    contact = await crud.create_contact(
+        schemas.ContactCreate(first_name="Plan", last_name="Check", email="plan.check@example.com",
+                              phone="+1", birthday="1990-05-06"), test_db, user
+    )
+    await crud.get_user_by_email("plan@example.com", test_db)
+    await crud.get_contact(contact.id, test_db, user)
+    await crud.get_contacts(test_db, user, limit=10, after=0)
+    await crud.get_contacts_by_ids([contact.id], test_db, user)
+    await crud.search_contacts("Plan", test_db, user)
+    await crud.upcoming_birthdays(test_db, user, days=30)
+    await crud.get_changes(0, test_db, user)
+    await crud.list_users(test_db, limit=10, email_prefix="plan")
+    await crud.update_contact(contact.id, schemas.ContactUpdate(phone="+2"), test_db, user)
+    await crud.batch_update_contacts(
+        [schemas.ContactBatchUpdateItem(id=contact.id, phone="+3")], test_db, user
+    )
+    await crud.delete_contact(contact.id, test_db, user)
+    await crud.verify_user_email("plan@example.com", test_db)
+    event.remove(test_db.bind.sync_engine, "before_cursor_execute", capture)
+
+    connection = await test_db.connection()
+    for statement, parameters in statements:
+        result = await connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)
+        plan = [row[-1] for row in result]
+        assert not any(FULL_SCAN.search(step) for step in plan), f"Full table scan:\n{statement}\n{plan}"
@@ -0,0 +1,78 @@
+import asyncio
+from collections import Counter
+
+import pytest
+from fastapi import Depends, FastAPI
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.services.metrics import instrument_engine
+from app.services.profiler import ProfilerMiddleware, ProfileStore, StackSampler
+
+
+def test_store_keeps_only_newest_dumps(tmp_path):
+    store = ProfileStore(str(tmp_path), max_dumps=2)
+    for second in range(4):
+        store.write(f"20260101T00000{second}Z-GET-x-1ms", Counter({"a;b": 1}), [(0.001, "SELECT 1")], "GET /x")
+
+    names = sorted(path.name for path in tmp_path.iterdir())
+    assert names == [
+        "20260101T000002Z-GET-x-1ms.folded", "20260101T000002Z-GET-x-1ms.sql.txt",
+        "20260101T000003Z-GET-x-1ms.folded", "20260101T000003Z-GET-x-1ms.sql.txt",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_unregister_returns_a_profile_the_sampler_no_longer_updates():
+    sampler = StackSampler(interval=0.001)
+    task = asyncio.current_task()
+    live = sampler.register(task)
+    try:
+        await asyncio.sleep(0.02)
+        profile = sampler.unregister(task)
+        await asyncio.sleep(0.02)
+    finally:
+        sampler.stop()
+
+    assert profile is not live
+    assert sum(profile.values()) > 0
+    assert live == profile, "The sampler must not count samples after unregister."
+
+
+@pytest.mark.asyncio
+async def test_slow_sampled_request_is_dumped(test_db, tmp_path):
+    instrument_engine(test_db.bind, "test")
+    app = FastAPI()
+
+    async def get_session():
+        yield test_db
+
+    @app.get("/contacts/slow")
+    async def slow_endpoint(db: AsyncSession = Depends(get_session)):
+        await db.execute(text("SELECT 42"))
+        await asyncio.sleep(0.05)
+        return {}
+
+    @app.get("/contacts/fast")
+    async def fast_endpoint():
+        return {}
+
+    sampler = StackSampler(interval=0.002)
+    middleware = ProfilerMiddleware(
+        app, sampler, ProfileStore(str(tmp_path)), sample_rate=1.0, threshold=0.03, path_prefixes=("/contacts",)
+    )
+    try:
+        async with AsyncClient(transport=ASGITransport(app=middleware), base_url="http://test") as ac:
+            assert (await ac.get("/contacts/fast")).status_code == 200
+            assert (await ac.get("/contacts/slow")).status_code == 200
+    finally:
+        sampler.stop()
+
+    folded = list(tmp_path.glob("*.folded"))
+    assert len(folded) == 1, "Only the request over the threshold is dumped."
+    assert "contacts-slow" in folded[0].name
+    stacks = folded[0].read_text()
+    assert "slow_endpoint (test_profiler.py:" in stacks
+    assert "[await]" in stacks
+    assert "SELECT 42" in folded[0].with_name(folded[0].name.replace(".folded", ".sql.txt")).read_text()
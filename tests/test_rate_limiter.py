@@ -0,0 +1,72 @@
+import fakeredis
+import pytest
+from fastapi import Depends, FastAPI
+from httpx import ASGITransport, AsyncClient
+
+from starlette.requests import Request
+
+from app.auth.security import create_access_token
+from app.auth.token_cache import token_cache
+from app.services import limiter as limiter_module, redis_cache
+from app.services.limiter import RateLimiter, parse_rate_limits
+from app.services.redis_cache import UserSnapshot
+
+
+def test_parse_rate_limits():
+    assert parse_rate_limits("default=120/minute, login=5/second") == {
+        "default": (120, 60),
+        "login": (5, 1),
+    }
+    with pytest.raises(ValueError):
+        parse_rate_limits("default=often")
+
+
+def test_client_key_reads_verified_tokens_from_the_token_cache(monkeypatch):
+    token = create_access_token({"sub": "keyed@example.com"})
+    request = Request({
+        "type": "http", "headers": [(b"authorization", f"Bearer {token}".encode())], "client": ("10.0.0.1", 1),
+    })
+    assert RateLimiter.client_key(request) == "user:keyed@example.com"
+
+    token_cache.set(token, {"sub": "keyed@example.com"}, UserSnapshot(id=1, email="keyed@example.com"))
+    hits = token_cache.stats()["hits"]
+    monkeypatch.setattr(limiter_module, "decode_access_token", lambda token: pytest.fail("Decoded a cached token."))
+    assert RateLimiter.client_key(request) == "user:keyed@example.com"
+    assert token_cache.stats()["hits"] == hits, "Keying must not count as a token cache lookup."
+
+
+def test_client_key_ignores_tokens_that_are_not_access_tokens():
+    token = create_access_token({"sub": "reset@example.com", "type": "password_reset"})
+    request = Request({
+        "type": "http", "headers": [(b"authorization", f"Bearer {token}".encode())], "client": ("10.0.0.1", 1),
+    })
+    assert RateLimiter.client_key(request) == "ip:10.0.0.1"
+
+
+@pytest.mark.asyncio
+async def test_group_limit_per_user_and_local_fast_path(monkeypatch):
+    pytest.importorskip("lupa")
+    monkeypatch.setattr(redis_cache, "redis_client", fakeredis.FakeAsyncRedis())
+    group = "strict"
+    limiter = RateLimiter({"default": (100, 60), group: (2, 60)})
+    app = FastAPI(dependencies=[Depends(limiter)])
+
+    @app.get("/strict")
+    @limiter.limit(group)
+    async def strict_route():
+        return {"ok": True}
+
+    alice = {"Authorization": f"Bearer {create_access_token({'sub': f'alice@{group}.example.com'})}"}
+    bob = {"Authorization": f"Bearer {create_access_token({'sub': f'bob@{group}.example.com'})}"}
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        assert [(await ac.get("/strict", headers=alice)).status_code for _ in range(2)] == [200, 200]
+
+        rejected = await ac.get("/strict", headers=alice)
+        assert rejected.status_code == 429
+        assert int(rejected.headers["Retry-After"]) >= 1
+
+        assert (await ac.get("/strict", headers=alice)).status_code == 429
+        assert limiter.stats()["local_rejected"] == 1, "A known over-quota client must not reach Redis."
+
+        assert (await ac.get("/strict", headers=bob)).status_code == 200, "Users behind one IP get separate buckets."
@@ -0,0 +1,38 @@
+import time
+
+from app.auth.token_cache import TokenCache
+from app.services.redis_cache import UserSnapshot
+
+
+def _user(email: str) -> UserSnapshot:
+    return UserSnapshot(id=1, email=email, is_verified=True)
+
+
+def test_token_cache_hit_miss_and_invalidation():
+    cache = TokenCache(maxsize=10, ttl=60)
+    claims = {"sub": "cached@example.com", "exp": time.time() + 600}
+
+    assert cache.get("token-a") is None
+    cache.set("token-a", claims, _user("cached@example.com"))
+    cache.set("token-b", claims, _user("cached@example.com"))
+
+    assert cache.get("token-a") == (claims, _user("cached@example.com"))
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+    cache.invalidate_user("cached@example.com")
+    assert cache.get("token-a") is None
+    assert cache.get("token-b") is None
+    assert cache.stats()["size"] == 0
+
+
+def test_token_cache_honors_exp_and_size_bound():
+    cache = TokenCache(maxsize=2, ttl=60)
+
+    cache.set("expired", {"exp": time.time() - 1}, _user("old@example.com"))
+    assert cache.get("expired") is None, "Entries must not outlive the token's exp."
+
+    for token in ("t1", "t2", "t3"):
+        cache.set(token, {"exp": time.time() + 600}, _user(f"{token}@example.com"))
+    assert cache.get("t1") is None, "The least recently used entry should be evicted."
+    assert cache.stats()["size"] == 2
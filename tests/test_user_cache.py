@@ -0,0 +1,87 @@
+import asyncio
+
+import fakeredis
+import pytest
+from redis.exceptions import ConnectionError as RedisConnectionError
+
+from app.services import redis_cache
+from app.services.redis_cache import CircuitBreaker, UserSnapshot, load_user
+
+
+@pytest.fixture
+def memory_cache(monkeypatch):
+    store = {}
+
+    async def get_cached_user(email):
+        return store.get(email)
+
+    async def set_cached_user(user, expire=redis_cache.USER_CACHE_TTL):
+        store[user.email] = user
+
+    monkeypatch.setattr(redis_cache, "get_cached_user", get_cached_user)
+    monkeypatch.setattr(redis_cache, "set_cached_user", set_cached_user)
+    return store
+
+
+def test_user_snapshot_is_compact_and_round_trips():
+    snapshot = UserSnapshot(id=7, email="snap@example.com", is_verified=True, is_admin=True)
+
+    assert not hasattr(snapshot, "__dict__")
+    assert UserSnapshot(**snapshot.to_dict()) == snapshot
+    assert redis_cache._user_key("snap@example.com") == f"user:v{redis_cache.USER_CACHE_VERSION}:snap@example.com"
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_share_one_load(memory_cache):
+    calls = 0
+
+    async def loader():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return UserSnapshot(id=1, email="stampede@example.com")
+
+    users = await asyncio.gather(*(load_user("stampede@example.com", loader) for _ in range(10)))
+
+    assert calls == 1, "Only one of the concurrent misses should reach the database."
+    assert all(user == users[0] for user in users)
+    assert memory_cache["stampede@example.com"] == users[0]
+    assert redis_cache._inflight == {}
+
+
+@pytest.mark.asyncio
+async def test_batched_user_cache_round_trip(monkeypatch):
+    monkeypatch.setattr(redis_cache, "redis_client", fakeredis.FakeAsyncRedis())
+    users = [UserSnapshot(id=i, email=f"batch{i}@example.com") for i in range(3)]
+    await redis_cache.set_cached_users(users[:2])
+
+    cached = await redis_cache.get_cached_users([user.email for user in users])
+
+    assert cached == {users[0].email: users[0], users[1].email: users[1], users[2].email: None}
+
+
+@pytest.mark.asyncio
+async def test_redis_failures_fail_open_and_trip_the_breaker(monkeypatch):
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    monkeypatch.setattr(redis_cache, "breaker", breaker)
+    calls = 0
+
+    async def failing(client):
+        nonlocal calls
+        calls += 1
+        raise RedisConnectionError("down")
+
+    results = [await redis_cache.redis_call(failing, default="fallback") for _ in range(4)]
+
+    assert results == ["fallback"] * 4
+    assert calls == 2, "Once open, the breaker must skip Redis entirely."
+    assert breaker.stats()["state"] == "open"
+    assert breaker.stats()["short_circuited"] == 2
+
+    async def succeeding(client):
+        return True
+
+    breaker.opened_at -= 60
+    assert breaker.state == "half-open"
+    assert await redis_cache.redis_call(succeeding, default=False)
+    assert breaker.state == "closed"